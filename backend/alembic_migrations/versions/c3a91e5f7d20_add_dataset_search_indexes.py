@@ -0,0 +1,70 @@
+"""Add search indexes to datasets
+
+Revision ID: c3a91e5f7d20
+Revises: b78dfb4a78bc
+Create Date: 2025-02-03 10:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3a91e5f7d20"
+down_revision: Union[str, None] = "b78dfb4a78bc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match crud.dataset_search_vector() exactly, otherwise Postgres will not
+# use the expression index.
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(file_name, ''))"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Exact-name lookups and ordering/range filters
+    op.create_index("ix_datasets_name", "datasets", ["name"], unique=False)
+    op.create_index(
+        "ix_datasets_uploaded_at", "datasets", ["uploaded_at"], unique=False
+    )
+    op.create_index(
+        "ix_datasets_user_id_uploaded_at",
+        "datasets",
+        ["user_id", "uploaded_at"],
+        unique=False,
+    )
+
+    # Substring search (ILIKE '%q%') on name and file name
+    op.create_index(
+        "ix_datasets_name_trgm",
+        "datasets",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_datasets_file_name_trgm",
+        "datasets",
+        ["file_name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"file_name": "gin_trgm_ops"},
+    )
+
+    # Full-text search over name + file name
+    op.execute(
+        f"CREATE INDEX ix_datasets_search_tsv ON datasets USING gin ({SEARCH_VECTOR_SQL})"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_datasets_search_tsv")
+    op.drop_index("ix_datasets_file_name_trgm", table_name="datasets")
+    op.drop_index("ix_datasets_name_trgm", table_name="datasets")
+    op.drop_index("ix_datasets_user_id_uploaded_at", table_name="datasets")
+    op.drop_index("ix_datasets_uploaded_at", table_name="datasets")
+    op.drop_index("ix_datasets_name", table_name="datasets")
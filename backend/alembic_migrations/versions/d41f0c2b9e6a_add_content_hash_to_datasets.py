@@ -0,0 +1,30 @@
+"""Add content_hash and file_size to datasets
+
+Revision ID: d41f0c2b9e6a
+Revises: c3a91e5f7d20
+Create Date: 2025-02-05 14:31:07.204113
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d41f0c2b9e6a"
+down_revision: Union[str, None] = "c3a91e5f7d20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL; the hash is computed on first download.
+    op.add_column(
+        "datasets", sa.Column("content_hash", sa.String(length=64), nullable=True)
+    )
+    op.add_column("datasets", sa.Column("file_size", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("datasets", "file_size")
+    op.drop_column("datasets", "content_hash")
@@ -17,12 +17,66 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     BACKEND_CORS_ORIGINS: list[AnyHttpUrl] = ["http://localhost", "http://127.0.0.1"]
+    # Responses smaller than this (in bytes) are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    # backend-ml client (see app/services/ml_client.py)
+    ML_SERVICE_URL: str = "http://backend-ml:8000"
+    ML_TIMEOUT_SECONDS: float = 10.0
+    ML_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    ML_MAX_CONNECTIONS: int = 100
+    ML_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    ML_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    ML_RETRIES: int = 2
+    ML_RETRY_BACKOFF_SECONDS: float = 0.1
+    # Consecutive failures that open the circuit, and how long it stays open
+    ML_BREAKER_FAILURES: int = 5
+    ML_BREAKER_RESET_SECONDS: float = 30.0
+    # Span export (see app/middlewares/tracing.py): "none", "file" or "console"
+    TRACING_EXPORTER: str = "none"
+    TRACES_DIR: str = "traces"
+    # Requests slower than this are logged with a per-stage breakdown
+    TRACING_SLOW_SECONDS: float = 1.0
+    # Logging (see app/config/log_config.py): "json" or "text" lines on
+    # stdout, plus a rotating file when LOG_FILE is set
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_FILE: str = ""
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    # INFO/DEBUG records kept per message template per second; 0 keeps all
+    LOG_SAMPLE_PER_SECOND: int = 20
+    # Token-bucket rate limits per route class and user (see
+    # app/services/rate_limiter.py). Buckets live in Redis when a URL is
+    # given, otherwise in a SQLite file shared by the workers of this host
+    # (default: on /dev/shm).
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_URL: str = ""
+    RATE_LIMIT_DB_PATH: str = ""
+    RATE_LIMITS: dict[str, str] = {
+        "auth": "10/minute",
+        "generate": "5/minute",
+        "train": "3/minute",
+        "predict": "30/minute",
+    }
+    # Admission control for heavy requests (see app/services/admission.py),
+    # per worker process: requests running at once, per user, and waiting
+    ADMISSION_MAX_CONCURRENT: int = 4
+    ADMISSION_MAX_PER_USER: int = 2
+    ADMISSION_MAX_QUEUE: int = 16
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    # Worker startup (see the lifespan in app/main.py): database connections
+    # opened ahead of the first requests, and whether to connect to
+    # backend-ml too
+    STARTUP_DB_CONNECTIONS: int = 2
+    STARTUP_WARM_ML_CLIENT: bool = True
 
     model_config = ConfigDict(env_file=".env")
 
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     def assemble_cors_origins(cls, v):
-        logger.info(f"Received BACKEND_CORS_ORIGINS: {v}")
+        logger.info("Received BACKEND_CORS_ORIGINS: %s", v)
         if not v:
             logger.info("No CORS origins provided. Using default empty list.")
             return []
@@ -30,7 +84,7 @@ class Settings(BaseSettings):
             # Attempt to parse as JSON list
             try:
                 parsed = json.loads(v)
-                logger.info(f"Parsed CORS origins as JSON: {parsed}")
+                logger.info("Parsed CORS origins as JSON: %s", parsed)
                 return parsed
             except json.JSONDecodeError:
                 logger.warning(
@@ -40,7 +94,7 @@ class Settings(BaseSettings):
                 # Fallback to comma-separated string
                 return [i.strip() for i in v.split(",")]
         elif isinstance(v, list):
-            logger.info(f"CORS origins already a list: {v}")
+            logger.info("CORS origins already a list: %s", v)
             return v
         logger.error("Invalid format for BACKEND_CORS_ORIGINS")
         raise ValueError("Invalid format for BACKEND_CORS_ORIGINS")
@@ -3,6 +3,7 @@ from .crud import (
     get_password_hash,
     get_user_by_email,
     get_user_by_username,
+    search_datasets,
     verify_password,
 )
 
@@ -12,4 +13,5 @@ __all__ = [
     "create_user",
     "get_password_hash",
     "verify_password",
+    "search_datasets",
 ]
@@ -1,4 +1,8 @@
+from datetime import datetime
+from typing import List, Optional
+
 from passlib.context import CryptContext
+from sqlalchemy import func, literal, or_
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
@@ -31,3 +35,80 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.commit()
     db.refresh(db_user)
     return db_user
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def dataset_search_vector():
+    """
+    Full-text vector over a dataset's name and file name.
+
+    Must stay identical to the expression of the ix_datasets_search_tsv index
+    (see the c3a91e5f7d20 migration) so Postgres can use it.
+    """
+    document = (
+        func.coalesce(models.Dataset.name, "")
+        + literal(" ")
+        + func.coalesce(models.Dataset.file_name, "")
+    )
+    return func.to_tsvector(literal("simple"), document)
+
+
+def search_datasets(
+    db: Session,
+    current_user: models.User,
+    q: Optional[str] = None,
+    name: Optional[str] = None,
+    file_name: Optional[str] = None,
+    owner: Optional[str] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 10,
+) -> List[models.Dataset]:
+    """
+    Search datasets visible to `current_user` (all of them for admins).
+
+    - `q` matches a substring of the name or file name (trigram index) or
+      any of its words (full-text index).
+    - `name` / `file_name` are exact, btree-indexed matches.
+    - `owner` is the exact username of the dataset owner.
+    Results are newest first.
+    """
+    query = db.query(models.Dataset)
+    if current_user.role != "admin":
+        query = query.filter(models.Dataset.user_id == current_user.id)
+
+    if name is not None:
+        query = query.filter(models.Dataset.name == name)
+    if file_name is not None:
+        query = query.filter(models.Dataset.file_name == file_name)
+    if owner is not None:
+        query = query.join(models.Dataset.owner).filter(models.User.username == owner)
+    if uploaded_after is not None:
+        query = query.filter(models.Dataset.uploaded_at >= uploaded_after)
+    if uploaded_before is not None:
+        query = query.filter(models.Dataset.uploaded_at <= uploaded_before)
+
+    if q:
+        pattern = f"%{_escape_like(q)}%"
+        conditions = [
+            models.Dataset.name.ilike(pattern, escape="\\"),
+            models.Dataset.file_name.ilike(pattern, escape="\\"),
+        ]
+        if db.get_bind().dialect.name == "postgresql":
+            conditions.append(
+                dataset_search_vector().op("@@")(
+                    func.plainto_tsquery(literal("simple"), q)
+                )
+            )
+        query = query.filter(or_(*conditions))
+
+    return (
+        query.order_by(models.Dataset.uploaded_at.desc(), models.Dataset.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
@@ -1,6 +1,8 @@
+import logging
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 # Use the environment variable for the database URL
@@ -15,6 +17,8 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for our models
 Base = declarative_base()
 
+logger = logging.getLogger("app")
+
 
 def get_db():
     """
@@ -25,3 +29,35 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def ping() -> bool:
+    """
+    Whether the database answers a trivial query.
+    """
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except SQLAlchemyError:
+        return False
+
+
+def warm_up(connections: int):
+    """
+    Open `connections` pooled connections ahead of the first requests.
+    Failures are only logged: the readiness check reports the database.
+    """
+    # Connections inherited from a preloading gunicorn master are not usable
+    engine.dispose(close=False)
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        logger.warning("Database pool warm-up failed: %s", e)
+    finally:
+        for conn in opened:
+            conn.close()
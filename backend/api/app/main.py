@@ -1,15 +1,20 @@
-import logging.config
+import logging
 import os
+from contextlib import asynccontextmanager
 
-import httpx
-from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
-from fastapi.staticfiles import StaticFiles
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import JSONResponse
 
+from . import database
+from .config.log_config import configure_logging
 from .config.settings import settings
+from .database import engine
+from .middlewares import tracing
+from .middlewares.compression import CompressionMiddleware
+from .middlewares.metrics import MetricsMiddleware, instrument_engine, metrics_response
+from .middlewares.tracing import TracingMiddleware
 from .routers import (
     auth_router,
     data_generator_router,
@@ -17,25 +22,48 @@ from .routers import (
     data_upload_router,
     ml_ops_router,
 )
+from .services.ml_client import MLClient
+from .utils.responses import DefaultJSONResponse
 
-load_dotenv()
-
-# Load logging config from a file
-LOGGING_CONFIG = os.path.join(os.path.dirname(__file__), "../logging.conf")
-if os.path.exists(LOGGING_CONFIG):
-    logging.config.fileConfig(LOGGING_CONFIG, disable_existing_loggers=False)
-else:
-    # Fallback to basicConfig if logging.conf not found
-    logging.basicConfig(level=logging.INFO)
+# Records are formatted and written by a background thread
+configure_logging()
 
 logger = logging.getLogger("app")
 
+tracing.setup_tracing()
+
+UPLOADS_DIR = os.path.join(os.getcwd(), "uploads")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in each worker process, after a preloading gunicorn master forks
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    await run_in_threadpool(database.warm_up, settings.STARTUP_DB_CONNECTIONS)
+    # One pooled client for every backend-ml call, closed at shutdown
+    app.state.ml_client = MLClient()
+    if settings.STARTUP_WARM_ML_CLIENT:
+        await app.state.ml_client.warm_up()
+    app.state.ready = True
+    logger.info("Worker %d ready", os.getpid())
+
+    yield
+
+    # Fail readiness checks first so no new traffic is routed here
+    app.state.ready = False
+    await app.state.ml_client.aclose()
+    engine.dispose()
+    tracing.flush()
+
+
 app = FastAPI(
     title="Data Analysis Platform API",
     description="""
 This API allows you to manage and analyze datasets.
 """,
     version="1.0.0",
+    default_response_class=DefaultJSONResponse,
+    lifespan=lifespan,
 )
 
 
@@ -53,6 +81,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large responses (dataset listings, predictions, ...)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
+app.add_middleware(TracingMiddleware)
+# Added last so it is outermost: latency includes the other middlewares and
+# response sizes are the compressed ones
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+tracing.instrument_engine(engine)
+
+
+@app.get("/health", include_in_schema=False)
+def health():
+    """
+    Liveness: the worker is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    """
+    Readiness: startup has finished, the worker is not shutting down and
+    the database answers.
+    """
+    if not getattr(app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=503)
+    if not database.ping():
+        return JSONResponse({"status": "database unavailable"}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Request, database and backend-ml call metrics in the Prometheus format.
+    """
+    return metrics_response()
+
+
 app.include_router(auth_router)
 
 app.include_router(data_upload_router)
@@ -60,22 +133,16 @@ app.include_router(data_router)
 app.include_router(ml_ops_router)
 app.include_router(data_generator_router)
 
-uploads_dir = os.path.join(os.getcwd(), "uploads")
-os.makedirs(uploads_dir, exist_ok=True)  # Creates the directory if it doesn't exist
-
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
-
 
 async def get_ml_prediction(data):
-    async with httpx.AsyncClient() as client:
-        response = await client.post("http://backend-ml:8000/predict/", json=data)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            # Handle error, possibly raise an HTTPException
-            raise HTTPException(
-                status_code=response.status_code, detail="ML prediction failed"
-            )
+    response = await app.state.ml_client.post("/predict/", json=data, timeout=30.0)
+    if response.status_code == 200:
+        return response.json()
+    else:
+        # Handle error, possibly raise an HTTPException
+        raise HTTPException(
+            status_code=response.status_code, detail="ML prediction failed"
+        )
 
 
 @app.get("/test-logging")
@@ -83,8 +150,3 @@ def test_logging():
     logger.info("Testing INFO log level.")
     logger.debug("Testing DEBUG log level.")
     return {"message": "Logs have been written to console or file."}
-
-
-@app.exception_handler(RateLimitExceeded)
-def rate_limit_exceeded_handler(request, exc):
-    return PlainTextResponse(str(exc), status_code=429)
@@ -0,0 +1,237 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config.settings import settings
+
+logger = logging.getLogger("app")
+
+SERVICE_NAME = "backend-api"
+# Longest SQL statement text recorded on a query span
+MAX_STATEMENT_CHARS = 500
+TRACE_ID_HEADER = "X-Trace-Id"
+
+tracer = trace.get_tracer("app")
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def _is_local_root(span: ReadableSpan) -> bool:
+    return span.parent is None or span.parent.is_remote
+
+
+class SlowTraceLogger(SpanProcessor):
+    """
+    Keeps the finished spans of recent traces; when a local root span (a
+    request) ends after `threshold` seconds, logs how its time was split
+    between the spans below it.
+    """
+
+    def __init__(self, threshold: float, max_traces: int = 1000):
+        self.threshold = threshold
+        self.max_traces = max_traces
+        self._traces = OrderedDict()  # trace id -> [span]
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan):
+        trace_id = span.context.trace_id
+        with self._lock:
+            spans = self._traces.setdefault(trace_id, [])
+            self._traces.move_to_end(trace_id)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+            if not _is_local_root(span):
+                spans.append(span)
+                return
+            below, rest = _split_descendants(spans, span)
+            if rest:
+                self._traces[trace_id] = rest
+            else:
+                self._traces.pop(trace_id, None)
+
+        seconds = (span.end_time - span.start_time) / 1e9
+        if seconds >= self.threshold:
+            logger.warning(
+                "Slow %s: %.3fs (trace %032x)\n%s",
+                span.name,
+                seconds,
+                trace_id,
+                breakdown(below, span),
+            )
+
+
+def _split_descendants(spans, root: ReadableSpan):
+    """
+    (spans below `root` in start order, the others). Children end before
+    their parent, so all of them have been collected when `root` ends.
+    """
+    ids = {root.context.span_id}
+    below, rest = [], []
+    for span in sorted(spans, key=lambda s: s.start_time):
+        if span.parent is not None and span.parent.span_id in ids:
+            ids.add(span.context.span_id)
+            below.append(span)
+        else:
+            rest.append(span)
+    return below, rest
+
+
+def breakdown(spans, root: ReadableSpan) -> str:
+    """
+    One line per span under `root`, indented by depth, in start order.
+    """
+    depth = {root.context.span_id: 0}
+    lines = []
+    for span in sorted(spans, key=lambda s: s.start_time):
+        level = depth.get(span.parent.span_id, 0) + 1
+        depth[span.context.span_id] = level
+        ms = (span.end_time - span.start_time) / 1e6
+        lines.append(f"{'  ' * level}{span.name}: {ms:.1f} ms")
+    return "\n".join(lines)
+
+
+def _file_exporter(service: str) -> ConsoleSpanExporter:
+    os.makedirs(settings.TRACES_DIR, exist_ok=True)
+    path = os.path.join(settings.TRACES_DIR, f"{service}.jsonl")
+    out = open(path, "a", buffering=1)
+    return ConsoleSpanExporter(
+        service_name=service,
+        out=out,
+        formatter=lambda span: span.to_json(indent=None) + "\n",
+    )
+
+
+def setup_tracing(service: str = SERVICE_NAME) -> TracerProvider:
+    """
+    Install the tracer provider of this process (once) with the configured
+    exporter.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            provider = TracerProvider(
+                resource=Resource.create({"service.name": service})
+            )
+            provider.add_span_processor(SlowTraceLogger(settings.TRACING_SLOW_SECONDS))
+            if settings.TRACING_EXPORTER == "file":
+                provider.add_span_processor(BatchSpanProcessor(_file_exporter(service)))
+            elif settings.TRACING_EXPORTER == "console":
+                provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+            trace.set_tracer_provider(provider)
+            _provider = provider
+        return _provider
+
+
+def flush():
+    """
+    Export pending spans; call before a worker process exits.
+    """
+    if _provider is not None:
+        _provider.force_flush()
+
+
+def span(name: str, kind: SpanKind = SpanKind.INTERNAL, **attributes):
+    """
+    `with span("read_csv", path=path):` - a child of the current span.
+    """
+    return tracer.start_as_current_span(name, kind=kind, attributes=attributes)
+
+
+def current_carrier() -> dict:
+    """
+    The current trace context as W3C headers, to send to another service.
+    """
+    carrier = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+class TracingMiddleware:
+    """
+    Runs each request in a server span that continues the caller's trace
+    (W3C `traceparent` header) and returns the trace id in X-Trace-Id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        carrier = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope["headers"]
+        }
+        with tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": method, "http.target": scope["path"]},
+        ) as request_span:
+            trace_id = format(request_span.get_span_context().trace_id, "032x")
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        request_span.set_status(Status(StatusCode.ERROR))
+                    MutableHeaders(raw=message["headers"]).append(
+                        TRACE_ID_HEADER, trace_id
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Named after the route template once the router matched one
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.update_name(f"{method} {route}")
+                    request_span.set_attribute("http.route", route)
+
+
+def instrument_engine(engine):
+    """
+    Run every SQL statement of a SQLAlchemy engine in a client span.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        query_span = tracer.start_span(
+            f"db {operation}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_CHARS],
+            },
+        )
+        conn.info.setdefault("query_spans", []).append(query_span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info["query_spans"].pop().end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None:
+            stack = context.connection.info.get("query_spans")
+            if stack:
+                query_span = stack.pop()
+                query_span.set_status(Status(StatusCode.ERROR))
+                query_span.record_exception(context.original_exception)
+                query_span.end()
@@ -1,4 +1,13 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -18,8 +27,30 @@ class Dataset(Base):
     __tablename__ = "datasets"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     file_name = Column(String, unique=True, nullable=False)
-    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # SHA-256 of the file contents; used as the download ETag
+    content_hash = Column(String(64), nullable=True)
+    file_size = Column(BigInteger, nullable=True)
     owner = relationship("User")
+
+    __table_args__ = (
+        # Trigram indexes back the substring (ILIKE) search in
+        # crud.search_datasets. The full-text index on the combined name and
+        # file name is an expression index and lives in the Alembic migration.
+        Index(
+            "ix_datasets_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_datasets_file_name_trgm",
+            "file_name",
+            postgresql_using="gin",
+            postgresql_ops={"file_name": "gin_trgm_ops"},
+        ),
+        Index("ix_datasets_user_id_uploaded_at", "user_id", "uploaded_at"),
+    )
@@ -16,6 +16,7 @@ from ..crud import (
 from ..database import SessionLocal
 from ..models import User
 from ..services.auth_service import login_user
+from ..services.rate_limiter import RateLimit
 
 router = APIRouter(
     prefix="/auth",
@@ -57,41 +58,49 @@ def get_current_user(
     user = get_user_by_email(db, email=token_data.email)
     if user is None:
         raise credentials_exception
-    logger.info(f"Authenticated user: {user.username}")
+    logger.debug("Authenticated user: %s", user.username)
     return user
 
 
-@router.post("/register", response_model=schemas.UserRead)
+@router.post(
+    "/register",
+    response_model=schemas.UserRead,
+    dependencies=[Depends(RateLimit("auth"))],
+)
 def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    logger.debug(f"Attempting to register user: {user.username}")
+    logger.debug("Attempting to register user: %s", user.username)
     db_user = get_user_by_email(db, email=user.email)
     if db_user:
-        logger.warning(f"Registration failed: Email {user.email} already registered.")
+        logger.warning("Registration failed: Email %s already registered.", user.email)
         raise HTTPException(status_code=400, detail="Email already registered")
     db_user = get_user_by_username(db, username=user.username)
     if db_user:
-        logger.warning(f"Registration failed: Username {user.username} already taken.")
+        logger.warning("Registration failed: Username %s already taken.", user.username)
         raise HTTPException(status_code=400, detail="Username already taken")
     created_user = create_user(db=db, user=user)
-    logger.info(f"User registered successfully: {created_user.username}")
+    logger.info("User registered successfully: %s", created_user.username)
     return created_user
 
 
-@router.post("/login", response_model=schemas.Token)
+@router.post(
+    "/login",
+    response_model=schemas.Token,
+    dependencies=[Depends(RateLimit("auth"))],
+)
 def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    logger.debug(f"Login attempt for email: {credentials.email}")
+    logger.debug("Login attempt for email: %s", credentials.email)
     try:
         access_token = login_user(credentials, db)
-        logger.info(f"User logged in successfully: {credentials.email}")
+        logger.info("User logged in successfully: %s", credentials.email)
         return {"access_token": access_token, "token_type": "bearer"}
     except HTTPException as e:
-        logger.warning(f"Login failed for email: {credentials.email} - {e.detail}")
+        logger.warning("Login failed for email: %s - %s", credentials.email, e.detail)
         raise e
 
 
 @router.get("/me", response_model=schemas.UserRead)
 def read_users_me(current_user: User = Depends(get_current_user)):
-    logger.debug(f"Fetching profile for user: {current_user.username}")
+    logger.debug("Fetching profile for user: %s", current_user.username)
     return current_user
 
 
@@ -105,7 +114,7 @@ def update_profile(
     """
     Update the current user's email or password (or both).
     """
-    logger.debug(f"Update profile request for user: {current_user.username}")
+    logger.debug("Update profile request for user: %s", current_user.username)
     updated = False
     if email:
         # Check if email is already taken
@@ -130,8 +139,8 @@ def update_profile(
         db.add(current_user)
         db.commit()
         db.refresh(current_user)
-        logger.info(f"Profile updated successfully for user: {current_user.username}")
+        logger.info("Profile updated successfully for user: %s", current_user.username)
         return {"message": "Profile updated successfully."}
     else:
-        logger.debug(f"No changes made to profile for user: {current_user.username}")
+        logger.debug("No changes made to profile for user: %s", current_user.username)
         return {"message": "No changes made."}
@@ -1,13 +1,26 @@
 import os
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
+from ..crud import search_datasets
 from ..database import SessionLocal
 from ..routers.auth import get_current_user
+from ..utils.files import etag_matches, hash_file
+from ..utils.responses import DatasetFileResponse, orm_response
 
 # Constants
 UPLOADS_DIR = "./uploads"
@@ -77,7 +90,48 @@ def get_all_datasets(
     if current_user.role != "admin":
         query = query.filter(models.Dataset.user_id == current_user.id)
 
-    return query.offset(skip).limit(page_size).all()
+    return orm_response(query.offset(skip).limit(page_size).all(), schemas.DatasetRead)
+
+
+@router.get(
+    "/search",
+    response_model=List[schemas.DatasetRead],
+    summary="Search datasets",
+    description="Search datasets by name, file name, owner and upload date range. "
+    "`q` does a substring/full-text match on the name and file name, "
+    "`name` is an exact match.",
+)
+def search_datasets_endpoint(
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200, description="Free-text search"
+    ),
+    name: Optional[str] = Query(None, description="Exact dataset name"),
+    file_name: Optional[str] = Query(None, description="Exact file name"),
+    owner: Optional[str] = Query(None, description="Owner username"),
+    uploaded_after: Optional[datetime] = Query(
+        None, description="Only datasets uploaded at or after this time"
+    ),
+    uploaded_before: Optional[datetime] = Query(
+        None, description="Only datasets uploaded at or before this time"
+    ),
+    page: int = Query(1, ge=1, description="Page number (starts at 1)"),
+    page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    datasets = search_datasets(
+        db,
+        current_user,
+        q=q,
+        name=name,
+        file_name=file_name,
+        owner=owner,
+        uploaded_after=uploaded_after,
+        uploaded_before=uploaded_before,
+        skip=(page - 1) * page_size,
+        limit=page_size,
+    )
+    return orm_response(datasets, schemas.DatasetRead)
 
 
 @router.get(
@@ -101,6 +155,57 @@ def get_dataset(
     return dataset
 
 
+@router.get(
+    "/{dataset_id}/file",
+    summary="Download a dataset file",
+    description="Download the dataset's file (owner or admin). Supports "
+    "`If-None-Match` revalidation against the content-hash ETag and HTTP "
+    "`Range` requests for partial reads.",
+    response_class=DatasetFileResponse,
+    responses={
+        206: {"description": "Partial content"},
+        304: {"description": "Not modified"},
+    },
+)
+def download_dataset_file(
+    dataset_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    dataset = get_dataset_or_404(dataset_id, db)
+    if current_user.role != "admin" and dataset.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="You do not have permission to perform this action"
+        )
+
+    file_path = os.path.join(UPLOADS_DIR, dataset.file_name)
+    if not os.path.isfile(file_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found on server: {dataset.file_name}",
+        )
+
+    if not dataset.content_hash:
+        # Datasets stored before content hashing: hash once and remember it.
+        dataset.content_hash, dataset.file_size = hash_file(file_path)
+        db.commit()
+
+    etag = f'"{dataset.content_hash}"'
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+        )
+
+    return DatasetFileResponse(
+        file_path,
+        etag=etag,
+        media_type="text/csv",
+        filename=dataset.file_name,
+    )
+
+
 @router.delete(
     "/{dataset_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -12,6 +12,9 @@ from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..database import SessionLocal
 from ..routers.auth import get_current_user
+from ..services.admission import Admit
+from ..services.rate_limiter import RateLimit
+from ..utils.files import hash_file
 from ..utils.generators import (
     generate_account_number,
     generate_admission_date,
@@ -228,7 +231,11 @@ COLUMN_GENERATORS: Dict[str, Callable[[int], List]] = {
 @router.post(
     "/generate",
     response_model=schemas.DatasetRead,
-    dependencies=[Depends(RoleChecker(["admin", "user"]))],
+    dependencies=[
+        Depends(RateLimit("generate")),
+        Depends(RoleChecker(["admin", "user"])),
+        Depends(Admit("generate")),
+    ],
 )
 def generate_dataset(
     request: GenerateDatasetRequest,
@@ -299,6 +306,7 @@ def generate_dataset(
     # Step 4: Save the CSV to disk
     try:
         df.to_csv(file_path, index=False)
+        content_hash, file_size = hash_file(file_path)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to save dataset to disk: {str(e)}"
@@ -325,6 +333,8 @@ def generate_dataset(
 
         existing_dataset.name = dataset_name
         existing_dataset.uploaded_at = pd.Timestamp.utcnow()
+        existing_dataset.content_hash = content_hash
+        existing_dataset.file_size = file_size
         db.commit()
         db.refresh(existing_dataset)
         return existing_dataset
@@ -336,6 +346,8 @@ def generate_dataset(
             file_name=final_file_name,
             uploaded_at=pd.Timestamp.utcnow(),
             user_id=current_user.id,
+            content_hash=content_hash,
+            file_size=file_size,
         )
         db.add(new_dataset)
         try:
@@ -1,7 +1,6 @@
 import os
-import shutil
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
@@ -9,6 +8,8 @@ from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..database import get_db
 from ..routers.auth import get_current_user
+from ..services.admission import Admit
+from ..utils.files import copy_and_hash
 from ..utils.role_checker import RoleChecker
 
 router = APIRouter(
@@ -28,9 +29,9 @@ def sanitize_filename(filename: str) -> str:
 
 def save_file(
     file: UploadFile, dataset_name: Optional[str] = None, overwrite: bool = False
-) -> str:
+) -> Tuple[str, str, int]:
     """
-    Save an uploaded file and return its stored file name.
+    Save an uploaded file and return (stored file name, sha256, size).
     If a file with the same name already exists and `overwrite` is False,
     raise HTTPException(400).
     """
@@ -64,11 +65,10 @@ def save_file(
                 "Use `overwrite=true` if you want to replace it.",
             )
 
-    # Save the new or overwritten file
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # Save the new or overwritten file, hashing it in the same pass
+    content_hash, file_size = copy_and_hash(file.file, file_path)
 
-    return file_name
+    return file_name, content_hash, file_size
 
 
 @router.post(
@@ -76,7 +76,9 @@ def save_file(
     response_model=schemas.DatasetRead,
     summary="Upload a dataset file",
     description="Upload a CSV file and store metadata in the database.",
-    dependencies=[Depends(RoleChecker(["admin", "user"]))],
+    # The body has been received by the time dependencies run, so the slot
+    # covers storing and hashing the file, not the transfer
+    dependencies=[Depends(RoleChecker(["admin", "user"])), Depends(Admit("upload"))],
 )
 def upload_dataset(
     name: Optional[str] = Form(None),
@@ -108,7 +110,9 @@ def upload_dataset(
 
     # Attempt to save the file
     try:
-        file_name = save_file(file, dataset_name=name, overwrite=overwrite)
+        file_name, content_hash, file_size = save_file(
+            file, dataset_name=name, overwrite=overwrite
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -127,6 +131,8 @@ def upload_dataset(
             # Update the existing dataset's metadata
             existing_dataset.name = name
             existing_dataset.uploaded_at = datetime.utcnow()
+            existing_dataset.content_hash = content_hash
+            existing_dataset.file_size = file_size
             db.commit()
             db.refresh(existing_dataset)
             dataset = existing_dataset
@@ -145,6 +151,8 @@ def upload_dataset(
             file_name=file_name,
             uploaded_at=datetime.utcnow(),
             user_id=current_user.id,
+            content_hash=content_hash,
+            file_size=file_size,
         )
         db.add(dataset)
         db.commit()
@@ -1,25 +1,62 @@
 import os
-from typing import List
+from typing import List, Optional
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ..database import SessionLocal
 from ..models.models import Dataset
 from ..routers.auth import get_current_user
+from ..schemas import (
+    MODEL_NAME_PATTERN,
+    BatchPredictionCreate,
+    PredictionCreate,
+    SearchJobCreate,
+    TrainingJobCreate,
+)
+from ..services.ml_client import MLClient, get_ml_client
+from ..services.rate_limiter import RateLimit
+from ..utils.files import hash_file
 
 router = APIRouter(prefix="/ml", tags=["ml_ops"])
 
-metrics_store = {}  # dict with keys: (model_name, version), value: dict of metrics
+# Metrics are persisted by backend-ml (see app/ml/metrics_manager.py there);
+# this service only proxies reads to it.
 
+# Per-route timeouts (seconds): lookups are quick on backend-ml; queueing a
+# job also validates the dataset there; a prediction may load the model first
+READ_TIMEOUT = 5.0
+SUBMIT_TIMEOUT = 10.0
+PREDICT_TIMEOUT = 30.0
 
-def save_metrics(model_name: str, version: str, metrics: dict):
-    metrics_store[(model_name, version)] = metrics
 
-
-def get_metrics(model_name: str, version: str):
-    return metrics_store.get((model_name, version), None)
+async def fetch_ml_metrics(
+    ml: MLClient, model_name: str, version: str, dataset: Optional[str]
+):
+    """
+    Fetch the stored metrics of a model version from backend-ml.
+    Returns None when backend-ml has no metrics for it.
+    """
+    params = {"dataset": dataset} if dataset else None
+    try:
+        response = await ml.get(
+            f"/ml/metrics/{model_name}/{version}", params=params, timeout=READ_TIMEOUT
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=502, detail=f"Failed to get metrics from backend-ml: {e}"
+        )
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=response.json().get("detail", "Failed to retrieve metrics"),
+        )
+    return response.json()
 
 
 def get_db():
@@ -30,22 +67,20 @@ def get_db():
         db.close()
 
 
-@router.post("/retrain")
-async def retrain_model(
-    dataset_id: int,
-    label_column: str,
-    model_name: str,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
+def owned_dataset_file(dataset_id: int, db: Session, current_user):
     """
-    Triggers the retraining of a model using the backend-ml service.
+    The dataset `dataset_id` and the path of its file, checking that the
+    current user may use it (owner or admin) and that the file exists.
     """
     dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
     if not dataset:
         raise HTTPException(
             status_code=404, detail=f"Dataset with id {dataset_id} not found."
         )
+    if current_user.role != "admin" and dataset.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="You do not have permission to perform this action"
+        )
 
     file_path = os.path.join("uploads", dataset.file_name)
     if not os.path.exists(file_path):
@@ -53,32 +88,158 @@ async def retrain_model(
             status_code=404,
             detail=f"File for dataset_id {dataset_id} not found on disk.",
         )
+    return dataset, file_path
+
+
+async def submit_ml_job(ml: MLClient, path: str, payload: dict, failure: str):
+    """
+    Queue a job on backend-ml and return it; `failure` describes the action
+    in error details. backend-ml's error statuses are passed through, with
+    the Retry-After of a 429 for a user over their active job quota.
+    """
+    try:
+        response = await ml.post(path, json=payload, timeout=SUBMIT_TIMEOUT)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"{failure}: {e}")
+    if response.status_code != 202:
+        retry_after = response.headers.get("Retry-After")
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=response.json().get("detail", failure),
+            headers={"Retry-After": retry_after} if retry_after else None,
+        )
+    return response.json()
+
+
+@router.post(
+    "/retrain",
+    status_code=202,
+    dependencies=[Depends(RateLimit("train"))],
+)
+async def retrain_model(
+    dataset_id: int,
+    label_column: str,
+    model_name: str = Query(..., pattern=MODEL_NAME_PATTERN),
+    algorithm: str = "randomforestclassifier",
+    mode: str = "in_memory",
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
+):
+    """
+    Queues the retraining of a model on backend-ml and returns the training
+    job; poll GET /ml/jobs/{job_id} for progress. Each retrain registers a
+    new version of `model_name`. `mode="chunked"` streams large datasets
+    from disk instead of loading them whole.
+    """
+    dataset, file_path = owned_dataset_file(dataset_id, db, current_user)
+    payload = {
+        "dataset_path": file_path,
+        "label_column": label_column,
+        "algorithm": algorithm,
+        "model_name": model_name,
+        "mode": mode,
+        "metadata": {"owner_id": current_user.id, "source_dataset_id": dataset.id},
+    }
+    return await submit_ml_job(
+        ml, "/ml/train2/jobs", payload, "Failed to trigger model training"
+    )
+
+
+@router.post(
+    "/train",
+    status_code=202,
+    tags=["ml_ops"],
+    dependencies=[Depends(RateLimit("train"))],
+)
+async def create_training_job(
+    request: TrainingJobCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
+):
+    """
+    Queue a training job on backend-ml for one of the user's datasets (the
+    model wizard's "Start Training"). Poll GET /ml/jobs/{job_id} for
+    progress; the result holds the registered model id and version.
+    """
+    dataset, file_path = owned_dataset_file(request.dataset_id, db, current_user)
+    payload = request.model_dump(exclude={"dataset_id"}, exclude_none=True)
+    payload["dataset_path"] = file_path
+    payload["metadata"] = {"owner_id": current_user.id, "source_dataset_id": dataset.id}
+    return await submit_ml_job(
+        ml, "/ml/train2/jobs", payload, "Failed to trigger model training"
+    )
+
+
+@router.post(
+    "/search",
+    status_code=202,
+    tags=["ml_ops"],
+    dependencies=[Depends(RateLimit("train"))],
+)
+async def create_search_job(
+    request: SearchJobCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
+):
+    """
+    Queue a hyperparameter search on backend-ml for one of the user's
+    datasets. It trains one model per candidate, so it counts against the
+    same limits as training. Poll GET /ml/jobs/{job_id} like a training job.
+    """
+    dataset, file_path = owned_dataset_file(request.dataset_id, db, current_user)
+    payload = request.model_dump(exclude={"dataset_id"}, exclude_none=True)
+    payload["dataset_path"] = file_path
+    payload["metadata"] = {"owner_id": current_user.id, "source_dataset_id": dataset.id}
+    return await submit_ml_job(
+        ml, "/ml/search/jobs", payload, "Failed to start the search"
+    )
 
-    train_endpoint = "http://backend-ml:8000/train/"
+
+@router.post(
+    "/predict",
+    tags=["ml_ops"],
+    dependencies=[Depends(RateLimit("predict"))],
+)
+async def predict(
+    request: PredictionCreate,
+    current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
+):
+    """
+    Predict with a trained model on backend-ml (the model wizard's single
+    predictions), under the "predict" rate limit. Returns the predictions
+    and probabilities; backend-ml's error statuses are passed through.
+    """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                train_endpoint,
-                json={
-                    "dataset_path": os.path.abspath(file_path),
-                    "label_column": label_column,
-                    "model_name": model_name,
-                },
-            )
-            response.raise_for_status()  # Raise an exception for bad status codes
-            return response.json()
+        response = await ml.post(
+            "/ml/predict2",
+            json=request.model_dump(exclude_none=True),
+            timeout=PREDICT_TIMEOUT,
+        )
     except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Prediction failed: {e}")
+    if response.status_code != 200:
         raise HTTPException(
-            status_code=500, detail=f"Failed to trigger model training: {e}"
+            status_code=response.status_code,
+            detail=response.json().get("detail", "Prediction failed"),
         )
+    return response.json()
 
 
 @router.get("/performance")
-def get_model_performance(model_name: str, version: str = "v1"):
+async def get_model_performance(
+    model_name: str,
+    version: str = "v1",
+    dataset: Optional[str] = None,
+    ml: MLClient = Depends(get_ml_client),
+):
     """
     Return stored model metrics for the given model_name and version.
     """
-    metrics = get_metrics(model_name, version)
+    metrics = await fetch_ml_metrics(ml, model_name, version, dataset)
     if metrics is None:
         raise HTTPException(
             status_code=404,
@@ -87,43 +248,186 @@ def get_model_performance(model_name: str, version: str = "v1"):
     return metrics
 
 
-@router.get("/models", response_model=List[str], tags=["ml_ops"])
-def list_models(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+@router.get("/models", response_model=List[dict], tags=["ml_ops"])
+async def list_models(
+    model_id: Optional[str] = None,
+    algorithm: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+    current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
+):
+    """
+    Return registered model versions (newest first) from the backend-ml
+    model registry, so the user can pick them in the UI.
+    """
+    params = {
+        k: v
+        for k, v in {
+            "model_id": model_id,
+            "algorithm": algorithm,
+            "page": page,
+            "page_size": page_size,
+        }.items()
+        if v is not None
+    }
+    try:
+        response = await ml.get("/ml/models", params=params, timeout=READ_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=502, detail=f"Failed to list models from backend-ml: {e}"
+        )
+
+
+@router.get("/metrics", response_model=List[dict], tags=["ml_ops"])
+async def list_model_metrics(
+    model_name: Optional[str] = None,
+    version: Optional[str] = None,
+    dataset: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+    current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
+):
     """
-    Return all .joblib and .h5 files from saved_models directory
-    so the user can pick them in the UI.
+    Query stored metrics by model, version and/or dataset via backend-ml.
     """
-    saved_models_dir = "saved_models"
-    if not os.path.exists(saved_models_dir):
-        return []
-    all_files = os.listdir(saved_models_dir)
-    # you might only return .joblib / .h5
-    model_files = [f for f in all_files if (f.endswith(".joblib") or f.endswith(".h5"))]
-    return model_files
+    params = {
+        k: v
+        for k, v in {
+            "model_name": model_name,
+            "version": version,
+            "dataset": dataset,
+            "page": page,
+            "page_size": page_size,
+        }.items()
+        if v is not None
+    }
+    try:
+        response = await ml.get("/ml/metrics", params=params, timeout=READ_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=502, detail=f"Failed to get metrics from backend-ml: {e}"
+        )
 
 
 @router.get("/metrics/{model_name}/{version}", response_model=dict, tags=["ml_ops"])
 async def get_model_metrics(
     model_name: str,
     version: str = "v1",
-    db: Session = Depends(get_db),
+    dataset: Optional[str] = None,
     current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
 ):
     """
     Retrieve performance metrics for a specified model and version from the backend-ml service.
     """
-    metrics_endpoint = f"http://backend-ml:8000/metrics/{model_name}/{version}"
+    metrics = await fetch_ml_metrics(ml, model_name, version, dataset)
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="No metrics found.")
+    return metrics
+
+
+def register_output_dataset(job: dict, db: Session):
+    """
+    Record the output CSV of a finished batch prediction job as a Dataset of
+    the user who started it (once). Returns the dataset id.
+
+    The frontend polls in a loop, so two polls may both find the job done;
+    the unique file name lets only one insert win and the other re-reads it.
+    """
+    file_name = os.path.basename(job["result"]["output_path"])
+    dataset_id = db.query(Dataset.id).filter(Dataset.file_name == file_name).scalar()
+    if dataset_id is not None:
+        return dataset_id
+
+    metadata = job["params"]["metadata"]
+    content_hash, file_size = hash_file(os.path.join("uploads", file_name))
+    dataset = Dataset(
+        name=metadata["output_name"],
+        file_name=file_name,
+        user_id=metadata["owner_id"],
+        content_hash=content_hash,
+        file_size=file_size,
+    )
+    db.add(dataset)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return db.query(Dataset.id).filter(Dataset.file_name == file_name).scalar()
+    return dataset.id
+
+
+@router.post(
+    "/batch-predict",
+    status_code=202,
+    tags=["ml_ops"],
+    dependencies=[Depends(RateLimit("predict"))],
+)
+async def create_batch_prediction(
+    request: BatchPredictionCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
+):
+    """
+    Start a batch prediction job over an uploaded dataset. backend-ml streams
+    the file through the model in chunks; poll GET /ml/jobs/{job_id} for
+    progress. When the job succeeds the predictions become a new dataset.
+    """
+    dataset, file_path = owned_dataset_file(request.dataset_id, db, current_user)
+    payload = {
+        "dataset_path": file_path,
+        "model_name": request.model_name,
+        "version": request.version,
+        "metadata": {
+            "owner_id": current_user.id,
+            "source_dataset_id": dataset.id,
+            "output_name": request.output_name or f"{dataset.name} predictions",
+        },
+    }
+    return await submit_ml_job(
+        ml, "/ml/jobs/batch-predict", payload, "Failed to start batch prediction"
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=dict, tags=["ml_ops"])
+async def get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    ml: MLClient = Depends(get_ml_client),
+):
+    """
+    Status, progress and logs of a backend-ml job (training or batch
+    prediction). For a finished batch prediction the response includes
+    `output_dataset_id`; a finished training job's result holds the model id
+    and version.
+    """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(metrics_endpoint)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=response.json().get("detail", "Failed to retrieve metrics"),
-                )
+        response = await ml.get(f"/ml/jobs/{job_id}", timeout=READ_TIMEOUT)
     except httpx.HTTPError as e:
         raise HTTPException(
-            status_code=500, detail=f"Failed to get metrics from backend-ml: {e}"
+            status_code=502, detail=f"Failed to get job from backend-ml: {e}"
+        )
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail="Failed to get job from backend-ml")
+    job = response.json()
+
+    owner_id = job["params"].get("metadata", {}).get("owner_id")
+    if current_user.role != "admin" and owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    if job["kind"] == "batch_predict" and job["status"] == "succeeded":
+        # Hashing the file and the queries would block the event loop
+        job["output_dataset_id"] = await run_in_threadpool(
+            register_output_dataset, job, db
         )
+    return job
@@ -1,8 +1,13 @@
 from .schemas import (
+    MODEL_NAME_PATTERN,
+    BatchPredictionCreate,
     DatasetCreate,
     DatasetRead,
+    PredictionCreate,
+    SearchJobCreate,
     Token,
     TokenData,
+    TrainingJobCreate,
     UserCreate,
     UserLogin,
     UserRead,
@@ -16,4 +21,9 @@ __all__ = [
     "DatasetCreate",
     "DatasetRead",
     "UserLogin",
+    "BatchPredictionCreate",
+    "PredictionCreate",
+    "TrainingJobCreate",
+    "SearchJobCreate",
+    "MODEL_NAME_PATTERN",
 ]
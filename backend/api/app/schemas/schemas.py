@@ -1,8 +1,11 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
+# backend-ml's model ids: they become file names and URL path segments
+MODEL_NAME_PATTERN = r"^[A-Za-z0-9_-][A-Za-z0-9._-]*$"
+
 
 class UserCreate(BaseModel):
     username: str
@@ -71,3 +74,44 @@ class GenerateDatasetRequest(BaseModel):
     overwrite: bool = Field(
         default=False, description="If True and filename already exists, overwrite it"
     )
+
+
+class PredictionCreate(BaseModel):
+    model_name: str
+    # Registry version ("v2", "2" or "latest"); newest when omitted
+    version: Optional[str] = None
+    # Row records, or columns ({"feature1": [...], ...}); send exactly one
+    data: Optional[List[Dict[str, Any]]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+
+
+class BatchPredictionCreate(BaseModel):
+    dataset_id: int
+    model_name: str
+    version: Optional[str] = None
+    output_name: Optional[str] = Field(
+        default=None, description="Name of the output dataset"
+    )
+
+
+class TrainingJobCreate(BaseModel):
+    dataset_id: int
+    label_column: str
+    algorithm: str
+    hyperparams: dict = {}
+    # Registry id; backend-ml defaults it to "<algorithm>_<dataset file name>"
+    model_name: Optional[str] = Field(default=None, pattern=MODEL_NAME_PATTERN)
+    # "in_memory", or "chunked" for datasets that do not fit in memory
+    mode: str = "in_memory"
+
+
+class SearchJobCreate(BaseModel):
+    dataset_id: int
+    label_column: str
+    algorithm: str
+    # "grid", "random" or "halving" (successive halving)
+    strategy: str = "grid"
+    # Parameter -> list of values, or {"low", "high", "log"} for random draws
+    param_grid: Dict[str, Any]
+    n_trials: Optional[int] = Field(default=None, ge=1)
+    model_name: Optional[str] = Field(default=None, pattern=MODEL_NAME_PATTERN)
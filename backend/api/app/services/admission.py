@@ -0,0 +1,140 @@
+import asyncio
+import math
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, Request, status
+
+from ..config.settings import settings
+from ..middlewares.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT,
+)
+from .rate_limiter import client_identity
+
+# Weight of the latest run in the average duration behind Retry-After
+DURATION_SMOOTHING = 0.2
+
+
+class AdmissionController:
+    """
+    Bounds how many heavy requests run at once in this worker process:
+    `max_concurrent` hold a slot, up to `max_queue` more wait for one (at
+    most `queue_timeout` seconds), and each user may have `max_per_user`
+    admitted or waiting. Anything beyond is refused at once - 429 for a
+    user over quota, 503 when the queue is full - with a Retry-After
+    estimated from recent run times, so interactive requests keep their
+    share of the workers.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_user: int,
+        max_queue: int,
+        queue_timeout: float,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._per_user = Counter()
+        self.waiting = 0
+        self.average_seconds = 1.0
+
+    def retry_after(self) -> int:
+        # Time for the running requests and the queue ahead to drain
+        rounds = (self.waiting + self.max_concurrent) / self.max_concurrent
+        return max(1, math.ceil(rounds * self.average_seconds))
+
+    def _refuse(self, operation: str, reason: str, code: int, detail: str):
+        ADMISSION_REJECTED.labels(operation, reason).inc()
+        raise HTTPException(
+            status_code=code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    @asynccontextmanager
+    async def admit(self, user: str, operation: str):
+        if self._per_user[user] >= self.max_per_user:
+            self._refuse(
+                operation,
+                "user_quota",
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                f"You already have {self.max_per_user} heavy requests running",
+            )
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self._refuse(
+                operation,
+                "queue_full",
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "The server is busy; retry later",
+            )
+
+        self._per_user[user] += 1
+        try:
+            await self._acquire(operation)
+            ADMISSION_IN_FLIGHT.labels(operation).inc()
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.average_seconds += DURATION_SMOOTHING * (
+                    time.perf_counter() - started - self.average_seconds
+                )
+                ADMISSION_IN_FLIGHT.labels(operation).dec()
+                self._slots.release()
+        finally:
+            self._per_user[user] -= 1
+            if not self._per_user[user]:
+                del self._per_user[user]
+
+    async def _acquire(self, operation: str):
+        if not self._slots.locked():
+            # A free slot is taken without suspending
+            await self._slots.acquire()
+            ADMISSION_WAIT.labels(operation).observe(0)
+            return
+        self.waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(operation).inc()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._refuse(
+                operation,
+                "queue_timeout",
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "The server is busy; retry later",
+            )
+        finally:
+            self.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(operation).dec()
+            ADMISSION_WAIT.labels(operation).observe(time.perf_counter() - started)
+
+
+controller = AdmissionController(
+    settings.ADMISSION_MAX_CONCURRENT,
+    settings.ADMISSION_MAX_PER_USER,
+    settings.ADMISSION_MAX_QUEUE,
+    settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+
+
+class Admit:
+    """
+    Dependency holding an admission slot while a heavy route runs:
+    `dependencies=[Depends(Admit("generate"))]`.
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+
+    async def __call__(self, request: Request):
+        async with controller.admit(client_identity(request), self.operation):
+            yield
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+import httpx
+from fastapi import Request
+from opentelemetry.trace import SpanKind
+
+from ..config.settings import settings
+from ..middlewares import tracing
+from ..middlewares.metrics import OUTBOUND_LATENCY
+
+logger = logging.getLogger("app")
+
+try:
+    import h2  # noqa: F401 - httpx negotiates HTTP/2 only when h2 is installed
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Safe to send twice; other methods are only retried when nothing was sent
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+# Responses worth retrying: backend-ml restarting or overloaded
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """
+    backend-ml failed repeatedly; calls fail fast until the breaker resets.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. While open, calls
+    are refused; after `reset_timeout` seconds one trial call is let through
+    (half-open), and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_in_flight):
+            retry_in = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(
+                f"backend-ml is unavailable; retrying in {max(retry_in, 0):.0f}s"
+            )
+        if state == "half_open":
+            self._trial_in_flight = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    "backend-ml failed %d times in a row; opening the circuit",
+                    self.failures,
+                )
+            self.opened_at = time.monotonic()
+
+
+class MLClient:
+    """
+    The application-wide async client for backend-ml: one keep-alive
+    connection pool, per-call timeouts, retries with jittered exponential
+    backoff and a circuit breaker.
+    """
+
+    def __init__(
+        self,
+        base_url: str = settings.ML_SERVICE_URL,
+        timeout: float = settings.ML_TIMEOUT_SECONDS,
+        retries: int = settings.ML_RETRIES,
+        backoff: float = settings.ML_RETRY_BACKOFF_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(
+            settings.ML_BREAKER_FAILURES, settings.ML_BREAKER_RESET_SECONDS
+        )
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(timeout, connect=settings.ML_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.ML_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ML_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.ML_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            transport=transport,
+        )
+
+    def _should_retry(self, method: str, error: Optional[Exception], attempt: int):
+        if attempt >= self.retries:
+            return False
+        if error is None:  # a retryable status code
+            return method in IDEMPOTENT_METHODS
+        # The request never reached backend-ml, so any method can be resent
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+            return True
+        return method in IDEMPOTENT_METHODS and isinstance(error, httpx.TransportError)
+
+    async def _sleep_before_retry(self, attempt: int):
+        # "Full jitter": spreads out the retries of concurrent callers
+        await asyncio.sleep(random.uniform(0, self.backoff * 2**attempt))
+
+    async def request(
+        self, method: str, path: str, timeout: Optional[float] = None, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request to backend-ml. Raises httpx.HTTPError when it cannot
+        be reached (CircuitOpenError while the breaker is open); any HTTP
+        response, including errors, is returned.
+        """
+        method = method.upper()
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(
+                timeout, connect=settings.ML_CONNECT_TIMEOUT_SECONDS
+            )
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            started = time.perf_counter()
+            try:
+                response = await self._send(method, path, attempt, **kwargs)
+            except httpx.TransportError as e:
+                OUTBOUND_LATENCY.labels("backend-ml", method, "error").observe(
+                    time.perf_counter() - started
+                )
+                self.breaker.record_failure()
+                if not self._should_retry(method, e, attempt):
+                    raise
+            else:
+                OUTBOUND_LATENCY.labels(
+                    "backend-ml", method, str(response.status_code)
+                ).observe(time.perf_counter() - started)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if not self._should_retry(method, None, attempt):
+                    return response
+                await response.aclose()
+            await self._sleep_before_retry(attempt)
+            attempt += 1
+
+    async def _send(self, method: str, path: str, attempt: int, **kwargs):
+        with tracing.span(
+            f"backend-ml {method}",
+            SpanKind.CLIENT,
+            **{"http.method": method, "http.url": path, "retry.attempt": attempt},
+        ) as span:
+            # backend-ml continues this trace
+            kwargs["headers"] = {
+                **(kwargs.get("headers") or {}),
+                **tracing.current_carrier(),
+            }
+            response = await self._client.request(method, path, **kwargs)
+            span.set_attribute("http.status_code", response.status_code)
+            return response
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def warm_up(self):
+        """
+        Open a pooled connection to backend-ml before the first request
+        needs one. Bypasses retries and the circuit breaker; failures are
+        only logged.
+        """
+        try:
+            response = await self._client.get("/health")
+            await response.aclose()
+        except httpx.HTTPError as e:
+            logger.warning("backend-ml connection warm-up failed: %s", e)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+def get_ml_client(request: Request) -> MLClient:
+    """
+    Dependency returning the client created by the app's lifespan handler.
+    """
+    return request.app.state.ml_client
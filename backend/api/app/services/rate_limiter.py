@@ -0,0 +1,239 @@
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from jose import JWTError, jwt
+
+from ..config.settings import settings
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - only the SQLite store is available
+    redis = None
+
+logger = logging.getLogger("app")
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+# Expired buckets are deleted from the SQLite store every this many takes
+PRUNE_EVERY = 1000
+
+# Refill a bucket for the time since its last update, then take `cost`
+# tokens if there are enough. Runs atomically on the Redis server.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+def parse_limit(value: str) -> Tuple[int, float]:
+    """
+    "10/minute" -> (capacity 10, refill rate 10/60 tokens per second).
+    """
+    count, _, period = value.partition("/")
+    period = period.strip().rstrip("s")
+    if period not in PERIODS or int(count) <= 0:
+        raise ValueError(f"Invalid rate limit {value!r}; expected e.g. '10/minute'")
+    return int(count), int(count) / PERIODS[period]
+
+
+def _refill(tokens: float, updated: float, now: float, capacity: int, rate: float):
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a SQLite file, shared by every worker process on the
+    host. Kept on /dev/shm by default, so updates never touch a disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Losing recent counts in a crash is harmless
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    expires REAL NOT NULL
+                )
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, capacity: int, rate: float, cost: int, now: float):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens = capacity if row is None else _refill(*row, now, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                """
+                INSERT INTO buckets (key, tokens, updated, expires)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    tokens = excluded.tokens,
+                    updated = excluded.updated,
+                    expires = excluded.expires
+                """,
+                (key, tokens, now, now + (capacity - tokens) / rate),
+            )
+            self._takes += 1
+            if self._takes % PRUNE_EVERY == 0:
+                # A bucket past its expiry is full again, same as no row
+                conn.execute("DELETE FROM buckets WHERE expires < ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+
+class RedisBucketStore:
+    """
+    Token buckets in Redis, shared by every worker on every host.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key: str, capacity: int, rate: float, cost: int, now: float):
+        allowed, tokens = self._script(keys=[key], args=[capacity, rate, now, cost])
+        return bool(allowed), float(tokens)
+
+
+def default_store():
+    if settings.RATE_LIMIT_REDIS_URL:
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but redis is not installed")
+        return RedisBucketStore(redis.Redis.from_url(settings.RATE_LIMIT_REDIS_URL))
+    path = settings.RATE_LIMIT_DB_PATH
+    if not path:
+        shm = "/dev/shm"
+        directory = shm if os.path.isdir(shm) else tempfile.gettempdir()
+        path = os.path.join(directory, "api_rate_limits.db")
+    return SQLiteBucketStore(path)
+
+
+class RateLimiter:
+    """
+    Token-bucket limits per route class ("auth", "generate", ...) and
+    client. A class without a configured limit is not limited.
+    """
+
+    def __init__(self, limits: Dict[str, str], store=None):
+        self.limits = {name: parse_limit(value) for name, value in limits.items()}
+        self._store = store
+        self._store_lock = threading.Lock()
+
+    @property
+    def store(self):
+        with self._store_lock:
+            if self._store is None:
+                self._store = default_store()
+            return self._store
+
+    def hit(self, route_class: str, client: str, cost: int = 1) -> Optional[dict]:
+        """
+        Take `cost` tokens from the client's bucket for `route_class`.
+        Raises a 429 HTTPException with Retry-After when there are not
+        enough; otherwise returns the rate limit headers to send.
+        """
+        if not settings.RATE_LIMIT_ENABLED or route_class not in self.limits:
+            return None
+        capacity, rate = self.limits[route_class]
+        try:
+            allowed, tokens = self.store.take(
+                f"ratelimit:{route_class}:{client}", capacity, rate, cost, time.time()
+            )
+        except Exception:
+            # An unavailable store must not take the API down with it
+            logger.warning("Rate limit store unavailable", exc_info=True)
+            return None
+
+        headers = {
+            "X-RateLimit-Limit": str(capacity),
+            "X-RateLimit-Remaining": str(int(tokens)),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(math.ceil((cost - tokens) / rate))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many {route_class} requests; retry later",
+                headers=headers,
+            )
+        return headers
+
+
+limiter = RateLimiter(settings.RATE_LIMITS)
+
+
+def client_identity(request: Request) -> str:
+    """
+    The user a request acts for, from the subject of its bearer token, or
+    its IP address when it carries no valid token. Decoding the token needs
+    no database lookup, so throttled requests are refused cheaply.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimit:
+    """
+    Dependency limiting a route by its route class:
+    `dependencies=[Depends(RateLimit("train"))]`.
+    """
+
+    def __init__(self, route_class: str, cost: int = 1):
+        self.route_class = route_class
+        self.cost = cost
+
+    def __call__(self, request: Request, response: Response):
+        headers = limiter.hit(self.route_class, client_identity(request), self.cost)
+        if headers:
+            response.headers.update(headers)
@@ -1,4 +1,3 @@
-from .rate_limiter import limiter
 from .role_checker import RoleChecker
 
-__all__ = ["RoleChecker", "limiter"]
+__all__ = ["RoleChecker"]
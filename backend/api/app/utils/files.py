@@ -0,0 +1,49 @@
+import hashlib
+from typing import BinaryIO, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def copy_and_hash(src: BinaryIO, dst_path: str) -> Tuple[str, int]:
+    """
+    Stream `src` into `dst_path`, hashing it on the way.
+    Returns (sha256 hex digest, size in bytes).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(dst_path, "wb") as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_file(path: str) -> Tuple[str, int]:
+    """Return (sha256 hex digest, size in bytes) of the file at `path`."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against `etag` (RFC 9110).
+    """
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
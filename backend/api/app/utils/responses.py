@@ -0,0 +1,105 @@
+from typing import Iterable, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+    DefaultJSONResponse = JSONResponse
+
+
+def orm_to_dicts(objects: Iterable, schema: Type[BaseModel]) -> list:
+    """
+    Copy the fields declared on `schema` straight off ORM objects.
+
+    Rows loaded from the database already satisfy the schema, so this skips
+    FastAPI's per-object `response_model` validation.
+    """
+    fields = tuple(schema.model_fields)
+    return [{field: getattr(obj, field) for field in fields} for obj in objects]
+
+
+def orm_response(objects: Iterable, schema: Type[BaseModel], status_code: int = 200):
+    """
+    Serialize ORM objects as a JSON list of `schema` without re-validation.
+    Keep `response_model=List[schema]` on the route for the OpenAPI docs.
+    """
+    content = orm_to_dicts(objects, schema)
+    if orjson is None:
+        content = jsonable_encoder(content)
+    return DefaultJSONResponse(content, status_code=status_code)
+
+
+class DatasetFileResponse(FileResponse):
+    """
+    FileResponse with a caller-supplied strong ETag and zero-copy sending.
+
+    When the ASGI server implements the `http.response.zerocopysend`
+    extension the file descriptor is handed to the server (sendfile);
+    otherwise the file is streamed in large chunks. Range and If-Range
+    handling come from Starlette, with If-Range checked against our ETag.
+    """
+
+    chunk_size = 1024 * 1024
+
+    def __init__(self, path: str, etag: str, **kwargs):
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers["etag"] = etag
+        headers.setdefault("cache-control", "private, no-cache")
+        super().__init__(path, headers=headers, **kwargs)
+        self.etag = etag
+        self.zero_copy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.zero_copy = "http.response.zerocopysend" in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    def _should_use_range(self, http_if_range: str, stat_result) -> bool:
+        return http_if_range == self.etag or super()._should_use_range(
+            http_if_range, stat_result
+        )
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if not self.zero_copy or send_header_only:
+            await super()._handle_simple(send, send_header_only)
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        with open(self.path, "rb") as file:
+            await send(
+                {"type": "http.response.zerocopysend", "file": file, "more_body": False}
+            )
+
+    async def _handle_single_range(
+        self, send: Send, start: int, end: int, file_size: int, send_header_only: bool
+    ) -> None:
+        if not self.zero_copy or send_header_only:
+            await super()._handle_single_range(
+                send, start, end, file_size, send_header_only
+            )
+            return
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await send(
+            {"type": "http.response.start", "status": 206, "headers": self.raw_headers}
+        )
+        with open(self.path, "rb") as file:
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": start,
+                    "count": end - start,
+                    "more_body": False,
+                }
+            )
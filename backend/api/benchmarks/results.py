@@ -0,0 +1,153 @@
+"""
+Timing, JSON results and baseline comparison for the benchmarks in this
+directory. backend/ml/benchmarks/results.py writes the same format.
+
+A results file looks like
+
+    {"suite": "api", "created_at": "...", "environment": {...},
+     "benchmarks": {"list_datasets.page_1": {"metric": "p50_seconds",
+                    "value": 0.004, "higher_is_better": false, ...}}}
+
+and a run compared against a baseline fails when any benchmark got worse
+than the baseline by more than the tolerance. Compare runs from the same
+machine; on shared CI runners, where timings swing widely, raise
+--tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def timed(fn, repeat: int, warmup: int = 1) -> dict:
+    """
+    Call `fn()` `warmup` times untimed, then `repeat` times timed.
+    Returns latency statistics in seconds.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "p50_seconds": statistics.median(samples),
+        "p95_seconds": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_seconds": samples[0],
+        "mean_seconds": statistics.fmean(samples),
+    }
+
+
+class Results:
+    """
+    The benchmarks of one run, keyed by name. Each has one headline value
+    that is compared against the baseline, plus any details.
+    """
+
+    def __init__(self, suite: str):
+        self.suite = suite
+        self.benchmarks = {}
+
+    def add(
+        self, name: str, metric: str, value: float, higher_is_better: bool, **details
+    ):
+        self.benchmarks[name] = {
+            "metric": metric,
+            "value": value,
+            "higher_is_better": higher_is_better,
+            **details,
+        }
+        direction = "higher" if higher_is_better else "lower"
+        print(f"{name:<48} {metric:>16} {value:>14.6g}  ({direction} is better)")
+
+    def latency(self, name: str, stats: dict, **details):
+        self.add(name, "p50_seconds", stats["p50_seconds"], False, **stats, **details)
+
+    def throughput(self, name: str, metric: str, value: float, **details):
+        self.add(name, metric, value, True, **details)
+
+    def to_dict(self) -> dict:
+        return {
+            "suite": self.suite,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "benchmarks": self.benchmarks,
+        }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    One row per benchmark present in both runs: (name, baseline value,
+    current value, relative change, regressed). A positive change is an
+    improvement whichever direction the metric goes.
+    """
+    rows = []
+    for name, result in sorted(current["benchmarks"].items()):
+        before = baseline["benchmarks"].get(name)
+        if (
+            before is None
+            or before["metric"] != result["metric"]
+            or not before["value"]
+        ):
+            continue
+        change = (result["value"] - before["value"]) / before["value"]
+        if not result["higher_is_better"]:
+            change = -change
+        rows.append(
+            (name, before["value"], result["value"], change, change < -tolerance)
+        )
+    return rows
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative slowdown allowed before a benchmark counts as a regression",
+    )
+
+
+def finish(results: Results, args: argparse.Namespace) -> int:
+    """
+    Write and compare the results as the command line asked. Returns the
+    exit status: 1 when a benchmark regressed against the baseline.
+    """
+    current = results.to_dict()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"results written to {args.output}")
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(current, baseline, args.tolerance)
+    print(f"\n{'benchmark':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<48} {before:>12.6g} {after:>12.6g} {change:>+8.1%}{flag}")
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(
+            f"\n{len(regressions)} benchmark(s) regressed by more than "
+            f"{args.tolerance:.0%}: {', '.join(regressions)}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
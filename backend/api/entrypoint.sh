@@ -17,6 +17,10 @@ else
    exit 1
 fi
 
-# Start the FastAPI application using uvicorn
+# Start the FastAPI application: the given command (e.g. the image's
+# gunicorn CMD), or a single reloading uvicorn for development
 echo "Starting the FastAPI application..."
+if [ "$#" -gt 0 ]; then
+  exec "$@"
+fi
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
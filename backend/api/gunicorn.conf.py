@@ -0,0 +1,38 @@
+"""
+Production server settings: gunicorn supervising uvicorn workers. Read
+automatically by `gunicorn app.main:app` run from this directory.
+"""
+
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+# Requests mostly wait on PostgreSQL and backend-ml, so run more workers
+# than cores
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+# Import the app (pandas, SQLAlchemy, ...) once in the master; workers are
+# forked with it already loaded and share its memory pages
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+# In-flight requests get this long to finish on SIGTERM or a reload
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers after this many requests (0: never), staggered by jitter
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+_metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _metrics_dir:
+    # Metric files left by a previous run would be added to this one's
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if _metrics_dir:
+        from prometheus_client import multiprocess
+
+        # Drop the worker's live gauges (in-flight and admitted requests)
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,4 @@
+"""
+Load tests replaying the frontend's user flows against the API and
+backend-ml. See loadtest/__main__.py for how to run them.
+"""
@@ -0,0 +1,116 @@
+"""
+Load test replaying the frontend's user sessions against the API, which
+calls backend-ml for training and predictions.
+
+Run from backend/api, against the docker-compose stack:
+
+    python -m loadtest --api-url http://localhost:8000 \
+        --users 50 --spawn-rate 5 --duration 300
+
+or in-process, with a fresh SQLite database and a backend-ml stub instead
+of the real service (quick enough for CI):
+
+    python -m loadtest --users 5 --duration 30 --output loadtest.json
+
+Each user logs in, generates a dataset and trains a model on it, then
+keeps browsing datasets (list, preview, group-by download), predicting,
+generating and training, with random think time in between. The report
+gives throughput, p50/p95/p99 latency and the error rate of every step;
+the run exits with status 1 when the overall error rate is above
+--max-error-rate. In-process runs disable rate limiting, since every user
+would share one client address.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from .runner import in_process, run
+
+
+def setup_app(workdir: str):
+    """
+    Configure the API for an in-process run against SQLite in `workdir`.
+    """
+    from benchmarks.bench_api import setup_app as setup_benchmark_app
+
+    setup_benchmark_app(f"sqlite:///{workdir}/loadtest.db", workdir)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def main_async(args) -> dict:
+    options = {
+        "users": args.users,
+        "spawn_rate": args.spawn_rate,
+        "duration": args.duration,
+        "think_time": args.think_time,
+        "poll_interval": args.poll_interval,
+        "n_rows": args.rows,
+        "seed": args.seed,
+    }
+    if args.api_url:
+        stats = await run(args.api_url, **options)
+    else:
+        setup_app(tempfile.mkdtemp(prefix="loadtest_"))
+        async with in_process(
+            train_seconds=args.stub_train_seconds, ml_latency=args.stub_latency
+        ) as targets:
+            stats = await run(**targets, **options)
+    print(stats.report())
+    return stats.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", help="default: the API app in-process")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument(
+        "--spawn-rate", type=float, default=2.0, help="users started per second"
+    )
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument(
+        "--think-time", type=float, default=1.0, help="mean pause between tasks"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="seconds between training job polls",
+    )
+    parser.add_argument("--rows", type=int, default=1000, help="rows per dataset")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--stub-train-seconds", type=float, default=0.5)
+    parser.add_argument(
+        "--stub-latency", type=float, default=0.0, help="added to stub responses"
+    )
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    if args.output:
+        # In-process runs chdir to a temporary directory
+        args.output = os.path.abspath(args.output)
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+
+    steps = results["steps"].values()
+    requests = sum(step["requests"] for step in steps)
+    errors = sum(step["errors"] for step in steps)
+    error_rate = errors / requests if requests else 1.0
+    if error_rate > args.max_error_rate:
+        print(
+            f"error rate {error_rate:.1%} is above {args.max_error_rate:.1%}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Runs simulated users against the services, either over the network or
+in-process through ASGI transports.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import time
+from typing import Optional
+
+import httpx
+
+from .scenarios import UserSession
+from .stats import Stats
+
+logger = logging.getLogger("app")
+
+# Stand-in host names for the in-process transports
+IN_PROCESS_API_URL = "http://backend-api"
+IN_PROCESS_ML_URL = "http://backend-ml"
+
+
+async def run(
+    api_url: str,
+    users: int = 10,
+    spawn_rate: float = 2.0,
+    duration: float = 60.0,
+    think_time: float = 1.0,
+    poll_interval: float = 1.0,
+    n_rows: int = 1000,
+    seed: Optional[int] = None,
+    api_transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Stats:
+    """
+    Start `users` sessions, `spawn_rate` per second, and let them run for
+    `duration` seconds from the start. Requests in flight at the end are
+    waited for and still count.
+    """
+    stats = Stats()
+    rng = random.Random(seed)
+    run_id = f"{os.getpid()}_{rng.randrange(16**6):06x}"
+    limits = httpx.Limits(max_connections=max(users, 10))
+    timeout = httpx.Timeout(120.0)
+    async with httpx.AsyncClient(
+        base_url=api_url, transport=api_transport, limits=limits, timeout=timeout
+    ) as api:
+        stats.start()
+        deadline = time.monotonic() + duration
+        tasks = []
+        for i in range(users):
+            session = UserSession(
+                api,
+                stats,
+                username=f"loadtest_{run_id}_{i}",
+                think_time=think_time,
+                poll_interval=poll_interval,
+                n_rows=n_rows,
+                rng=random.Random(rng.random()),
+            )
+            tasks.append(asyncio.create_task(session.run(deadline)))
+            if i + 1 < users:
+                await asyncio.sleep(1 / spawn_rate)
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error("Load test user crashed: %r", result)
+        stats.stop()
+    return stats
+
+
+@contextlib.asynccontextmanager
+async def in_process(train_seconds: float = 0.5, ml_latency: float = 0.0):
+    """
+    Start the API app (with its lifespan) with a backend-ml stub behind it,
+    and yield the keyword arguments that point run() at it. The API must
+    already be configured through the environment, see __main__.setup_app.
+    """
+    from app.main import app
+    from app.services.ml_client import MLClient
+
+    from .stub_ml import create_app
+
+    stub = create_app(train_seconds=train_seconds, latency=ml_latency)
+    async with app.router.lifespan_context(app):
+        # The API's calls to backend-ml reach the stub
+        await app.state.ml_client.aclose()
+        app.state.ml_client = MLClient(
+            base_url=IN_PROCESS_ML_URL, transport=httpx.ASGITransport(app=stub)
+        )
+        yield {
+            "api_url": IN_PROCESS_API_URL,
+            "api_transport": httpx.ASGITransport(app=app),
+        }
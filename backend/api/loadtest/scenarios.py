@@ -0,0 +1,245 @@
+"""
+Simulated user sessions, following the requests the Streamlit frontend
+makes for each flow (frontend/components/datasets.py and the pages).
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from .stats import Stats
+
+GENERATE_COLUMNS = ["age", "amount", "quantity", "is_fraud"]
+LABEL_COLUMN = "is_fraud"
+PREVIEW_BYTES = 256 * 1024
+
+# Relative frequency of each task once a user has a dataset and a model:
+# mostly browsing, some predictions, the occasional new dataset or model
+TASK_WEIGHTS = {"browse": 6, "predict": 3, "generate": 1, "train": 1}
+
+
+class UserSession:
+    """
+    One simulated user: registers and logs in, then keeps running weighted
+    tasks with think time in between until `deadline`. A new user first
+    generates a dataset and trains a model on it, as they would have to
+    before predicting.
+    """
+
+    def __init__(
+        self,
+        api: httpx.AsyncClient,
+        stats: Stats,
+        username: str,
+        think_time: float = 1.0,
+        poll_interval: float = 1.0,
+        n_rows: int = 1000,
+        rng: Optional[random.Random] = None,
+    ):
+        self.api = api
+        self.stats = stats
+        self.username = username
+        self.think_time = think_time
+        self.poll_interval = poll_interval
+        self.n_rows = n_rows
+        self.rng = rng or random.Random()
+        self.headers: Dict[str, str] = {}
+        self.datasets: List[dict] = []
+        self.models: List[dict] = []
+        # {dataset_id: (etag, bytes)}, like the frontend's session cache
+        self.file_cache: Dict[int, tuple] = {}
+        self.deadline = 0.0
+
+    async def request(
+        self, step: str, client: httpx.AsyncClient, method: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        """
+        Send one request and record it under `step`. Returns None when the
+        request failed (an error status or no response at all).
+        """
+        kwargs.setdefault("headers", self.headers)
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(
+                step, time.perf_counter() - started, type(e).__name__, True
+            )
+            return None
+        failed = resp.status_code >= 400
+        self.stats.record(
+            step, time.perf_counter() - started, str(resp.status_code), failed
+        )
+        return None if failed else resp
+
+    async def login(self) -> bool:
+        email = f"{self.username}@example.com"
+        password = "loadtest-password"
+        # 400 when the user exists already, e.g. against a reused stack
+        await self.api.post(
+            "/auth/register",
+            json={"username": self.username, "email": email, "password": password},
+        )
+        while time.monotonic() < self.deadline:
+            started = time.perf_counter()
+            resp = await self.api.post(
+                "/auth/login", json={"email": email, "password": password}
+            )
+            if resp.status_code != 429:
+                break
+            # The login limiter is per client address, so all users share it
+            await asyncio.sleep(float(resp.headers.get("Retry-After", 1)))
+        else:
+            return False
+        self.stats.record(
+            "login",
+            time.perf_counter() - started,
+            str(resp.status_code),
+            resp.status_code >= 400,
+        )
+        if resp.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        return True
+
+    async def browse(self):
+        """
+        The data grouping page: search the user's datasets, preview one with
+        a Range request, then download the whole file for the group-by,
+        revalidated with If-None-Match when it was fetched before.
+        """
+        resp = await self.request(
+            "list_datasets",
+            self.api,
+            "GET",
+            "/data/search",
+            params={"page": 1, "page_size": 100},
+        )
+        if resp is None:
+            return
+        datasets = resp.json() or self.datasets
+        if not datasets:
+            return
+        dataset = self.rng.choice(datasets)
+        url = f"/data/{dataset['id']}/file"
+
+        if dataset["id"] not in self.file_cache:
+            await self.request(
+                "preview",
+                self.api,
+                "GET",
+                url,
+                headers={**self.headers, "Range": f"bytes=0-{PREVIEW_BYTES - 1}"},
+            )
+        cached = self.file_cache.get(dataset["id"])
+        headers = dict(self.headers)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        resp = await self.request("group_by", self.api, "GET", url, headers=headers)
+        if resp is not None and resp.status_code == 200 and "ETag" in resp.headers:
+            self.file_cache[dataset["id"]] = (resp.headers["ETag"], resp.content)
+
+    async def generate(self):
+        resp = await self.request(
+            "generate",
+            self.api,
+            "POST",
+            "/data-generator/generate",
+            json={
+                "n_rows": self.n_rows,
+                "columns": GENERATE_COLUMNS,
+                "dataset_name": f"{self.username}_{len(self.datasets)}",
+                "overwrite": True,
+            },
+        )
+        if resp is not None:
+            self.datasets.append(resp.json())
+
+    async def train(self):
+        """
+        Queue a training job through the API and poll it like the model
+        wizard does. "train" records the time until the model is ready; each
+        poll is recorded as "train_poll".
+        """
+        dataset = self.rng.choice(self.datasets)
+        started = time.perf_counter()
+        resp = await self.request(
+            "train_submit",
+            self.api,
+            "POST",
+            "/ml/train",
+            json={
+                "dataset_id": dataset["id"],
+                "label_column": LABEL_COLUMN,
+                "algorithm": "LogisticRegression",
+                "hyperparams": {},
+                "mode": "in_memory",
+            },
+        )
+        if resp is None:
+            return
+        job_id = resp.json()["job_id"]
+        while time.monotonic() < self.deadline:
+            resp = await self.request(
+                "train_poll", self.api, "GET", f"/ml/jobs/{job_id}"
+            )
+            if resp is None:
+                return
+            job = resp.json()
+            if job["status"] not in ("queued", "running"):
+                break
+            await asyncio.sleep(self.poll_interval)
+        else:
+            # The run ended first; an unfinished job is not a failure
+            return
+        succeeded = job["status"] == "succeeded"
+        self.stats.record(
+            "train", time.perf_counter() - started, job["status"], not succeeded
+        )
+        if succeeded:
+            self.models.append(job["result"])
+
+    async def predict(self):
+        model = self.rng.choice(self.models)
+        row = {
+            "age": self.rng.randint(18, 90),
+            "amount": round(self.rng.uniform(1, 1000), 2),
+            "quantity": self.rng.randint(1, 10),
+        }
+        await self.request(
+            "predict",
+            self.api,
+            "POST",
+            "/ml/predict",
+            json={
+                "model_name": model["model_id"],
+                "version": model["version"],
+                "data": [row],
+            },
+        )
+
+    def next_task(self):
+        if not self.datasets:
+            return self.generate
+        if not self.models:
+            return self.train
+        names = list(TASK_WEIGHTS)
+        name = self.rng.choices(names, weights=[TASK_WEIGHTS[n] for n in names])[0]
+        return getattr(self, name)
+
+    async def run(self, deadline: float):
+        """
+        Run tasks until `deadline` (a time.monotonic() value).
+        """
+        self.deadline = deadline
+        if not await self.login():
+            return
+        while time.monotonic() < deadline:
+            await self.next_task()()
+            if self.think_time:
+                # Exponential think time: most pauses short, a few long
+                pause = self.rng.expovariate(1 / self.think_time)
+                await asyncio.sleep(min(pause, max(deadline - time.monotonic(), 0)))
@@ -0,0 +1,102 @@
+import math
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class StepStats:
+    """
+    Latencies and outcomes of one step (e.g. "list_datasets") across users.
+    """
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.errors = 0
+
+    def record(self, seconds: float, outcome: str, failed: bool):
+        self.latencies.append(seconds)
+        self.outcomes[outcome] += 1
+        if failed:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "throughput_per_second": count / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+            "outcomes": dict(self.outcomes),
+        }
+
+
+class Stats:
+    """
+    Per-step statistics of a load test run. Only results recorded between
+    start() and stop() count; setup requests are left out.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, StepStats] = {}
+        self.started: Optional[float] = None
+        self.stopped: Optional[float] = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.stopped = time.perf_counter()
+
+    @property
+    def recording(self) -> bool:
+        return self.started is not None and self.stopped is None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def record(self, step: str, seconds: float, outcome: str, failed: bool):
+        if self.recording:
+            self.steps.setdefault(step, StepStats()).record(seconds, outcome, failed)
+
+    def to_dict(self) -> dict:
+        elapsed = self.elapsed
+        return {
+            "duration_seconds": elapsed,
+            "steps": {
+                name: step.summary(elapsed) for name, step in sorted(self.steps.items())
+            },
+        }
+
+    def report(self) -> str:
+        lines = [
+            f"{'step':<16} {'reqs':>7} {'err%':>6} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  outcomes"
+        ]
+        for name, s in self.to_dict()["steps"].items():
+            outcomes = " ".join(f"{k}:{v}" for k, v in sorted(s["outcomes"].items()))
+            lines.append(
+                f"{name:<16} {s['requests']:>7} {s['error_rate']:>6.1%} "
+                f"{s['throughput_per_second']:>8.1f} {s['p50_ms']:>8.1f} "
+                f"{s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['max_ms']:>8.1f}  "
+                f"{outcomes}"
+            )
+        return "\n".join(lines)
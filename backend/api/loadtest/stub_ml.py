@@ -0,0 +1,100 @@
+"""
+A stand-in for backend-ml with the endpoints the user flows call, so the
+load test can run in-process (e.g. in CI) without training real models.
+Jobs succeed `train_seconds` after they are queued; every request waits
+`latency` seconds first, to mimic the real service's response times.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+
+class TrainRequest(BaseModel):
+    dataset_path: str
+    label_column: str
+    algorithm: str
+    hyperparams: Dict = {}
+    mode: Optional[str] = None
+    model_name: Optional[str] = None
+    metadata: Dict = {}
+
+
+class PredictRequest(BaseModel):
+    model_name: str
+    version: Optional[str] = None
+    data: Optional[List[Dict]] = None
+    columns: Optional[Dict[str, List]] = None
+
+
+def create_app(train_seconds: float = 0.5, latency: float = 0.0) -> FastAPI:
+    app = FastAPI(title="backend-ml stub")
+    jobs: Dict[str, dict] = {}
+    models: Dict[str, int] = {}
+
+    async def respond():
+        if latency:
+            await asyncio.sleep(latency)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/ml/train2/jobs", status_code=202)
+    async def create_training_job(request: TrainRequest):
+        await respond()
+        job_id = uuid.uuid4().hex
+        jobs[job_id] = {
+            "job_id": job_id,
+            "kind": "train",
+            "params": request.model_dump(),
+            "created": time.monotonic(),
+        }
+        return {"job_id": job_id, "status": "queued"}
+
+    @app.get("/ml/jobs/{job_id}")
+    async def get_job(job_id: str):
+        await respond()
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(404, f"Job not found: {job_id}")
+        params = job["params"]
+        progress = min((time.monotonic() - job["created"]) / train_seconds, 1.0)
+        if progress >= 1.0 and "result" not in job:
+            model_id = params["model_name"] or (
+                f"{params['algorithm']}_{params['dataset_path'].rsplit('/', 1)[-1]}"
+            )
+            models[model_id] = models.get(model_id, 0) + 1
+            job["result"] = {
+                "model_id": model_id,
+                "version": f"v{models[model_id]}",
+                "model_file": f"{model_id}.joblib",
+            }
+        result = job.get("result")
+        return {
+            "job_id": job_id,
+            "kind": job["kind"],
+            "status": "succeeded" if result else "running",
+            "progress": progress,
+            "params": params,
+            "result": result,
+            "error": None,
+            "logs": "",
+        }
+
+    @app.post("/ml/predict2")
+    async def predict2(request: PredictRequest):
+        await respond()
+        if request.model_name not in models:
+            raise HTTPException(404, f"Model file not found for: {request.model_name}")
+        if request.columns is not None:
+            rows = len(next(iter(request.columns.values()), []))
+        else:
+            rows = len(request.data or [])
+        return {"predictions": [0] * rows, "probabilities": [[0.5, 0.5]] * rows}
+
+    return app
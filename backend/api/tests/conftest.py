@@ -7,6 +7,7 @@ import psycopg2
 import pytest
 from alembic import command
 from alembic.config import Config
+from app.config.settings import settings
 from app.database import get_db
 from app.main import app
 from dotenv import load_dotenv
@@ -26,6 +27,17 @@ def load_env():
     load_dotenv(dotenv_path=env_path)
 
 
+@pytest.fixture(scope="session", autouse=True)
+def no_rate_limits():
+    """
+    Every test logs in from the same address; test_rate_limiter turns the
+    limits back on for itself.
+    """
+    settings.RATE_LIMIT_ENABLED = False
+    yield
+    settings.RATE_LIMIT_ENABLED = True
+
+
 @pytest.fixture(scope="session")
 def db_engine():
     TEST_DATABASE_URL = os.getenv(
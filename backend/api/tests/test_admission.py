@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from app.services.admission import AdmissionController
+from fastapi import HTTPException
+
+
+async def _hold(controller, user, release: asyncio.Event, operation="generate"):
+    async with controller.admit(user, operation):
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_user_over_quota_gets_429():
+    controller = AdmissionController(
+        max_concurrent=4, max_per_user=1, max_queue=4, queue_timeout=1
+    )
+    release = asyncio.Event()
+    running = asyncio.create_task(_hold(controller, "user:a", release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as e:
+        async with controller.admit("user:a", "generate"):
+            pass
+    assert e.value.status_code == 429
+    assert int(e.value.headers["Retry-After"]) >= 1
+    # Other users are still admitted
+    async with controller.admit("user:b", "generate"):
+        pass
+
+    release.set()
+    await running
+    async with controller.admit("user:a", "generate"):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_full_queue_gets_503_and_waiters_are_admitted_in_turn():
+    controller = AdmissionController(
+        max_concurrent=1, max_per_user=5, max_queue=1, queue_timeout=5
+    )
+    release = asyncio.Event()
+    running = asyncio.create_task(_hold(controller, "user:a", release))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(_hold(controller, "user:b", release))
+    await asyncio.sleep(0)
+    assert controller.waiting == 1
+
+    with pytest.raises(HTTPException) as e:
+        async with controller.admit("user:c", "train"):
+            pass
+    assert e.value.status_code == 503
+    assert "Retry-After" in e.value.headers
+
+    release.set()
+    await asyncio.gather(running, waiting)
+    assert controller.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_waiting_too_long_gets_503():
+    controller = AdmissionController(
+        max_concurrent=1, max_per_user=5, max_queue=5, queue_timeout=0.01
+    )
+    release = asyncio.Event()
+    running = asyncio.create_task(_hold(controller, "user:a", release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as e:
+        async with controller.admit("user:b", "upload"):
+            pass
+    assert e.value.status_code == 503
+    assert controller.waiting == 0
+    assert controller._per_user["user:b"] == 0
+
+    release.set()
+    await running
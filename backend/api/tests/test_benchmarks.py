@@ -0,0 +1,39 @@
+import argparse
+import json
+
+from benchmarks.results import Results, compare, finish, timed
+
+
+def _run(**values):
+    results = Results("api")
+    for name, (value, higher_is_better) in values.items():
+        results.add(name, "value", value, higher_is_better)
+    return results
+
+
+def test_compare_flags_regressions_in_either_direction():
+    baseline = _run(latency=(1.0, False), throughput=(100.0, True)).to_dict()
+    current = _run(latency=(1.5, False), throughput=(110.0, True)).to_dict()
+
+    rows = {row[0]: row for row in compare(current, baseline, tolerance=0.2)}
+
+    assert rows["latency"][3] == -0.5 and rows["latency"][4]
+    assert round(rows["throughput"][3], 2) == 0.1 and not rows["throughput"][4]
+
+
+def test_finish_writes_json_and_fails_on_regression(tmp_path):
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(_run(latency=(1.0, False)).to_dict()))
+    args = argparse.Namespace(
+        output=str(tmp_path / "out.json"), baseline=str(baseline_path), tolerance=0.2
+    )
+
+    assert finish(_run(latency=(1.1, False)), args) == 0
+    assert json.loads((tmp_path / "out.json").read_text())["suite"] == "api"
+    assert finish(_run(latency=(2.0, False)), args) == 1
+
+
+def test_timed_reports_percentiles():
+    stats = timed(lambda: None, repeat=5)
+    assert stats["runs"] == 5
+    assert stats["min_seconds"] <= stats["p50_seconds"] <= stats["p95_seconds"]
@@ -0,0 +1,95 @@
+import gzip
+
+from app.middlewares.compression import CompressionMiddleware, parse_accept_encoding
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+LARGE_TEXT = "dataset,row,value\n" * 500
+
+
+def _make_app(minimum_size=1000):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE_TEXT)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((LARGE_TEXT for _ in range(3)), media_type="text/csv")
+
+    @app.get("/binary")
+    def binary():
+        return PlainTextResponse(LARGE_TEXT, media_type="image/png")
+
+    return app
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.5, identity;q=0") == {
+        "gzip": 1.0,
+        "br": 0.5,
+        "identity": 0.0,
+    }
+
+
+def test_gzip_large_response():
+    client = TestClient(_make_app())
+    resp = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in resp.headers["vary"].lower()
+    assert int(resp.headers["content-length"]) < len(LARGE_TEXT)
+    assert resp.text == LARGE_TEXT
+
+
+def test_small_response_not_compressed():
+    client = TestClient(_make_app())
+    resp = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers
+    assert resp.text == "ok"
+
+
+def test_no_accept_encoding_not_compressed():
+    client = TestClient(_make_app())
+    resp = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in resp.headers
+    assert resp.text == LARGE_TEXT
+
+
+def test_streaming_response_compressed():
+    client = TestClient(_make_app())
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as r:
+        raw = b"".join(r.iter_raw())
+        assert r.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode() == LARGE_TEXT * 3
+
+
+def test_non_text_content_type_not_compressed():
+    client = TestClient(_make_app())
+    resp = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers
+
+
+def test_dataset_listing_compressed(client: TestClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for i in range(20):
+        client.post(
+            "/data/upload",
+            data={"name": f"CompressedListing{i}", "overwrite": "true"},
+            files={"file": (f"compressed_{i}.csv", "a,b\n1,2\n", "text/csv")},
+            headers=headers,
+        )
+    resp = client.get(
+        "/data/?page=1&page_size=20",
+        headers={**headers, "Accept-Encoding": "gzip"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert len(resp.json()) == 20
@@ -0,0 +1,101 @@
+import hashlib
+
+from fastapi.testclient import TestClient
+
+CSV_CONTENT = "col1,col2\n" + "".join(f"{i},{i * 2}\n" for i in range(200))
+
+
+def _upload(client: TestClient, headers: dict, name: str) -> dict:
+    resp = client.post(
+        "/data/upload",
+        data={"name": name, "overwrite": "true"},
+        files={"file": (f"{name}.csv", CSV_CONTENT, "text/csv")},
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_download_dataset_file(client: TestClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ds = _upload(client, headers, "DownloadMe")
+
+    resp = client.get(f"/data/{ds['id']}/file", headers=headers)
+    assert resp.status_code == 200
+    assert resp.text == CSV_CONTENT
+    expected_hash = hashlib.sha256(CSV_CONTENT.encode()).hexdigest()
+    assert resp.headers["etag"] == f'"{expected_hash}"'
+    assert resp.headers["accept-ranges"] == "bytes"
+
+
+def test_download_dataset_file_not_modified(client: TestClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ds = _upload(client, headers, "DownloadNotModified")
+    etag = client.get(f"/data/{ds['id']}/file", headers=headers).headers["etag"]
+
+    resp = client.get(
+        f"/data/{ds['id']}/file", headers={**headers, "If-None-Match": etag}
+    )
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+
+    resp = client.get(
+        f"/data/{ds['id']}/file", headers={**headers, "If-None-Match": '"stale"'}
+    )
+    assert resp.status_code == 200
+
+
+def test_download_dataset_file_range(client: TestClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ds = _upload(client, headers, "DownloadRange")
+
+    resp = client.get(
+        f"/data/{ds['id']}/file", headers={**headers, "Range": "bytes=0-9"}
+    )
+    assert resp.status_code == 206
+    assert resp.content == CSV_CONTENT.encode()[:10]
+    assert resp.headers["content-range"] == f"bytes 0-9/{len(CSV_CONTENT)}"
+
+    resp = client.get(
+        f"/data/{ds['id']}/file", headers={**headers, "Range": "bytes=-5"}
+    )
+    assert resp.status_code == 206
+    assert resp.content == CSV_CONTENT.encode()[-5:]
+
+
+def test_download_dataset_file_forbidden_for_other_user(
+    client: TestClient, auth_token: str
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ds = _upload(client, headers, "DownloadForbidden")
+
+    client.post(
+        "/auth/register",
+        json={
+            "username": "otherdownloader",
+            "email": "otherdownloader@example.com",
+            "password": "otherpass",
+        },
+    )
+    login = client.post(
+        "/auth/login",
+        json={"email": "otherdownloader@example.com", "password": "otherpass"},
+    )
+    other_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    resp = client.get(f"/data/{ds['id']}/file", headers=other_headers)
+    assert resp.status_code == 403
+
+
+def test_download_dataset_file_unauthorized(client: TestClient):
+    resp = client.get("/data/1/file")
+    assert resp.status_code == 401
+
+
+def test_uploads_are_not_served_statically(client: TestClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ds = _upload(client, headers, "NotStatic")
+
+    resp = client.get(f"/uploads/{ds['file_name']}")
+    assert resp.status_code == 404
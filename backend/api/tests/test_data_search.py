@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+
+def _upload(client: TestClient, headers: dict, name: str, file_name: str):
+    resp = client.post(
+        "/data/upload",
+        data={"name": name, "overwrite": "true"},
+        files={"file": (file_name, "col1,col2\n1,2\n", "text/csv")},
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_search_datasets_by_substring(client: TestClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    _upload(client, headers, "Quarterly Sales", "quarterly_sales.csv")
+    _upload(client, headers, "Sensor Readings", "sensor_readings.csv")
+
+    resp = client.get("/data/search", params={"q": "sales"}, headers=headers)
+    assert resp.status_code == 200, resp.text
+    names = [d["name"] for d in resp.json()]
+    assert "Quarterly Sales" in names
+    assert "Sensor Readings" not in names
+
+
+def test_search_datasets_exact_name(client: TestClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ds = _upload(client, headers, "ExactNameDS", "exact_name.csv")
+
+    resp = client.get("/data/search", params={"name": "ExactNameDS"}, headers=headers)
+    assert resp.status_code == 200
+    results = resp.json()
+    assert [d["id"] for d in results] == [ds["id"]]
+
+    # Exact match only: a prefix must not match
+    resp = client.get("/data/search", params={"name": "ExactName"}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json() == []
+
+
+def test_search_datasets_date_range(client: TestClient, auth_token: str):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    _upload(client, headers, "RangeDS", "range_ds.csv")
+
+    resp = client.get(
+        "/data/search",
+        params={"name": "RangeDS", "uploaded_before": "2000-01-01T00:00:00"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json() == []
+
+    resp = client.get(
+        "/data/search",
+        params={"name": "RangeDS", "uploaded_after": "2000-01-01T00:00:00"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert len(resp.json()) == 1
+
+
+def test_search_datasets_unauthorized(client: TestClient):
+    resp = client.get("/data/search", params={"q": "anything"})
+    assert resp.status_code == 401
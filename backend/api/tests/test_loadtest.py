@@ -0,0 +1,51 @@
+import httpx
+import pytest
+from app.main import app
+from app.services.ml_client import MLClient, get_ml_client
+from loadtest.runner import run
+from loadtest.stats import Stats, percentile
+from loadtest.stub_ml import create_app
+
+
+def test_percentile_and_error_rate():
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.99) == 4.0
+
+    stats = Stats()
+    stats.record("ignored", 1.0, "200", False)
+    stats.start()
+    for status in ("200", "304", "500", "200"):
+        stats.record("group_by", 0.01, status, status == "500")
+    stats.stop()
+
+    steps = stats.to_dict()["steps"]
+    assert list(steps) == ["group_by"]
+    assert steps["group_by"]["error_rate"] == 0.25
+    assert steps["group_by"]["outcomes"] == {"200": 2, "304": 1, "500": 1}
+
+
+@pytest.mark.asyncio
+async def test_user_session_runs_every_flow(client):
+    stub = create_app(train_seconds=0.1)
+    # Training and predictions go through the API, which calls backend-ml
+    ml_client = MLClient(transport=httpx.ASGITransport(app=stub))
+    app.dependency_overrides[get_ml_client] = lambda: ml_client
+    try:
+        stats = await run(
+            "http://backend-api",
+            users=1,
+            duration=3.0,
+            think_time=0.0,
+            poll_interval=0.05,
+            n_rows=100,
+            seed=1,
+            api_transport=httpx.ASGITransport(app=app),
+        )
+    finally:
+        del app.dependency_overrides[get_ml_client]
+        await ml_client.aclose()
+
+    steps = stats.to_dict()["steps"]
+    for step in ("login", "generate", "train", "list_datasets", "group_by", "predict"):
+        assert steps[step]["requests"] > 0, step
+    assert all(step["errors"] == 0 for step in steps.values()), steps
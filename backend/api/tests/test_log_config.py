@@ -0,0 +1,71 @@
+import json
+import logging
+import queue
+import sys
+
+from app.config.log_config import JsonFormatter, LazyQueueHandler, SamplingFilter
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+
+
+class Unformattable:
+    def __str__(self):
+        raise AssertionError("formatted in the logging thread")
+
+
+def _record(msg, *args, level=logging.INFO, created=1000.0):
+    record = logging.makeLogRecord(
+        {"name": "app", "msg": msg, "args": args, "levelno": level}
+    )
+    record.levelname = logging.getLevelName(level)
+    record.created = created
+    return record
+
+
+def test_json_lines_carry_extra_fields_and_exceptions():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.makeLogRecord(
+            {
+                "name": "app",
+                "msg": "Loaded %d rows",
+                "args": (3,),
+                "levelname": "ERROR",
+                "dataset_id": 7,
+            }
+        )
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter("backend-api").format(record))
+    assert entry["message"] == "Loaded 3 rows"
+    assert entry["level"] == "ERROR"
+    assert entry["service"] == "backend-api"
+    assert entry["dataset_id"] == 7
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_queue_handler_defers_formatting_and_keeps_the_trace():
+    log_queue = queue.SimpleQueue()
+    handler = LazyQueueHandler(log_queue)
+    tracer = TracerProvider().get_tracer("test")
+    with tracer.start_as_current_span("request") as span:
+        handler.handle(_record("User %s", Unformattable()))
+
+    record = log_queue.get_nowait()
+    assert record.msg == "User %s"
+    assert record.trace_id == format(span.get_span_context().trace_id, "032x")
+    assert trace.get_current_span().get_span_context().is_valid is False
+
+
+def test_sampling_caps_each_template_per_second():
+    sampler = SamplingFilter(per_second=2)
+    kept = [sampler.filter(_record("Authenticated user: %s", i)) for i in range(5)]
+    assert kept == [True, True, False, False, False]
+    # Other templates and warnings are counted separately or not at all
+    assert sampler.filter(_record("Fetching profile"))
+    assert sampler.filter(_record("Authenticated user: %s", 9, level=logging.WARNING))
+
+    next_second = _record("Authenticated user: %s", 5, created=1001.0)
+    assert sampler.filter(next_second)
+    assert next_second.suppressed == 3
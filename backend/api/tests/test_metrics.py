@@ -0,0 +1,27 @@
+from fastapi.testclient import TestClient
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_endpoint_records_requests_and_queries(
+    client: TestClient, auth_token: str
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    count = 'http_requests_total{method="GET",route="/data/{dataset_id}",status="404"}'
+    before = client.get("/metrics").text
+    client.get("/data/999999", headers=headers)
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert _sample(resp.text, count) == _sample(before, count) + 1
+    # Looking up the user and the dataset ran SELECTs
+    selects = 'db_queries_total{operation="SELECT"}'
+    assert _sample(resp.text, selects) >= _sample(before, selects) + 2
+    assert "db_query_duration_seconds_bucket" in resp.text
+    assert 'http_requests_in_progress{method="GET"}' in resp.text
@@ -0,0 +1,86 @@
+import httpx
+import pytest
+from app.services import ml_client
+from app.services.ml_client import CircuitOpenError, MLClient
+
+
+def _client(handler, **kwargs) -> MLClient:
+    kwargs.setdefault("backoff", 0)
+    return MLClient(transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_get_is_retried_on_unavailable():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True})
+
+    client = _client(handler, retries=2)
+    response = await client.get("/ml/models")
+    assert response.json() == {"ok": True}
+    assert len(calls) == 3
+    assert str(calls[0].url) == "http://backend-ml:8000/ml/models"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_post_is_only_retried_when_not_sent():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(503)
+
+    client = _client(handler, retries=3)
+    response = await client.post("/ml/train2/jobs", json={})
+    # The connect error is retried; the 503 may have queued a job, so not
+    assert response.status_code == 503
+    assert len(calls) == 2
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_recovers(monkeypatch):
+    monkeypatch.setattr(ml_client.settings, "ML_BREAKER_FAILURES", 2)
+    monkeypatch.setattr(ml_client.settings, "ML_BREAKER_RESET_SECONDS", 30.0)
+    healthy = {"value": False}
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if not healthy["value"]:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200)
+
+    client = _client(handler, retries=0)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            await client.get("/ml/jobs/1")
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        await client.get("/ml/jobs/1")
+    assert len(calls) == 2
+
+    # After the reset timeout one trial call closes the circuit again
+    client.breaker.opened_at -= 30.0
+    assert client.breaker.state == "half_open"
+    healthy["value"] = True
+    assert (await client.get("/ml/jobs/1")).status_code == 200
+    assert client.breaker.state == "closed"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_trip_the_breaker(monkeypatch):
+    monkeypatch.setattr(ml_client.settings, "ML_BREAKER_FAILURES", 1)
+    client = _client(lambda request: httpx.Response(404))
+    for _ in range(3):
+        assert (await client.get("/ml/jobs/missing")).status_code == 404
+    assert client.breaker.state == "closed"
+    await client.aclose()
@@ -0,0 +1,335 @@
+import json
+import os
+
+import httpx
+import pytest
+from app.config.settings import settings
+from app.database import SessionLocal
+from app.main import app
+from app.models.models import Dataset
+from app.routers import ml_ops
+from app.services import rate_limiter
+from app.services.ml_client import MLClient, get_ml_client
+from app.services.rate_limiter import RateLimiter, SQLiteBucketStore
+from app.utils.files import hash_file
+from fastapi.testclient import TestClient
+
+
+def _upload(client: TestClient, headers: dict, name: str) -> dict:
+    resp = client.post(
+        "/data/upload",
+        data={"name": name, "overwrite": "true"},
+        files={"file": (f"{name}.csv", "feature1,feature2\n1,2\n3,4\n", "text/csv")},
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+@pytest.fixture
+def ml_service():
+    """
+    Stand-in for backend-ml's job endpoints; records the requests it gets.
+    """
+    state = {"requests": [], "jobs": {}, "over_quota": False}
+    kinds = {
+        "/ml/jobs/batch-predict": "batch_predict",
+        "/ml/train2/jobs": "train",
+        "/ml/search/jobs": "search",
+    }
+
+    def handler(request: httpx.Request):
+        state["requests"].append(request)
+        if request.method == "POST" and state["over_quota"]:
+            return httpx.Response(
+                429,
+                json={"detail": "You already have 2 jobs queued or running"},
+                headers={"Retry-After": "42"},
+            )
+        if request.url.path == "/ml/predict2":
+            rows = len(json.loads(request.content)["data"])
+            return httpx.Response(
+                200, json={"predictions": [0] * rows, "probabilities": [0.5] * rows}
+            )
+        if request.method == "POST" and request.url.path in kinds:
+            payload = json.loads(request.content)
+            job = {
+                "job_id": "job1",
+                "kind": kinds[request.url.path],
+                "status": "queued",
+                "progress": 0.0,
+                "params": payload,
+                "result": None,
+            }
+            state["jobs"]["job1"] = job
+            return httpx.Response(202, json=job)
+        job = state["jobs"].get(request.url.path.rsplit("/", 1)[-1])
+        if job is None:
+            return httpx.Response(404, json={"detail": "Job not found."})
+        return httpx.Response(200, json=job)
+
+    ml_client = MLClient(transport=httpx.MockTransport(handler))
+    app.dependency_overrides[get_ml_client] = lambda: ml_client
+    yield state
+    del app.dependency_overrides[get_ml_client]
+
+
+def test_batch_prediction_job_registers_output_dataset(
+    client: TestClient, auth_token: str, ml_service
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    dataset = _upload(client, headers, "BatchPredictInput")
+
+    resp = client.post(
+        "/ml/batch-predict",
+        json={"dataset_id": dataset["id"], "model_name": "rf", "output_name": "Out"},
+        headers=headers,
+    )
+    assert resp.status_code == 202, resp.text
+    sent = json.loads(ml_service["requests"][0].content)
+    assert sent["metadata"]["output_name"] == "Out"
+    assert sent["dataset_path"].endswith(dataset["file_name"])
+
+    # backend-ml finishes the job and writes the output file
+    os.makedirs("uploads", exist_ok=True)
+    output_path = os.path.join("uploads", "predictions_test_job1.csv")
+    with open(output_path, "w") as f:
+        f.write("feature1,feature2,Predicted,Probability\n1,2,0,0.1\n")
+    ml_service["jobs"]["job1"].update(
+        status="succeeded", progress=1.0, result={"output_path": output_path}
+    )
+
+    resp = client.get("/ml/jobs/job1", headers=headers)
+    assert resp.status_code == 200, resp.text
+    output_id = resp.json()["output_dataset_id"]
+    # Polling again does not register the output twice
+    resp = client.get("/ml/jobs/job1", headers=headers)
+    assert resp.json()["output_dataset_id"] == output_id
+
+    output = client.get(f"/data/{output_id}", headers=headers).json()
+    assert output["name"] == "Out"
+
+
+def test_concurrent_polls_register_the_output_once(
+    client: TestClient, auth_token: str, ml_service, monkeypatch
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    dataset = _upload(client, headers, "BatchPredictRaceInput")
+    client.post(
+        "/ml/batch-predict",
+        json={"dataset_id": dataset["id"], "model_name": "rf", "output_name": "Race"},
+        headers=headers,
+    )
+    os.makedirs("uploads", exist_ok=True)
+    output_path = os.path.join("uploads", "predictions_race_job1.csv")
+    with open(output_path, "w") as f:
+        f.write("feature1,Predicted\n1,0\n")
+    ml_service["jobs"]["job1"].update(
+        status="succeeded", progress=1.0, result={"output_path": output_path}
+    )
+
+    # Another poll registers the output while this one hashes the file
+    owner_id = ml_service["jobs"]["job1"]["params"]["metadata"]["owner_id"]
+    winner = {}
+
+    def hash_file_racing(path):
+        db = SessionLocal()
+        try:
+            other = Dataset(
+                name="Race",
+                file_name=os.path.basename(path),
+                user_id=owner_id,
+            )
+            db.add(other)
+            db.commit()
+            winner["id"] = other.id
+        finally:
+            db.close()
+        return hash_file(path)
+
+    monkeypatch.setattr(ml_ops, "hash_file", hash_file_racing)
+    resp = client.get("/ml/jobs/job1", headers=headers)
+
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["output_dataset_id"] == winner["id"]
+
+
+def test_batch_prediction_requires_dataset_access(
+    client: TestClient, auth_token: str, ml_service
+):
+    resp = client.post(
+        "/ml/batch-predict",
+        json={"dataset_id": 999999, "model_name": "rf"},
+        headers={"Authorization": f"Bearer {auth_token}"},
+    )
+    assert resp.status_code == 404
+    assert ml_service["requests"] == []
+
+
+def test_batch_prediction_unauthorized(client: TestClient):
+    resp = client.post("/ml/batch-predict", json={"dataset_id": 1, "model_name": "rf"})
+    assert resp.status_code == 401
+
+
+def test_retrain_queues_training_job(client: TestClient, auth_token: str, ml_service):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    dataset = _upload(client, headers, "RetrainInput")
+
+    resp = client.post(
+        "/ml/retrain",
+        params={
+            "dataset_id": dataset["id"],
+            "label_column": "feature2",
+            "model_name": "churn",
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 202, resp.text
+    assert resp.json()["kind"] == "train"
+    sent = json.loads(ml_service["requests"][0].content)
+    assert sent["model_name"] == "churn"
+    assert sent["algorithm"] == "randomforestclassifier"
+
+    ml_service["jobs"]["job1"].update(
+        status="succeeded", result={"model_id": "churn", "version": "v1"}
+    )
+    resp = client.get("/ml/jobs/job1", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["result"]["version"] == "v1"
+    assert "output_dataset_id" not in resp.json()
+
+
+def test_training_jobs_are_queued_through_the_api(
+    client: TestClient, auth_token: str, ml_service
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    dataset = _upload(client, headers, "TrainThroughApi")
+
+    resp = client.post(
+        "/ml/train",
+        json={
+            "dataset_id": dataset["id"],
+            "label_column": "feature2",
+            "algorithm": "LogisticRegression",
+            "hyperparams": {"C": 0.5},
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 202, resp.text
+    sent = json.loads(ml_service["requests"][0].content)
+    assert ml_service["requests"][0].url.path == "/ml/train2/jobs"
+    assert sent["dataset_path"] == os.path.join("uploads", dataset["file_name"])
+    assert sent["hyperparams"] == {"C": 0.5}
+    assert "dataset_id" not in sent and sent["metadata"]["owner_id"]
+    # The wizard polls the job through the API as its owner
+    assert client.get("/ml/jobs/job1", headers=headers).status_code == 200
+
+    resp = client.post(
+        "/ml/search",
+        json={
+            "dataset_id": dataset["id"],
+            "label_column": "feature2",
+            "algorithm": "RandomForestClassifier",
+            "param_grid": {"n_estimators": [10, 20]},
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 202, resp.text
+    assert ml_service["requests"][-1].url.path == "/ml/search/jobs"
+
+
+def test_training_submissions_are_rate_limited(
+    client: TestClient, auth_token: str, ml_service, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    store = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    monkeypatch.setattr(
+        rate_limiter, "limiter", RateLimiter({"train": "1/minute"}, store=store)
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    dataset = _upload(client, headers, "TrainRateLimited")
+    body = {"dataset_id": dataset["id"], "label_column": "feature2"}
+
+    first = client.post(
+        "/ml/train", json={**body, "algorithm": "KMeans"}, headers=headers
+    )
+    assert first.status_code == 202, first.text
+    second = client.post(
+        "/ml/search",
+        json={**body, "algorithm": "KMeans", "param_grid": {"n_clusters": [2, 3]}},
+        headers=headers,
+    )
+    assert second.status_code == 429
+    assert "Retry-After" in second.headers
+
+
+def test_predictions_are_rate_limited(
+    client: TestClient, auth_token: str, ml_service, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    store = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    monkeypatch.setattr(
+        rate_limiter, "limiter", RateLimiter({"predict": "1/minute"}, store=store)
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    body = {"model_name": "rf", "version": "v1", "data": [{"feature1": 1}]}
+
+    first = client.post("/ml/predict", json=body, headers=headers)
+    assert first.status_code == 200, first.text
+    assert first.json() == {"predictions": [0], "probabilities": [0.5]}
+    sent = json.loads(ml_service["requests"][0].content)
+    assert sent == body
+    second = client.post("/ml/predict", json=body, headers=headers)
+    assert second.status_code == 429
+    assert "Retry-After" in second.headers
+
+
+def test_jobs_over_the_active_quota_are_refused(
+    client: TestClient, auth_token: str, ml_service
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    dataset = _upload(client, headers, "QuotaInput")
+    ml_service["over_quota"] = True
+
+    resp = client.post(
+        "/ml/train",
+        json={
+            "dataset_id": dataset["id"],
+            "label_column": "feature2",
+            "algorithm": "LogisticRegression",
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "42"
+    assert "queued or running" in resp.json()["detail"]
+
+
+def test_unsafe_model_names_are_rejected(
+    client: TestClient, auth_token: str, ml_service
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    dataset = _upload(client, headers, "UnsafeModelNameInput")
+
+    resp = client.post(
+        "/ml/train",
+        json={
+            "dataset_id": dataset["id"],
+            "label_column": "feature2",
+            "algorithm": "LogisticRegression",
+            "model_name": "../escaped/pwn",
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 422
+    resp = client.post(
+        "/ml/retrain",
+        params={
+            "dataset_id": dataset["id"],
+            "label_column": "feature2",
+            "model_name": "a/b",
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 422
+    assert ml_service["requests"] == []
@@ -0,0 +1,81 @@
+import pytest
+from app.config.settings import settings
+from app.services import rate_limiter
+from app.services.rate_limiter import (
+    RateLimiter,
+    RedisBucketStore,
+    SQLiteBucketStore,
+    parse_limit,
+)
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def limits_on(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisBucketStore(fakeredis.FakeRedis())
+
+
+def test_parse_limit():
+    assert parse_limit("10/minute") == (10, 10 / 60)
+    assert parse_limit("2/seconds") == (2, 2.0)
+    with pytest.raises(ValueError):
+        parse_limit("10/fortnight")
+
+
+def test_bucket_empties_and_refills(store):
+    takes = [store.take("k", 2, 1.0, 1, now=100.0)[0] for _ in range(3)]
+    assert takes == [True, True, False]
+    # Half a token per half second
+    assert store.take("k", 2, 1.0, 1, now=100.5) == (False, 0.5)
+    assert store.take("k", 2, 1.0, 1, now=101.0)[0]
+    # Never refills past its capacity
+    assert store.take("k", 2, 1.0, 1, now=1000.0) == (True, 1.0)
+
+
+def test_workers_share_one_bucket(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+    assert first.take("k", 1, 0.001, 1, now=1.0)[0]
+    assert not second.take("k", 1, 0.001, 1, now=1.0)[0]
+
+
+def test_limits_are_per_class_and_client(limits_on, store):
+    limiter = RateLimiter({"train": "1/minute"}, store=store)
+    limiter.hit("train", "user:a")
+    with pytest.raises(HTTPException) as e:
+        limiter.hit("train", "user:a")
+    assert e.value.status_code == 429
+    assert 0 < int(e.value.headers["Retry-After"]) <= 60
+
+    assert limiter.hit("train", "user:b")["X-RateLimit-Remaining"] == "0"
+    # Reads have no limit
+    assert limiter.hit("read", "user:a") is None
+
+
+def test_generate_is_throttled_per_user(
+    client: TestClient, auth_token: str, limits_on, monkeypatch, tmp_path
+):
+    store = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    monkeypatch.setattr(
+        rate_limiter, "limiter", RateLimiter({"generate": "1/minute"}, store=store)
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    body = {"dataset_name": "rate_limited", "n_rows": 5, "columns": ["age"]}
+
+    first = client.post("/data-generator/generate", json=body, headers=headers)
+    assert first.status_code != 429
+    second = client.post("/data-generator/generate", json=body, headers=headers)
+    assert second.status_code == 429
+    assert "Retry-After" in second.headers
+    # Cheap reads are not limited
+    assert client.get("/data/", headers=headers).status_code == 200
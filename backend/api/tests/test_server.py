@@ -0,0 +1,55 @@
+import os
+import runpy
+
+from app import database
+from app.main import app
+from fastapi.testclient import TestClient
+from prometheus_client import multiprocess
+
+GUNICORN_CONF = os.path.join(os.path.dirname(__file__), "..", "gunicorn.conf.py")
+
+
+def test_health(client: TestClient):
+    resp = client.get("/health")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ok"}
+
+
+def test_ready_after_startup(client: TestClient):
+    resp = client.get("/ready")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ready"}
+
+
+def test_not_ready_without_database(client: TestClient, monkeypatch):
+    monkeypatch.setattr(database, "ping", lambda: False)
+    resp = client.get("/ready")
+    assert resp.status_code == 503
+    # Liveness does not depend on the database
+    assert client.get("/health").status_code == 200
+
+
+def test_not_ready_while_shutting_down(client: TestClient, monkeypatch):
+    monkeypatch.setattr(app.state, "ready", False)
+    assert client.get("/ready").status_code == 503
+
+
+def test_gunicorn_config(tmp_path, monkeypatch):
+    metrics_dir = tmp_path / "metrics"
+    metrics_dir.mkdir()
+    (metrics_dir / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(metrics_dir))
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+
+    conf = runpy.run_path(GUNICORN_CONF)
+
+    assert conf["workers"] == 3
+    assert conf["worker_class"] == "uvicorn_worker.UvicornWorker"
+    assert conf["preload_app"] is True
+    # Metric files of the previous run are cleared
+    assert os.listdir(metrics_dir) == []
+
+    dead = []
+    monkeypatch.setattr(multiprocess, "mark_process_dead", dead.append)
+    conf["child_exit"](None, type("Worker", (), {"pid": 4321}))
+    assert dead == [4321]
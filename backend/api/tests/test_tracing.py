@@ -0,0 +1,68 @@
+import httpx
+import pytest
+from app.middlewares import tracing
+from app.services.ml_client import MLClient
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from sqlalchemy import create_engine, text
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.setup_tracing().add_span_processor(SimpleSpanProcessor(exporter))
+    return exporter
+
+
+def test_request_continues_the_callers_trace(client: TestClient, exporter):
+    exporter.clear()
+    resp = client.get(
+        "/data/999999", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}
+    )
+    assert resp.headers["X-Trace-Id"] == TRACE_ID
+
+    spans = exporter.get_finished_spans()
+    (server,) = [s for s in spans if s.name == "GET /data/{dataset_id}"]
+    assert format(server.context.trace_id, "032x") == TRACE_ID
+    assert server.attributes["http.status_code"] == resp.status_code
+
+
+@pytest.mark.asyncio
+async def test_ml_calls_carry_the_trace_context(exporter):
+    sent = []
+
+    def handler(request):
+        sent.append(request.headers.get("traceparent"))
+        return httpx.Response(200, json={})
+
+    client = MLClient(transport=httpx.MockTransport(handler), backoff=0)
+    with tracing.span("request") as parent:
+        await client.get("/ml/models")
+    await client.aclose()
+
+    trace_id = format(parent.get_span_context().trace_id, "032x")
+    assert sent[0].split("-")[1] == trace_id
+    (call,) = [s for s in exporter.get_finished_spans() if s.name == "backend-ml GET"]
+    assert call.parent.span_id == parent.get_span_context().span_id
+    assert call.attributes["http.status_code"] == 200
+
+
+def test_sql_statements_get_spans(exporter):
+    engine = create_engine("sqlite://")
+    tracing.instrument_engine(engine)
+    exporter.clear()
+    with tracing.span("request") as parent, engine.connect() as conn:
+        conn.execute(text("SELECT 1")).fetchall()
+        with pytest.raises(Exception):
+            conn.execute(text("SELECT * FROM missing_table"))
+
+    queries = [s for s in exporter.get_finished_spans() if s.name == "db SELECT"]
+    assert len(queries) == 2
+    assert all(q.parent.span_id == parent.get_span_context().span_id for q in queries)
+    assert queries[0].attributes["db.statement"] == "SELECT 1"
+    assert not queries[1].status.is_ok
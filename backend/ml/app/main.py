@@ -1,18 +1,110 @@
+import logging
 import os
+import sqlite3
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from app.middlewares.metrics import MetricsMiddleware, metrics_response
+from app.middlewares.tracing import TracingMiddleware
+from app.ml import log_config, model_cache, storage, tracing
+from app.ml.jobs import QuotaExceeded
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, field_validator
 
 MODEL_DIR = os.getenv("MODEL_DIR", "saved_models/auto_trained_model/v1")
 MODEL_FILE = os.path.join(MODEL_DIR, "model_pt.pt")
 
-app = FastAPI()
+logger = logging.getLogger("app")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in each worker process, after a preloading gunicorn master forks
+    # e.g. MODEL_CACHE_PRELOAD="randomforestclassifier_sales.csv,kmeans_iris.csv:v2"
+    preload = model_cache.parse_model_refs(os.getenv("MODEL_CACHE_PRELOAD", ""))
+    if preload:
+        await run_in_threadpool(model_cache.warm_up, preload)
+    app.state.ready = True
+    logger.info("Worker %d ready", os.getpid())
+
+    yield
+
+    # Fail readiness checks first so no new traffic is routed here
+    app.state.ready = False
+    tracing.flush()
+
+
+# Records are formatted and written by a background thread
+log_config.configure_logging()
+tracing.setup_tracing()
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Prediction outputs can be large; compress anything over ~1 KB
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1000")),
+    compresslevel=6,
+)
+app.add_middleware(TracingMiddleware)
+# Outermost: latency includes compression, sizes are the compressed ones
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(QuotaExceeded)
+async def quota_exceeded(request: Request, exc: QuotaExceeded):
+    """
+    An owner over their active job quota may submit again once one of their
+    jobs has finished.
+    """
+    return ORJSONResponse(
+        {"detail": str(exc)},
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.get("/health", include_in_schema=False)
+def health():
+    """
+    Liveness: the worker is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    """
+    Readiness: the model cache is warmed up, the worker is not shutting
+    down and the job and registry database answers.
+    """
+    if not getattr(app.state, "ready", False):
+        return ORJSONResponse({"status": "starting"}, status_code=503)
+    try:
+        storage.get_connection().execute("SELECT 1")
+    except sqlite3.Error:
+        return ORJSONResponse({"status": "storage unavailable"}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Request metrics in the Prometheus format.
+    """
+    return metrics_response()
+
 
 # Add new routers
-from app.routers import predict2, train2
+from app.routers import jobs, metrics, models, predict2, train2
 
 app.include_router(train2.router)
 app.include_router(predict2.router)
+app.include_router(metrics.router)
+app.include_router(models.router)
+app.include_router(jobs.router)
 
 
 class InputData(BaseModel):
@@ -0,0 +1,54 @@
+from app.ml.tracing import tracer
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+TRACE_ID_HEADER = "X-Trace-Id"
+
+
+class TracingMiddleware:
+    """
+    Runs each request in a server span that continues the caller's trace
+    (W3C `traceparent` header) and returns the trace id in X-Trace-Id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        carrier = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope["headers"]
+        }
+        with tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": method, "http.target": scope["path"]},
+        ) as request_span:
+            trace_id = format(request_span.get_span_context().trace_id, "032x")
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        request_span.set_status(Status(StatusCode.ERROR))
+                    MutableHeaders(raw=message["headers"]).append(
+                        TRACE_ID_HEADER, trace_id
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Named after the route template once the router matched one
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.update_name(f"{method} {route}")
+                    request_span.set_attribute("http.route", route)
@@ -1,4 +1,4 @@
-from .metrics_manager import get_metrics, save_metrics
+from .metrics_manager import get_metrics, list_metrics, save_metrics
 from .model import evaluate_model, evaluate_regression_model
 from .preprocessing import preprocess_data
 
@@ -8,4 +8,5 @@ __all__ = [
     "preprocess_data",
     "save_metrics",
     "get_metrics",
+    "list_metrics",
 ]
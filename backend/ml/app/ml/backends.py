@@ -0,0 +1,123 @@
+import importlib
+import logging
+import threading
+import time
+from typing import Dict
+
+import joblib
+
+from .inference import make_predict_fn
+
+logger = logging.getLogger("app")
+
+# Framework module -> seconds its first import took in this process
+_frameworks: Dict[str, float] = {}
+_frameworks_lock = threading.Lock()
+
+
+def import_framework(module: str):
+    """
+    Import a heavy framework module on first use, logging how long it took.
+    """
+    with _frameworks_lock:
+        if module in _frameworks:
+            return importlib.import_module(module)
+        started = time.perf_counter()
+        imported = importlib.import_module(module)
+        _frameworks[module] = time.perf_counter() - started
+    logger.info("Imported %s in %.2fs", module, _frameworks[module])
+    return imported
+
+
+def loaded_frameworks() -> Dict[str, float]:
+    """
+    Frameworks imported on demand so far, with their import times.
+    """
+    with _frameworks_lock:
+        return dict(_frameworks)
+
+
+class ModelBackend:
+    """
+    How the models of one framework are saved, loaded and called. The
+    framework itself is imported the first time one of its models is used.
+    """
+
+    name = ""
+    extension = ""
+    algorithms = ()
+
+    def load(self, path: str):
+        raise NotImplementedError
+
+    def save(self, model, path: str):
+        raise NotImplementedError
+
+    def predict_fn(self, model, columns: list):
+        """
+        predict_fn(X) -> (predictions, probabilities) for a feature matrix.
+        """
+        raise NotImplementedError
+
+
+class SklearnBackend(ModelBackend):
+    name = "sklearn"
+    extension = ".joblib"
+    algorithms = ("logisticregression", "randomforestclassifier", "kmeans")
+
+    def load(self, path: str):
+        return joblib.load(path)
+
+    def save(self, model, path: str):
+        joblib.dump(model, path)
+
+    def predict_fn(self, model, columns: list):
+        return make_predict_fn(model, False, columns)
+
+
+class KerasBackend(ModelBackend):
+    name = "keras"
+    extension = ".h5"
+    algorithms = ("tensorflow_classifier",)
+
+    def tensorflow(self):
+        return import_framework("tensorflow")
+
+    def keras(self):
+        return self.tensorflow().keras
+
+    def load(self, path: str):
+        return self.keras().models.load_model(path)
+
+    def save(self, model, path: str):
+        model.save(path)
+
+    def predict_fn(self, model, columns: list):
+        return make_predict_fn(model, True, columns)
+
+
+SKLEARN = SklearnBackend()
+KERAS = KerasBackend()
+BACKENDS = (SKLEARN, KERAS)
+
+
+def for_path(path: str) -> ModelBackend:
+    """
+    The backend of a model artifact, by file extension. Files without a
+    known extension are joblib files, as before backends existed.
+    """
+    for backend in BACKENDS:
+        if path.endswith(backend.extension):
+            return backend
+    return SKLEARN
+
+
+def for_algorithm(algorithm: str) -> ModelBackend:
+    for backend in BACKENDS:
+        if algorithm in backend.algorithms:
+            return backend
+    raise ValueError(f"No model backend for algorithm {algorithm!r}")
+
+
+def is_model_file(path: str) -> bool:
+    return path.endswith(tuple(backend.extension for backend in BACKENDS))
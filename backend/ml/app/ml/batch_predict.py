@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import backends, jobs, model_cache, pipeline, registry
+
+BATCH_PREDICT_CHUNK_ROWS = int(os.getenv("BATCH_PREDICT_CHUNK_ROWS", "50000"))
+# 0 runs chunks in the job thread instead of a process pool
+BATCH_PREDICT_WORKERS = int(os.getenv("BATCH_PREDICT_WORKERS", str(os.cpu_count())))
+
+# Outputs go next to the uploaded datasets, where backend-api picks them up
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
+
+PREDICTION_COLUMN = "Predicted"
+PROBABILITY_COLUMN = "Probability"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if BATCH_PREDICT_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent runs threads (job runner, batchers)
+            _pool = ProcessPoolExecutor(
+                max_workers=BATCH_PREDICT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def predict_chunk(model_path: str, schema: Optional[List[dict]], chunk: pd.DataFrame):
+    """
+    Predict one chunk. Runs in a pool worker, which keeps the model in its own
+    model cache between chunks.
+    """
+    model = model_cache.get_model(model_path)
+    columns = {str(col): chunk[col].to_numpy() for col in chunk.columns}
+    X, names, preprocessor = pipeline.encode_inputs(model_path, model, schema, columns)
+    predict_fn = backends.for_path(model_path).predict_fn(model, names)
+    preds, probabilities = predict_fn(X)
+    if preprocessor is not None:
+        preds = preprocessor.decode_label(preds)
+    return preds, probabilities
+
+
+def count_rows(path: str) -> int:
+    """
+    Number of data rows in a CSV (lines minus header), counted in binary.
+    """
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def output_path_for(job_id: str) -> str:
+    """
+    Where a job writes its predictions: <UPLOADS_DIR>/<job_id>_predictions.csv.
+    Raises ValueError for a job id that would resolve outside UPLOADS_DIR.
+    """
+    uploads = os.path.realpath(UPLOADS_DIR)
+    path = os.path.realpath(os.path.join(uploads, f"{job_id}_predictions.csv"))
+    if os.path.dirname(path) != uploads:
+        raise ValueError(f"Invalid output location for job {job_id}")
+    return path
+
+
+def run_batch_prediction(
+    job_id: str,
+    dataset_path: str,
+    model_name: str,
+    version: Optional[str] = None,
+) -> dict:
+    """
+    Stream `dataset_path` in chunks through the model, appending the input
+    rows plus prediction columns to the job's output file (see
+    output_path_for). Progress is recorded on the job as chunks complete.
+    """
+    started = time.perf_counter()
+    output_path = output_path_for(job_id)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    model_path, entry = registry.resolve_model(model_name, version)
+    if not model_path:
+        raise ValueError(f"Model file not found for: {model_name}")
+    schema = entry["feature_schema"] if entry else None
+
+    # Pool workers may not share our working directory
+    model_path = os.path.abspath(model_path)
+    total_rows = count_rows(dataset_path)
+    pool = get_pool()
+    max_inflight = 2 * BATCH_PREDICT_WORKERS if pool else 1
+    inflight = deque()
+    done_rows = 0
+    tmp_path = f"{output_path}.part"
+
+    def write_head(out, header: bool):
+        nonlocal done_rows
+        chunk, result = inflight.popleft()
+        preds, probabilities = result.result() if pool else result
+        chunk[PREDICTION_COLUMN] = np.asarray(preds)
+        chunk[PROBABILITY_COLUMN] = np.asarray(probabilities)
+        chunk.to_csv(out, header=header, index=False)
+        done_rows += len(chunk)
+        jobs.set_progress(
+            job_id,
+            done_rows / total_rows if total_rows else 1.0,
+            rows=done_rows,
+            total_rows=total_rows,
+        )
+
+    try:
+        with open(tmp_path, "w", newline="") as out:
+            header = True
+            for chunk in pd.read_csv(dataset_path, chunksize=BATCH_PREDICT_CHUNK_ROWS):
+                if pool:
+                    future = pool.submit(predict_chunk, model_path, schema, chunk)
+                else:
+                    future = predict_chunk(model_path, schema, chunk)
+                inflight.append((chunk, future))
+                while len(inflight) >= max_inflight:
+                    write_head(out, header)
+                    header = False
+            while inflight:
+                write_head(out, header)
+                header = False
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "output_path": output_path,
+        "rows": done_rows,
+        "total_rows": total_rows,
+        "model_file": os.path.basename(model_path),
+        "seconds": time.perf_counter() - started,
+    }
@@ -0,0 +1,197 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable, Tuple
+
+import numpy as np
+
+PREDICT_BATCHING = os.getenv("PREDICT_BATCHING", "1") == "1"
+# Throughput/latency knobs: a batch is dispatched once it holds MAX_ROWS rows
+# or MAX_WAIT_MS after its first request arrived, whichever comes first.
+PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "512"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2"))
+PREDICT_BATCHERS_MAX = int(os.getenv("PREDICT_BATCHERS_MAX", "32"))
+
+# predict_fn(X) -> (predictions, probabilities), both of length len(X)
+PredictFn = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent prediction requests for one model into a single
+    vectorized `predict_fn` call on a background thread.
+
+    Waiting is adaptive: the batcher only holds a request back (up to
+    `max_wait_ms`) when recent batches actually contained several requests,
+    so a lone client pays no extra latency.
+    """
+
+    def __init__(
+        self,
+        predict_fn: PredictFn,
+        max_batch_rows: int = PREDICT_BATCH_MAX_ROWS,
+        max_wait_ms: float = PREDICT_BATCH_MAX_WAIT_MS,
+        name: str = "model",
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        # Orders submits against close(): nothing is queued behind _STOP
+        self._lock = threading.Lock()
+        self._closed = False
+        # Moving average of requests per batch, i.e. observed concurrency
+        self._requests_per_batch = 1.0
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"microbatch-{name}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        future = Future()
+        with self._lock:
+            if not self._closed:
+                self._queue.put((X, future))
+                return future
+        # get_batcher() replaced or evicted this batcher after the caller got
+        # it; serve the request unbatched instead of failing it
+        _run_single(self.predict_fn, X, future)
+        return future
+
+    def predict(self, X: np.ndarray):
+        return self.submit(X).result()
+
+    def close(self):
+        """
+        Stop the batcher once the requests already queued are answered.
+        Later submits run unbatched on the caller's thread.
+        """
+        with self._lock:
+            self._closed = True
+            self._queue.put(_STOP)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        rows = len(first[0])
+        wait = self.max_wait if self._requests_per_batch > 1.1 else 0.0
+        deadline = time.monotonic() + wait
+        while rows < self.max_batch_rows:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    item = self._queue.get(timeout=timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then stop
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            self._requests_per_batch = 0.8 * self._requests_per_batch + 0.2 * len(batch)
+            self.batches += 1
+            self.requests += len(batch)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        if len(batch) == 1:
+            X, future = batch[0]
+            self.rows += len(X)
+            _run_single(self.predict_fn, X, future)
+            return
+
+        X = np.concatenate([item[0] for item in batch])
+        self.rows += len(X)
+        try:
+            predictions, probabilities = self.predict_fn(X)
+        except Exception:
+            # One bad request must not fail the others: retry them one by one
+            for X_item, future in batch:
+                _run_single(self.predict_fn, X_item, future)
+            return
+
+        start = 0
+        for X_item, future in batch:
+            end = start + len(X_item)
+            future.set_result((predictions[start:end], probabilities[start:end]))
+            start = end
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "avg_requests_per_batch": (
+                self.requests / self.batches if self.batches else 0.0
+            ),
+        }
+
+
+def _run_single(predict_fn: PredictFn, X: np.ndarray, future: Future):
+    try:
+        future.set_result(predict_fn(X))
+    except Exception as e:
+        future.set_exception(e)
+
+
+_batchers = OrderedDict()  # key -> (model, MicroBatcher)
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(key: Hashable, model, predict_fn: PredictFn) -> MicroBatcher:
+    """
+    Return the batcher serving `model` under `key` (e.g. its artifact path),
+    replacing it if the model object changed (the artifact was reloaded).
+    At most PREDICT_BATCHERS_MAX batchers are kept, least recently used first
+    out; the model cache drops a model's batchers when it evicts the model
+    (see discard).
+    """
+    with _batchers_lock:
+        entry = _batchers.get(key)
+        if entry is not None and entry[0] is model:
+            _batchers.move_to_end(key)
+            return entry[1]
+        if entry is not None:
+            entry[1].close()
+        batcher = MicroBatcher(predict_fn, name=str(key))
+        _batchers[key] = (model, batcher)
+        while len(_batchers) > PREDICT_BATCHERS_MAX:
+            _, (_, old) = _batchers.popitem(last=False)
+            old.close()
+        return batcher
+
+
+def discard(model):
+    """
+    Close and forget the batchers serving `model`, so they no longer keep it
+    in memory once the model cache has let go of it.
+    """
+    with _batchers_lock:
+        stale = [key for key, (served, _) in _batchers.items() if served is model]
+        for key in stale:
+            _batchers.pop(key)[1].close()
+
+
+def stats() -> dict:
+    with _batchers_lock:
+        return {str(key): batcher.stats() for key, (_, batcher) in _batchers.items()}
@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by an approximate memory budget (bytes).
+
+    Values are produced by `get_or_load(key, loader)`, where `loader()`
+    returns `(value, nbytes)`. Loading is single-flight: concurrent callers
+    asking for the same missing key wait for the one load in progress instead
+    of starting their own. The loader runs outside the cache lock, so loads of
+    different keys proceed in parallel.
+
+    `on_evict(key, value)`, if given, is called (outside the lock) for every
+    entry that leaves the cache: evicted, discarded or cleared.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        on_evict: Optional[Callable[[Hashable, object], None]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.load_errors = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Tuple[object, int]]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return flight.result()
+
+        try:
+            value, nbytes = loader()
+        except BaseException as e:
+            with self._lock:
+                self.load_errors += 1
+                del self._inflight[key]
+            flight.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            evicted = self._evict(keep=key)
+            del self._inflight[key]
+        flight.set_result(value)
+        self._released(evicted)
+        return value
+
+    def _evict(self, keep: Hashable) -> List[tuple]:
+        # Least recently used first; the entry just loaded is always kept,
+        # even when it alone is larger than the budget.
+        evicted = []
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            value, nbytes = self._entries.pop(key)
+            self._bytes -= nbytes
+            self.evictions += 1
+            evicted.append((key, value))
+        return evicted
+
+    def _released(self, entries: List[tuple]):
+        if self.on_evict is not None:
+            for key, value in entries:
+                self.on_evict(key, value)
+
+    def discard_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Drop every entry whose key matches `predicate`. Returns how many.
+        """
+        with self._lock:
+            stale = []
+            for key in [key for key in self._entries if predicate(key)]:
+                value, nbytes = self._entries.pop(key)
+                self._bytes -= nbytes
+                stale.append((key, value))
+        self._released(stale)
+        return len(stale)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            entries = [(key, value) for key, (value, _) in self._entries.items()]
+            self._entries.clear()
+            self._bytes = 0
+        self._released(entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "load_errors": self.load_errors,
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,142 @@
+import os
+import uuid
+from typing import Optional
+
+import pandas as pd
+
+from . import registry, tracing
+from .cache import LRUCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - without pyarrow every load parses the CSV
+    pa = None
+    feather = None
+    pq = None
+
+# Budget is approximated by the frames' deep memory usage
+DATASET_CACHE_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", str(1024**3)))
+# Arrow copies of parsed CSVs, keyed by dataset hash
+COLUMNAR_DIR = os.getenv("COLUMNAR_DIR", os.path.join(registry.MODELS_DIR, "columnar"))
+# Text columns with at most this share of distinct values become `category`
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+# Columnar copies next to the CSV ("data.parquet" for "data.csv"), if newer
+SIBLING_EXTENSIONS = (".parquet", ".feather", ".arrow")
+
+_cache = LRUCache(DATASET_CACHE_MAX_BYTES)
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Downcast integers to the smallest type that holds them, floats to
+    float32 where they keep their value within float32 precision (the dtype
+    of most feature matrices), and low-cardinality text to `category`.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        dtype = values.dtype
+        if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            pass
+        elif pd.api.types.is_integer_dtype(dtype):
+            values = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(dtype):
+            values = pd.to_numeric(values, downcast="float")
+        elif len(values) and (
+            values.nunique(dropna=False) <= CATEGORY_MAX_UNIQUE_RATIO * len(values)
+        ):
+            values = values.astype("category")
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _sibling_copy(path: str) -> Optional[str]:
+    stem, _ = os.path.splitext(path)
+    csv_mtime = os.stat(path).st_mtime
+    for ext in SIBLING_EXTENSIONS:
+        candidate = stem + ext
+        if os.path.isfile(candidate) and os.stat(candidate).st_mtime >= csv_mtime:
+            return candidate
+    return None
+
+
+def _read_columnar(path: str) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pq.read_table(path, memory_map=True).to_pandas()
+    # Uncompressed Arrow files are mapped, not read: the OS page cache backs
+    # them, so another process loading the same dataset shares the pages
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def columnar_path(dataset_hash: str) -> str:
+    return os.path.join(COLUMNAR_DIR, f"{dataset_hash}.arrow")
+
+
+def _write_columnar(df: pd.DataFrame, dataset_hash: str):
+    os.makedirs(COLUMNAR_DIR, exist_ok=True)
+    path = columnar_path(dataset_hash)
+    staged = f"{path}.{uuid.uuid4().hex}.tmp"
+    feather.write_feather(df, staged, compression="uncompressed")
+    os.replace(staged, path)
+
+
+def read_dataset(path: str, dataset_hash: str) -> pd.DataFrame:
+    """
+    Read a dataset with optimized dtypes, bypassing the cache: from a
+    columnar copy when there is one, otherwise by parsing the CSV and saving
+    an Arrow copy for the next load.
+    """
+    with tracing.span("read_dataset", path=path) as span:
+        if pa is None:
+            span.set_attribute("source", "csv")
+            return optimize_dtypes(pd.read_csv(path))
+
+        sibling = _sibling_copy(path)
+        if sibling is not None:
+            span.set_attribute("source", sibling)
+            return optimize_dtypes(_read_columnar(sibling))
+
+        cached = columnar_path(dataset_hash)
+        if os.path.isfile(cached):
+            try:
+                df = _read_columnar(cached)
+                span.set_attribute("source", "columnar")
+                return df
+            except (OSError, pa.ArrowInvalid):
+                pass  # truncated or foreign file: rebuild it
+
+        span.set_attribute("source", "csv")
+        df = optimize_dtypes(pd.read_csv(path))
+        _write_columnar(df, dataset_hash)
+        return df
+
+
+def load_dataset(path: str, dataset_hash: Optional[str] = None) -> pd.DataFrame:
+    """
+    Return the dataset at `path`, loading it at most once per process while
+    it stays within the cache budget. Entries are keyed by file hash, so a
+    re-uploaded file is never served stale and copies of one file share an
+    entry.
+
+    The frame is shared between callers and must not be modified in place.
+    """
+    if dataset_hash is None:
+        dataset_hash = registry.hash_file(path)
+
+    def loader():
+        df = read_dataset(path, dataset_hash)
+        return df, int(df.memory_usage(deep=True).sum())
+
+    return _cache.get_or_load(dataset_hash, loader)
+
+
+def stats() -> dict:
+    return _cache.stats()
+
+
+def clear():
+    _cache.clear()
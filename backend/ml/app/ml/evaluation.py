@@ -0,0 +1,153 @@
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import (
+    accuracy_score,
+    precision_score,
+    recall_score,
+    silhouette_score,
+)
+from sklearn.model_selection import KFold, StratifiedKFold, train_test_split
+
+HOLDOUT = "holdout"
+KFOLD = "kfold"
+NO_EVALUATION = "none"
+EVALUATIONS = (HOLDOUT, KFOLD, NO_EVALUATION)
+
+VALIDATION_FRACTION = 0.2
+CV_FOLDS = 5
+# Rows scored by the silhouette of a clustering
+SILHOUETTE_SAMPLE_ROWS = 2000
+
+
+def classification_metrics(y_true, y_pred) -> dict:
+    return {
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "precision": float(
+            precision_score(y_true, y_pred, average="macro", zero_division=0)
+        ),
+        "recall": float(recall_score(y_true, y_pred, average="macro", zero_division=0)),
+    }
+
+
+def probability_mse(y_true, proba: np.ndarray, classes) -> float:
+    """
+    Mean squared error of the predicted class probabilities against the
+    one-hot labels (the Brier score). A single column, as a sigmoid output,
+    is the probability of the second of two classes.
+    """
+    proba = np.asarray(proba, dtype=np.float64)
+    if proba.ndim == 1 or proba.shape[1] == 1:
+        positive = proba.reshape(-1)
+        proba = np.column_stack([1 - positive, positive])
+    onehot = np.asarray(y_true)[:, None] == np.asarray(classes)[None, :]
+    return float(np.mean(np.sum((proba - onehot) ** 2, axis=1)))
+
+
+def split_rows(
+    n_rows: int, y: Optional[np.ndarray], fraction: float, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Shuffle row indices into (train, validation), stratified by `y` when
+    every class has enough rows for it.
+    """
+    rows = np.arange(n_rows)
+    try:
+        return tuple(
+            train_test_split(rows, test_size=fraction, random_state=seed, stratify=y)
+        )
+    except ValueError:
+        # A class too small to stratify
+        return tuple(train_test_split(rows, test_size=fraction, random_state=seed))
+
+
+def _fold_predictions(estimator, X, y, train_rows, val_rows):
+    model = clone(estimator).fit(X[train_rows], y[train_rows])
+    proba = (
+        model.predict_proba(X[val_rows]) if hasattr(model, "predict_proba") else None
+    )
+    return val_rows, model.predict(X[val_rows]), proba, model.classes_
+
+
+def _folds(y: np.ndarray, folds: int):
+    _, counts = np.unique(y, return_counts=True)
+    if counts.min() >= folds:
+        return StratifiedKFold(n_splits=folds, shuffle=True, random_state=0).split(
+            np.zeros(len(y)), y
+        )
+    return KFold(n_splits=folds, shuffle=True, random_state=0).split(y)
+
+
+def evaluate_classifier(
+    estimator,
+    X,
+    y: np.ndarray,
+    method: str = HOLDOUT,
+    fraction: float = VALIDATION_FRACTION,
+    folds: int = CV_FOLDS,
+    n_jobs: int = 1,
+) -> dict:
+    """
+    Score an unfitted classifier on the encoded matrix: fitted on a
+    stratified training split and scored on the held-out rows, or with
+    k-fold cross-validation on out-of-fold predictions, the folds fitted in
+    parallel on `n_jobs` cores. `estimator` itself is left unfitted.
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    started = time.perf_counter()
+    if method == KFOLD:
+        splits = list(_folds(y, min(folds, len(y))))
+        # The folds share the cores, so each fits single-threaded
+        if "n_jobs" in estimator.get_params():
+            estimator = clone(estimator).set_params(n_jobs=1)
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_fold_predictions)(estimator, X, y, train_rows, val_rows)
+            for train_rows, val_rows in splits
+        )
+    else:
+        train_rows, val_rows = split_rows(len(y), y, fraction)
+        results = [_fold_predictions(estimator, X, y, train_rows, val_rows)]
+
+    rows = np.concatenate([r[0] for r in results])
+    y_pred = np.concatenate([r[1] for r in results])
+    metrics = classification_metrics(y[rows], y_pred)
+    if all(r[2] is not None for r in results):
+        metrics["mse"] = float(
+            np.average(
+                [probability_mse(y[r[0]], r[2], r[3]) for r in results],
+                weights=[len(r[0]) for r in results],
+            )
+        )
+    metrics.update(
+        evaluation=method,
+        validation_rows=int(len(rows)),
+        eval_seconds=time.perf_counter() - started,
+    )
+    if method == KFOLD:
+        metrics["cv_folds"] = len(results)
+    return metrics
+
+
+def clustering_metrics(model, X) -> dict:
+    """
+    Inertia and the silhouette of a fitted clustering, on a sample of rows.
+    """
+    started = time.perf_counter()
+    X = np.asarray(X)
+    metrics = {"inertia": float(model.inertia_)}
+    labels = model.labels_
+    if 1 < len(np.unique(labels)) < len(X):
+        metrics["silhouette"] = float(
+            silhouette_score(
+                X,
+                labels,
+                sample_size=min(len(X), SILHOUETTE_SAMPLE_ROWS),
+                random_state=0,
+            )
+        )
+    metrics["eval_seconds"] = time.perf_counter() - started
+    return metrics
@@ -0,0 +1,107 @@
+import io
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - Arrow/Parquet bodies are optional
+    pa = None
+    pq = None
+
+ARROW_STREAM_TYPES = ("application/vnd.apache.arrow.stream",)
+ARROW_FILE_TYPES = ("application/vnd.apache.arrow.file",)
+PARQUET_TYPES = ("application/vnd.apache.parquet", "application/x-parquet")
+TABLE_CONTENT_TYPES = ARROW_STREAM_TYPES + ARROW_FILE_TYPES + PARQUET_TYPES
+
+NUMERIC_DTYPE_PREFIXES = ("int", "uint", "float", "bool")
+
+
+class FeatureValidationError(ValueError):
+    pass
+
+
+def is_numeric_dtype(dtype: str) -> bool:
+    return dtype.lower().startswith(NUMERIC_DTYPE_PREFIXES)
+
+
+def schema_from_model(model) -> Optional[List[dict]]:
+    """
+    Fallback schema for models trained before the registry recorded one:
+    scikit-learn estimators fitted on a DataFrame remember the column names.
+    """
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        return None
+    return [{"name": str(name), "dtype": "float64"} for name in names]
+
+
+def records_to_columns(records: List[dict]) -> Dict[str, np.ndarray]:
+    df = pd.DataFrame.from_records(records)
+    return {str(col): df[col].to_numpy() for col in df.columns}
+
+
+def media_type(content_type: str) -> str:
+    return content_type.split(";")[0].strip().lower()
+
+
+def table_to_columns(body: bytes, content_type: str) -> Dict[str, np.ndarray]:
+    """
+    Decode an Arrow IPC (stream or file) or Parquet body into columns.
+    Requires pyarrow; callers check `pa` and TABLE_CONTENT_TYPES first.
+    """
+    content_type = media_type(content_type)
+    if content_type in ARROW_STREAM_TYPES:
+        table = pa.ipc.open_stream(body).read_all()
+    elif content_type in ARROW_FILE_TYPES:
+        table = pa.ipc.open_file(pa.BufferReader(body)).read_all()
+    else:
+        table = pq.read_table(io.BytesIO(body))
+    return {
+        name: table.column(name).to_numpy(zero_copy_only=False)
+        for name in table.column_names
+    }
+
+
+def build_matrix(
+    columns: Dict[str, Sequence], schema: Optional[List[dict]]
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Validate input columns against a model's feature schema and stack them
+    into a 2-D matrix in training order.
+
+    Extra columns (e.g. the label) are ignored. When every feature is numeric
+    the result is a float64 matrix; otherwise an object matrix.
+    Raises FeatureValidationError on missing, ragged or non-numeric columns.
+    """
+    if schema is None:
+        schema = [{"name": name, "dtype": "float64"} for name in columns]
+    names = [feature["name"] for feature in schema]
+
+    missing = [name for name in names if name not in columns]
+    if missing:
+        raise FeatureValidationError(f"Missing feature columns: {missing}")
+    if not names:
+        raise FeatureValidationError("No feature columns given")
+
+    n_rows = len(columns[names[0]])
+    numeric = all(is_numeric_dtype(feature["dtype"]) for feature in schema)
+    X = np.empty((n_rows, len(names)), dtype=np.float64 if numeric else object)
+    for j, feature in enumerate(schema):
+        values = columns[feature["name"]]
+        if len(values) != n_rows:
+            raise FeatureValidationError(
+                f"Column '{feature['name']}' has {len(values)} values, expected {n_rows}"
+            )
+        if is_numeric_dtype(feature["dtype"]):
+            try:
+                X[:, j] = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                raise FeatureValidationError(
+                    f"Column '{feature['name']}' must be numeric"
+                )
+        else:
+            X[:, j] = np.asarray(values, dtype=object)
+    return X, names
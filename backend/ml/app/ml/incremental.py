@@ -0,0 +1,246 @@
+import os
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import confusion_matrix
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from . import backends, tracing
+from .pipeline import TabularPreprocessor
+
+# Rows read from the CSV at a time in chunked training
+TRAINING_CHUNK_ROWS = int(os.getenv("TRAINING_CHUNK_ROWS", "50000"))
+# Rows per partial_fit step within a chunk
+MINI_BATCH_ROWS = 4096
+
+# Called with the fraction of the current pass completed
+ProgressFn = Callable[[float], None]
+
+
+class CsvScan:
+    """
+    What one pass over a CSV tells us before training: row count, column
+    dtypes, the categories of every text column and the largest absolute
+    value of every integer column.
+    """
+
+    def __init__(
+        self,
+        total_rows: int,
+        categories: Dict[str, list],
+        dtypes: dict,
+        max_abs: Dict[str, int],
+    ):
+        self.total_rows = total_rows
+        self.categories = categories
+        self.dtypes = dtypes
+        self.max_abs = max_abs
+
+    def preprocessor(self, label_column: Optional[str]) -> TabularPreprocessor:
+        return TabularPreprocessor.from_stats(
+            self.dtypes, self.categories, self.max_abs, label_column
+        )
+
+
+def scan_csv(path: str, chunk_rows: int) -> CsvScan:
+    with tracing.span("scan_csv", path=path):
+        return _scan_csv(path, chunk_rows)
+
+
+def _scan_csv(path: str, chunk_rows: int) -> CsvScan:
+    total_rows = 0
+    uniques: Dict[str, set] = {}
+    dtypes: Dict[str, str] = {}
+    max_abs: Dict[str, int] = {}
+    # Columns that read as numbers in an earlier chunk and as text later
+    late_text = set()
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        for col, dtype in chunk.dtypes.items():
+            dtypes.setdefault(col, str(dtype))
+            if col in uniques or not pd.api.types.is_numeric_dtype(dtype):
+                if col not in uniques and total_rows:
+                    late_text.add(col)
+                uniques.setdefault(col, set()).update(chunk[col].astype(str).unique())
+            elif pd.api.types.is_integer_dtype(dtype) and len(chunk):
+                max_abs[col] = max(max_abs.get(col, 0), int(chunk[col].abs().max()))
+        total_rows += len(chunk)
+
+    if late_text:
+        for chunk in pd.read_csv(
+            path, usecols=list(late_text), dtype=str, chunksize=chunk_rows
+        ):
+            for col in late_text:
+                uniques[col].update(chunk[col].astype(str).unique())
+    categories = {col: sorted(values) for col, values in uniques.items()}
+    return CsvScan(total_rows, categories, dtypes, max_abs)
+
+
+def iter_chunks(
+    path: str,
+    scan: CsvScan,
+    preprocessor: TabularPreprocessor,
+    chunk_rows: int,
+    progress: Optional[ProgressFn] = None,
+) -> Iterator[Tuple[pd.DataFrame, Optional[np.ndarray]]]:
+    """
+    Yield (X, y) per chunk, encoded by `preprocessor`. y is None when it has
+    no label column.
+    """
+    done = 0
+    label_column = preprocessor.label_column
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        X = preprocessor.transform_frame(chunk)
+        y = preprocessor.encode_label(chunk[label_column]) if label_column else None
+        done += len(chunk)
+        yield X, y
+        if progress:
+            progress(done / scan.total_rows if scan.total_rows else 1.0)
+
+
+def _mini_batches(X, y: Optional[np.ndarray]):
+    for start in range(0, len(X), MINI_BATCH_ROWS):
+        stop = start + MINI_BATCH_ROWS
+        yield X[start:stop], None if y is None else y[start:stop]
+
+
+def label_classes(path: str, preprocessor: TabularPreprocessor, chunk_rows: int):
+    if preprocessor.label_classes is not None:
+        return np.arange(len(preprocessor.label_classes))
+    label_column = preprocessor.label_column
+    values = set()
+    for chunk in pd.read_csv(path, usecols=[label_column], chunksize=chunk_rows):
+        values.update(chunk[label_column].unique())
+    return np.array(sorted(values))
+
+
+def fit_sgd_classifier(
+    path: str,
+    scan: CsvScan,
+    preprocessor: TabularPreprocessor,
+    chunk_rows: int,
+    C: float,
+    epochs: int,
+    progress: ProgressFn,
+):
+    """
+    Logistic regression fitted with SGD over chunked reads: one pass to fit
+    the feature scaler, then `epochs` passes of partial_fit. Returns
+    (pipeline, classification metrics).
+    """
+    classes = label_classes(path, preprocessor, chunk_rows)
+    passes = epochs + 2
+
+    scaler = StandardScaler()
+    for X, _ in iter_chunks(
+        path, scan, preprocessor, chunk_rows, lambda f: progress(f / passes)
+    ):
+        scaler.partial_fit(X)
+
+    # alpha = 1 / (C * n_samples) matches LogisticRegression's regularization
+    model = SGDClassifier(
+        loss="log_loss", alpha=1.0 / (C * max(scan.total_rows, 1)), random_state=0
+    )
+    for epoch in range(epochs):
+        for X, y in iter_chunks(
+            path,
+            scan,
+            preprocessor,
+            chunk_rows,
+            lambda f: progress((1 + epoch + f) / passes),
+        ):
+            for X_batch, y_batch in _mini_batches(scaler.transform(X), y):
+                model.partial_fit(X_batch, y_batch, classes=classes)
+
+    pipeline = Pipeline([("scaler", scaler), ("model", model)])
+    matrix = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    for X, y in iter_chunks(
+        path,
+        scan,
+        preprocessor,
+        chunk_rows,
+        lambda f: progress((passes - 1 + f) / passes),
+    ):
+        matrix += confusion_matrix(y, pipeline.predict(X), labels=classes)
+    return pipeline, metrics_from_confusion(matrix)
+
+
+def metrics_from_confusion(matrix: np.ndarray) -> dict:
+    """
+    Accuracy and macro precision/recall (zero_division=0) over the classes
+    that occur in either the labels or the predictions.
+    """
+    true_counts = matrix.sum(axis=1)
+    pred_counts = matrix.sum(axis=0)
+    present = (true_counts + pred_counts) > 0
+    tp = np.diag(matrix)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(pred_counts > 0, tp / pred_counts, 0.0)
+        recall = np.where(true_counts > 0, tp / true_counts, 0.0)
+    total = matrix.sum()
+    return {
+        "accuracy": float(tp.sum() / total) if total else 0.0,
+        "precision": float(precision[present].mean()) if present.any() else 0.0,
+        "recall": float(recall[present].mean()) if present.any() else 0.0,
+    }
+
+
+def fit_minibatch_kmeans(
+    path: str,
+    scan: CsvScan,
+    preprocessor: TabularPreprocessor,
+    chunk_rows: int,
+    n_clusters: int,
+    progress: ProgressFn,
+):
+    """
+    MiniBatchKMeans over chunked reads, plus a pass to compute the inertia
+    on the whole dataset. Returns (model, metrics).
+    """
+    model = MiniBatchKMeans(n_clusters=n_clusters, random_state=0, n_init=3)
+    for X, _ in iter_chunks(
+        path, scan, preprocessor, chunk_rows, lambda f: progress(f / 2)
+    ):
+        for X_batch, _ in _mini_batches(X, None):
+            # partial_fit needs at least n_clusters rows
+            if len(X_batch) >= n_clusters:
+                model.partial_fit(X_batch)
+
+    inertia = 0.0
+    for X, _ in iter_chunks(
+        path, scan, preprocessor, chunk_rows, lambda f: progress((1 + f) / 2)
+    ):
+        inertia -= model.score(X)
+    return model, {"inertia": float(inertia), "n_clusters": n_clusters}
+
+
+def tf_dataset(
+    path: str,
+    scan: CsvScan,
+    preprocessor: TabularPreprocessor,
+    chunk_rows: int,
+    batch_size: int,
+):
+    """
+    A tf.data pipeline that streams encoded rows from the CSV on every epoch
+    instead of holding the dataset in memory.
+    """
+    tf = backends.KERAS.tensorflow()
+
+    def generate():
+        for X, y in iter_chunks(path, scan, preprocessor, chunk_rows):
+            yield X.to_numpy(np.float32), y.astype(np.float32)
+
+    signature = (
+        tf.TensorSpec(shape=(None, len(preprocessor.columns)), dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.float32),
+    )
+    return (
+        tf.data.Dataset.from_generator(generate, output_signature=signature)
+        .unbatch()
+        .batch(batch_size)
+        .prefetch(tf.data.AUTOTUNE)
+    )
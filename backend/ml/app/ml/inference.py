@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+
+def make_predict_fn(model, is_keras: bool, columns: list):
+    """
+    Build predict_fn(X) -> (predictions, probabilities) for a feature matrix.
+    """
+    if is_keras:
+
+        def predict_keras(X: np.ndarray):
+            raw_preds = model.predict(X, verbose=0).flatten()
+            return (raw_preds >= 0.5).astype(int), raw_preds
+
+        return predict_keras
+
+    def predict_sklearn(X: np.ndarray):
+        df = pd.DataFrame(X, columns=columns)
+        if hasattr(model, "predict_proba"):
+            probs = model.predict_proba(df)
+            probabilities = probs[:, 1] if probs.shape[1] > 1 else probs.flatten()
+            if hasattr(model, "classes_"):
+                # Same as model.predict() for classifiers, without a second pass
+                preds = model.classes_[probs.argmax(axis=1)]
+            else:
+                preds = model.predict(df)
+        else:
+            preds = model.predict(df)
+            probabilities = np.zeros(len(preds))
+        return preds, probabilities
+
+    return predict_sklearn
@@ -0,0 +1,376 @@
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from opentelemetry.trace import SpanKind
+
+from . import storage, tracing
+from .storage import ensure_schema
+
+logger = logging.getLogger("app")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    params TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    logs TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker_pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_kind_created_at ON jobs (kind, created_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status);
+"""
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Added to job tables created before the column was
+COLUMNS = {"jobs": {"worker_pid": "INTEGER"}}
+
+# Threads that drive jobs in this worker; heavy work is handed to process pools
+JOB_RUNNER_THREADS = int(os.getenv("JOB_RUNNER_THREADS", "2"))
+# Only the tail of a job's log is kept
+MAX_LOG_CHARS = 64 * 1024
+# Queued or running jobs one owner (params["metadata"]["owner_id"]) may
+# have, counted across every worker process; 0 disables the quota
+MAX_ACTIVE_JOBS_PER_OWNER = int(os.getenv("MAX_ACTIVE_JOBS_PER_OWNER", "2"))
+# Retry-After for a refused job when none of its kind has finished yet
+DEFAULT_RETRY_AFTER_SECONDS = 30
+# How often a job waiting for a Slots limit tries to claim one
+CLAIM_INTERVAL_SECONDS = float(os.getenv("JOB_CLAIM_INTERVAL_SECONDS", "1"))
+
+
+class QuotaExceeded(Exception):
+    """
+    The owner already has MAX_ACTIVE_JOBS_PER_OWNER jobs queued or running.
+    """
+
+    def __init__(self, owner, retry_after: int):
+        super().__init__(
+            f"You already have {MAX_ACTIVE_JOBS_PER_OWNER} jobs queued or running"
+        )
+        self.owner = owner
+        self.retry_after = retry_after
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def _connection():
+    return ensure_schema("jobs", SCHEMA, COLUMNS)
+
+
+def _row_to_job(row) -> dict:
+    return {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "progress": row["progress"],
+        "params": json.loads(row["params"]),
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "error": row["error"],
+        "logs": row["logs"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+    }
+
+
+def create_job(kind: str, params: dict) -> dict:
+    """
+    Insert a queued job. Raises QuotaExceeded when the job's owner already
+    has MAX_ACTIVE_JOBS_PER_OWNER active jobs.
+    """
+    job_id = uuid.uuid4().hex
+    owner = (params.get("metadata") or {}).get("owner_id")
+    conn = _connection()
+    with conn:
+        if owner is not None and MAX_ACTIVE_JOBS_PER_OWNER:
+            # Take the write lock before counting, so two workers cannot
+            # both admit an owner's last slot
+            conn.execute("BEGIN IMMEDIATE")
+            if _count_active(conn, owner) >= MAX_ACTIVE_JOBS_PER_OWNER:
+                raise QuotaExceeded(owner, _retry_after(conn, kind))
+        conn.execute(
+            """
+            INSERT INTO jobs (id, kind, status, params, created_at, worker_pid)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (job_id, kind, QUEUED, json.dumps(params), time.time(), os.getpid()),
+        )
+    return get_job(job_id)
+
+
+def _count_active(conn, owner) -> int:
+    (count,) = conn.execute(
+        """
+        SELECT count(*) FROM jobs
+        WHERE status IN (?, ?) AND json_extract(params, '$.metadata.owner_id') = ?
+        """,
+        (QUEUED, RUNNING, owner),
+    ).fetchone()
+    return count
+
+
+def _retry_after(conn, kind: str) -> int:
+    # Average run time of the latest finished jobs of this kind
+    (seconds,) = conn.execute(
+        """
+        SELECT avg(finished_at - started_at) FROM (
+            SELECT started_at, finished_at FROM jobs
+            WHERE kind = ? AND started_at IS NOT NULL AND finished_at IS NOT NULL
+            ORDER BY created_at DESC LIMIT 20
+        )
+        """,
+        (kind,),
+    ).fetchone()
+    return max(1, math.ceil(seconds or DEFAULT_RETRY_AFTER_SECONDS))
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    row = _connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def list_jobs(
+    kind: Optional[str] = None,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    clauses, params = [], []
+    if kind is not None:
+        clauses.append("kind = ?")
+        params.append(kind)
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    sql = f"""
+        SELECT * FROM jobs {where}
+        ORDER BY created_at DESC LIMIT ? OFFSET ?
+    """
+    rows = _connection().execute(sql, (*params, limit, skip)).fetchall()
+    return [_row_to_job(row) for row in rows]
+
+
+def mark_running(job_id: str):
+    _update(job_id, status=RUNNING, started_at=time.time())
+
+
+class Slots:
+    """
+    Caps how many jobs of `kinds` run at once across every worker process
+    sharing the job table. A job waits queued until it can be claimed:
+    marked running while fewer than `limit` of them are, and no older job
+    of those kinds is still queued.
+    """
+
+    def __init__(self, kinds: tuple, limit: int):
+        self.kinds = kinds
+        self.limit = limit
+
+    def try_claim(self, job_id: str) -> bool:
+        marks = ", ".join("?" * len(self.kinds))
+        conn = _connection()
+        with conn:
+            # One statement, so the count and the update are atomic
+            claimed = conn.execute(
+                f"""
+                UPDATE jobs SET status = ?, started_at = ?
+                WHERE id = ? AND status = ?
+                AND (
+                    SELECT count(*) FROM jobs
+                    WHERE status = ? AND kind IN ({marks})
+                ) < ?
+                AND NOT EXISTS (
+                    SELECT 1 FROM jobs AS older
+                    WHERE older.status = ? AND older.kind IN ({marks})
+                    AND older.created_at < jobs.created_at
+                )
+                """,
+                (
+                    RUNNING,
+                    time.time(),
+                    job_id,
+                    QUEUED,
+                    RUNNING,
+                    *self.kinds,
+                    self.limit,
+                    QUEUED,
+                    *self.kinds,
+                ),
+            ).rowcount
+        return bool(claimed)
+
+    def claim(self, job_id: str):
+        """
+        Block until the job is claimed.
+        """
+        while not self.try_claim(job_id):
+            job = get_job(job_id)
+            if job is None or job["status"] != QUEUED:
+                raise RuntimeError(f"Job {job_id} is no longer queued")
+            time.sleep(CLAIM_INTERVAL_SECONDS)
+
+
+def fail_unfinished(pid: Optional[int] = None) -> int:
+    """
+    Mark the queued and running jobs of worker process `pid` (of every
+    process by default) failed: the threads running them died with the
+    process. Called by the gunicorn master, on its own connection so none
+    is inherited by the workers it forks.
+    """
+    sql = (
+        "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status IN (?, ?)"
+    )
+    params = [FAILED, "The worker process exited", time.time(), QUEUED, RUNNING]
+    if pid is not None:
+        sql += " AND worker_pid = ?"
+        params.append(pid)
+    conn = storage.connect()
+    try:
+        storage.apply_schema(conn, SCHEMA, COLUMNS)
+        with conn:
+            return conn.execute(sql, params).rowcount
+    finally:
+        conn.close()
+
+
+def set_progress(job_id: str, progress: float, **result):
+    """
+    Record progress (0..1) and, optionally, partial result fields.
+    """
+    fields = {"progress": min(max(progress, 0.0), 1.0)}
+    if result:
+        fields["result"] = json.dumps(result)
+    _update(job_id, **fields)
+
+
+def mark_succeeded(job_id: str, result: dict):
+    _update(
+        job_id,
+        status=SUCCEEDED,
+        progress=1.0,
+        result=json.dumps(result),
+        finished_at=time.time(),
+    )
+
+
+def mark_failed(job_id: str, error: str):
+    _update(job_id, status=FAILED, error=error, finished_at=time.time())
+
+
+def append_log(job_id: str, text: str):
+    conn = _connection()
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET logs = substr(logs || ?, -?) WHERE id = ?",
+            (text, MAX_LOG_CHARS, job_id),
+        )
+
+
+def _update(job_id: str, **fields):
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    conn = _connection()
+    with conn:
+        conn.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+        )
+
+
+def _run(
+    job_id: str,
+    fn: Callable,
+    kwargs: dict,
+    kind: Optional[str] = None,
+    slots: Optional[Slots] = None,
+):
+    if slots is None:
+        mark_running(job_id)
+    else:
+        slots.claim(job_id)
+    try:
+        # CONSUMER: it outlives the request that queued it, so the slow
+        # trace log reports it on its own
+        with tracing.span(
+            f"job {kind or fn.__name__}", SpanKind.CONSUMER, job_id=job_id
+        ):
+            result = fn(job_id, **kwargs)
+    except Exception as e:
+        logger.exception("Job %s failed", job_id)
+        mark_failed(job_id, str(e) or e.__class__.__name__)
+        raise
+    mark_succeeded(job_id, result)
+    return result
+
+
+def _get_runner() -> ThreadPoolExecutor:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = ThreadPoolExecutor(
+                max_workers=JOB_RUNNER_THREADS, thread_name_prefix="job-runner"
+            )
+        return _runner
+
+
+def submit(
+    kind: str,
+    params: dict,
+    fn: Callable,
+    executor: Optional[Executor] = None,
+    slots: Optional[Slots] = None,
+    **kwargs,
+) -> dict:
+    """
+    Create a job and run `fn(job_id, **kwargs)` on `executor` (by default the
+    shared job runner thread pool), once `slots` lets it start. `fn` returns
+    the job's result dict; an exception marks the job failed.
+    """
+    job, _ = _start(kind, params, fn, executor, slots, kwargs)
+    return job
+
+
+def submit_and_wait(
+    kind: str,
+    params: dict,
+    fn: Callable,
+    executor: Optional[Executor] = None,
+    slots: Optional[Slots] = None,
+    **kwargs,
+) -> dict:
+    """
+    Like submit, but wait for the job and return its result; its exception
+    is raised here.
+    """
+    _, future = _start(kind, params, fn, executor, slots, kwargs)
+    return future.result()
+
+
+def _start(kind, params, fn, executor, slots, kwargs) -> tuple:
+    job = create_job(kind, params)
+    # The job's spans join the trace of the request that submitted it
+    context = contextvars.copy_context()
+    future = (executor or _get_runner()).submit(
+        context.run, _run, job["job_id"], fn, kwargs, kind, slots
+    )
+    return job, future
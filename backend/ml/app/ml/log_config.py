@@ -0,0 +1,171 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from opentelemetry import trace
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# "json" or "text" lines on stdout, plus a rotating file when LOG_FILE is set
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_FILE = os.getenv("LOG_FILE", "")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# INFO/DEBUG records kept per message template per second; 0 keeps all
+LOG_SAMPLE_PER_SECOND = int(os.getenv("LOG_SAMPLE_PER_SECOND", "20"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_service: Optional[str] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, the trace and
+    span ids of the request that logged it, any `extra=` fields and the
+    formatted exception.
+    """
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "service": self.service,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through at most `per_second` records per message template each
+    second at INFO and below; warnings and errors always pass. The next
+    record let through carries the number dropped as `suppressed`.
+    """
+
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        self._windows = {}  # template -> [second, passed, dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.per_second <= 0 or record.levelno > logging.INFO:
+            return True
+        second = int(record.created)
+        template = record.msg if isinstance(record.msg, str) else record.name
+        with self._lock:
+            window = self._windows.get(template)
+            if window is None or window[0] != second:
+                dropped = window[2] if window else 0
+                window = self._windows[template] = [second, 0, dropped]
+            if window[1] >= self.per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.suppressed = window[2]
+                window[2] = 0
+        return True
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records unformatted: the message is built from its arguments
+    by the listener thread, off the request's critical path. Only the trace
+    context, which lives in the calling thread, is captured here.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.trace_id = format(span_context.trace_id, "032x")
+            record.span_id = format(span_context.span_id, "016x")
+        return record
+
+
+def _output_handlers(service: str):
+    if LOG_FORMAT == "json":
+        formatter = JsonFormatter(service)
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT, "%Y-%m-%d %H:%M:%S")
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE:
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                LOG_FILE,
+                maxBytes=LOG_MAX_BYTES,
+                backupCount=LOG_BACKUP_COUNT,
+                delay=True,
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def configure_logging(service: str = "backend-ml"):
+    """
+    Route every logger through an in-memory queue to a background thread
+    that formats the records and writes them to stdout and, with LOG_FILE
+    set, a rotating file. Training processes call it again on start.
+    """
+    global _listener, _service
+    if _listener is not None:
+        return
+    _service = service
+    log_queue = queue.SimpleQueue()
+    handler = LazyQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(LOG_SAMPLE_PER_SECOND))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    logging.getLogger("app").setLevel(LOG_LEVEL.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *_output_handlers(service))
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """
+    Write out the queued records and stop the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # A forked worker (gunicorn with preload_app) inherits the handlers but
+    # not the listener thread, so it starts its own
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configure_logging(_service)
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -1,9 +1,181 @@
-metrics_store = {}  # dict with keys: (model_name, version), value: dict of metrics
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
 
+from .storage import ensure_schema
 
-def save_metrics(model_name: str, version: str, metrics: dict):
-    metrics_store[(model_name, version)] = metrics
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    dataset TEXT NOT NULL DEFAULT '',
+    metrics TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (model_name, version, dataset)
+);
+CREATE INDEX IF NOT EXISTS ix_model_metrics_dataset
+    ON model_metrics (dataset, updated_at);
+CREATE INDEX IF NOT EXISTS ix_model_metrics_updated_at
+    ON model_metrics (updated_at);
+"""
 
+CACHE_TTL_SECONDS = float(os.getenv("METRICS_CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("METRICS_CACHE_MAX_ENTRIES", "1024"))
 
-def get_metrics(model_name: str, version: str):
-    return metrics_store.get((model_name, version), None)
+
+class _MetricsCache:
+    """
+    Small per-process LRU with a TTL in front of the metrics table.
+
+    Writes made by this process invalidate their entry straight away; writes
+    made by other workers become visible once the entry expires.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, model_name: str, version: str):
+        with self._lock:
+            for key in [k for k in self._data if k[:2] == (model_name, version)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = _MetricsCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
+def _connection():
+    return ensure_schema("model_metrics", SCHEMA)
+
+
+def _row_to_record(row) -> dict:
+    return {
+        "model_name": row["model_name"],
+        "version": row["version"],
+        "dataset": row["dataset"] or None,
+        "metrics": json.loads(row["metrics"]),
+        "updated_at": row["updated_at"],
+    }
+
+
+def save_metrics(
+    model_name: str, version: str, metrics: dict, dataset: Optional[str] = None
+):
+    """
+    Store (or replace) the metrics of a model version evaluated on `dataset`.
+    """
+    conn = _connection()
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO model_metrics (model_name, version, dataset, metrics, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (model_name, version, dataset)
+            DO UPDATE SET metrics = excluded.metrics, updated_at = excluded.updated_at
+            """,
+            (model_name, version, dataset or "", json.dumps(metrics), time.time()),
+        )
+    _cache.invalidate(model_name, version)
+
+
+def get_metrics(model_name: str, version: str, dataset: Optional[str] = None):
+    """
+    Return the metrics dict of a model version, or None.
+
+    Without `dataset`, the most recently written metrics of that version are
+    returned, whatever dataset they were computed on.
+    """
+    key = (model_name, version, dataset)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    conn = _connection()
+    if dataset is None:
+        row = conn.execute(
+            """
+            SELECT metrics FROM model_metrics
+            WHERE model_name = ? AND version = ?
+            ORDER BY updated_at DESC LIMIT 1
+            """,
+            (model_name, version),
+        ).fetchone()
+    else:
+        row = conn.execute(
+            """
+            SELECT metrics FROM model_metrics
+            WHERE model_name = ? AND version = ? AND dataset = ?
+            """,
+            (model_name, version, dataset),
+        ).fetchone()
+    if row is None:
+        # Misses are not cached so a fresh write from another worker shows up
+        return None
+
+    metrics = json.loads(row["metrics"])
+    _cache.put(key, metrics)
+    return metrics
+
+
+def list_metrics(
+    model_name: Optional[str] = None,
+    version: Optional[str] = None,
+    dataset: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    """
+    Query stored metrics, newest first. All filters are optional.
+    """
+    clauses, params = [], []
+    if model_name is not None:
+        clauses.append("model_name = ?")
+        params.append(model_name)
+    if version is not None:
+        clauses.append("version = ?")
+        params.append(version)
+    if dataset is not None:
+        clauses.append("dataset = ?")
+        params.append(dataset)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    sql = f"""
+        SELECT model_name, version, dataset, metrics, updated_at FROM model_metrics
+        {where}
+        ORDER BY updated_at DESC LIMIT ? OFFSET ?
+    """
+    rows = _connection().execute(sql, (*params, limit, skip)).fetchall()
+    return [_row_to_record(row) for row in rows]
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from . import backends, batching, registry, tracing
+from .cache import LRUCache
+
+# Budget is approximated by artifact size on disk
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(1024**3)))
+
+# A model's batchers hold it too; they go when it leaves the cache
+_cache = LRUCache(
+    MODEL_CACHE_MAX_BYTES, on_evict=lambda key, model: batching.discard(model)
+)
+_load_stats = {"loads": 0, "load_seconds": 0.0}
+_load_stats_lock = threading.Lock()
+
+
+def load_model_file(path: str):
+    """
+    Load a model artifact from disk with the backend for its extension.
+    """
+    backend = backends.for_path(path)
+    with tracing.span("load_model", path=path, backend=backend.name):
+        return backend.load(path)
+
+
+def get_model(path: str):
+    """
+    Return the model stored at `path`, loading it at most once per process.
+
+    Entries are keyed by path, mtime and size, so a rewritten artifact is
+    reloaded on the next request and the old copy is dropped.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    def loader():
+        started = time.perf_counter()
+        model = load_model_file(path)
+        with _load_stats_lock:
+            _load_stats["loads"] += 1
+            _load_stats["load_seconds"] += time.perf_counter() - started
+        _cache.discard_if(lambda k: k[0] == key[0] and k != key)
+        return model, stat.st_size
+
+    return _cache.get_or_load(key, loader)
+
+
+def parse_model_refs(value: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Parse "model_a,model_b:v2" into [("model_a", None), ("model_b", "v2")].
+    """
+    refs = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, version = item.rpartition(":")
+        refs.append((name, version) if sep else (item, None))
+    return refs
+
+
+def warm_up(refs: Iterable[Tuple[str, Optional[str]]]) -> List[dict]:
+    """
+    Load the given (model_name, version) pairs into the cache.
+    Returns one status dict per model; failures do not stop the others.
+    """
+    results = []
+    for model_name, version in refs:
+        result = {"model_name": model_name, "version": version}
+        try:
+            path = registry.resolve_artifact(model_name, version)
+            if path is None:
+                result["status"] = "not_found"
+            else:
+                get_model(path)
+                result.update(status="loaded", model_file=os.path.basename(path))
+        except Exception as e:
+            result.update(status="error", detail=str(e))
+        results.append(result)
+    return results
+
+
+def stats() -> dict:
+    with _load_stats_lock:
+        load_stats = dict(_load_stats)
+    return {
+        **_cache.stats(),
+        **load_stats,
+        "frameworks_loaded": backends.loaded_frameworks(),
+    }
+
+
+def clear():
+    _cache.clear()
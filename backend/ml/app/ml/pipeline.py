@@ -0,0 +1,233 @@
+import hashlib
+import os
+import uuid
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from . import model_cache, registry, tracing
+from .features import FeatureValidationError, build_matrix, schema_from_model
+
+# Encoded training matrices, keyed by dataset hash and label column
+ENCODED_CACHE_DIR = os.getenv(
+    "ENCODED_CACHE_DIR", os.path.join(registry.MODELS_DIR, "encoded")
+)
+ENCODED_CACHE_MAX_BYTES = int(os.getenv("ENCODED_CACHE_MAX_BYTES", str(2 * 1024**3)))
+# Bump when the encoding changes so old cache entries are not reused
+ENCODING_VERSION = 1
+
+# Integers up to this magnitude are exact in float32
+FLOAT32_EXACT_INT = 2**24
+
+
+class TabularPreprocessor:
+    """
+    The fitted feature encoding of a model: column order, the categories of
+    every text column (sorted, as LabelEncoder orders them; unseen values
+    encode to -1), the label's classes and the dtype of the feature matrix.
+
+    It is saved next to the model artifact so prediction encodes its input
+    exactly as training did.
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        dtypes: Dict[str, str],
+        categories: Dict[str, list],
+        matrix_dtype: str = "float64",
+        label_column: Optional[str] = None,
+        label_classes: Optional[list] = None,
+    ):
+        self.columns = columns
+        self.dtypes = dtypes
+        self.categories = categories
+        self.matrix_dtype = matrix_dtype
+        self.label_column = label_column
+        self.label_classes = label_classes
+        self._index = {
+            col: pd.Index(cats) for col, cats in categories.items() if col in dtypes
+        }
+
+    @classmethod
+    def fit(
+        cls, df: pd.DataFrame, label_column: Optional[str] = None
+    ) -> "TabularPreprocessor":
+        categories, max_abs = {}, {}
+        for col in df.columns:
+            if pd.api.types.is_numeric_dtype(df[col].dtype):
+                if pd.api.types.is_integer_dtype(df[col].dtype) and len(df):
+                    max_abs[col] = int(df[col].abs().max())
+            else:
+                categories[col] = sorted(df[col].astype(str).unique())
+        dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
+        return cls.from_stats(dtypes, categories, max_abs, label_column)
+
+    @classmethod
+    def from_stats(
+        cls,
+        dtypes: Dict[str, str],
+        categories: Dict[str, list],
+        max_abs: Dict[str, int],
+        label_column: Optional[str] = None,
+    ) -> "TabularPreprocessor":
+        """
+        Build from column dtypes, text categories and the largest absolute
+        value of each integer column (as gathered by a chunked scan).
+        """
+        columns = [col for col in dtypes if col != label_column]
+        # float32 halves the matrix; use it unless an integer needs more bits
+        exact = all(max_abs.get(col, 0) < FLOAT32_EXACT_INT for col in columns)
+        return cls(
+            columns=columns,
+            dtypes={col: dtypes[col] for col in columns},
+            categories={col: categories[col] for col in columns if col in categories},
+            matrix_dtype="float32" if exact else "float64",
+            label_column=label_column,
+            label_classes=categories.get(label_column),
+        )
+
+    @property
+    def feature_schema(self) -> List[dict]:
+        return [
+            {"name": col, "dtype": "object" if col in self._index else self.dtypes[col]}
+            for col in self.columns
+        ]
+
+    def transform(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """
+        Encode input columns (name -> values) into the model's feature
+        matrix. Extra columns are ignored. Raises FeatureValidationError on
+        missing, ragged or non-numeric columns.
+        """
+        missing = [col for col in self.columns if col not in columns]
+        if missing:
+            raise FeatureValidationError(f"Missing feature columns: {missing}")
+
+        n_rows = len(columns[self.columns[0]]) if self.columns else 0
+        X = np.empty((n_rows, len(self.columns)), dtype=self.matrix_dtype)
+        for j, col in enumerate(self.columns):
+            values = columns[col]
+            if len(values) != n_rows:
+                raise FeatureValidationError(
+                    f"Column '{col}' has {len(values)} values, expected {n_rows}"
+                )
+            if col in self._index:
+                strings = np.asarray(values).astype(str)
+                X[:, j] = self._index[col].get_indexer(strings)
+            else:
+                try:
+                    X[:, j] = np.asarray(values, dtype=np.float64)
+                except (TypeError, ValueError):
+                    raise FeatureValidationError(f"Column '{col}' must be numeric")
+        return X
+
+    def transform_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        X = self.transform({col: df[col].to_numpy() for col in self.columns})
+        return pd.DataFrame(X, columns=self.columns, copy=False)
+
+    def encode_label(self, values) -> np.ndarray:
+        values = np.asarray(values)
+        if self.label_classes is None:
+            return values
+        return pd.Index(self.label_classes).get_indexer(values.astype(str))
+
+    def decode_label(self, codes) -> np.ndarray:
+        """
+        Map predicted label codes back to the original class names.
+        """
+        codes = np.asarray(codes)
+        if self.label_classes is None or codes.dtype.kind not in "iu":
+            return codes
+        return np.asarray(self.label_classes, dtype=object)[codes]
+
+
+def load_preprocessor(artifact_path: str) -> Optional[TabularPreprocessor]:
+    """
+    The preprocessor saved with a model, from the model cache; None for
+    models trained before preprocessors were persisted.
+    """
+    path = registry.preprocessor_path_for(artifact_path)
+    if not os.path.isfile(path):
+        return None
+    return model_cache.get_model(path)
+
+
+def encode_inputs(
+    artifact_path: str, model, schema: Optional[List[dict]], columns: Mapping
+) -> Tuple[np.ndarray, List[str], Optional[TabularPreprocessor]]:
+    """
+    Build the feature matrix for a prediction: with the model's preprocessor
+    when it has one, otherwise by validating against its feature schema.
+    Returns (X, feature names, preprocessor or None).
+    """
+    preprocessor = load_preprocessor(artifact_path)
+    if preprocessor is not None:
+        return preprocessor.transform(columns), preprocessor.columns, preprocessor
+    X, names = build_matrix(columns, schema or schema_from_model(model))
+    return X, names, None
+
+
+def _cache_path(dataset_hash: str, label_column: Optional[str]) -> str:
+    key = f"{ENCODING_VERSION}:{dataset_hash}:{label_column or ''}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return os.path.join(ENCODED_CACHE_DIR, f"{digest}.joblib")
+
+
+def _prune_encoded_cache():
+    entries = []
+    for name in os.listdir(ENCODED_CACHE_DIR):
+        if name.endswith(".tmp"):
+            continue  # being written by another training
+        path = os.path.join(ENCODED_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= ENCODED_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def encode_dataset(
+    df_loader, dataset_hash: str, label_column: Optional[str]
+) -> Tuple[TabularPreprocessor, pd.DataFrame, Optional[np.ndarray], bool]:
+    """
+    Fit a preprocessor on a dataset and encode it, reusing the result of an
+    earlier training on the same file (same hash and label column).
+
+    `df_loader()` returns the raw DataFrame; it is only called on a cache
+    miss. Returns (preprocessor, X, y or None, cache hit).
+    """
+    path = _cache_path(dataset_hash, label_column)
+    if os.path.isfile(path):
+        try:
+            with tracing.span("load_encoded_cache"):
+                cached = joblib.load(path, mmap_mode="r")
+            os.utime(path)
+            X = pd.DataFrame(cached["X"], columns=cached["pre"].columns, copy=False)
+            return cached["pre"], X, cached["y"], True
+        except Exception:
+            pass  # unreadable or partly pruned: rebuild it
+
+    df = df_loader()
+    with tracing.span("encode_dataset", rows=len(df), columns=df.shape[1]):
+        preprocessor = TabularPreprocessor.fit(df, label_column)
+        X = preprocessor.transform_frame(df)
+        y = preprocessor.encode_label(df[label_column]) if label_column else None
+
+    os.makedirs(ENCODED_CACHE_DIR, exist_ok=True)
+    staged = f"{path}.{uuid.uuid4().hex}.tmp"
+    joblib.dump({"pre": preprocessor, "X": X.to_numpy(), "y": y}, staged)
+    os.replace(staged, path)
+    _prune_encoded_cache()
+    return preprocessor, X, y, False
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Optional, Union
+
+from . import backends
+from .storage import ensure_schema
+
+MODELS_DIR = "saved_models"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_registry (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    hyperparams TEXT NOT NULL DEFAULT '{}',
+    label_column TEXT,
+    dataset_path TEXT,
+    dataset_hash TEXT,
+    feature_schema TEXT NOT NULL DEFAULT '[]',
+    file_size INTEGER,
+    train_seconds REAL,
+    artifact_path TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (model_id, version)
+);
+CREATE INDEX IF NOT EXISTS ix_model_registry_created_at
+    ON model_registry (created_at);
+CREATE INDEX IF NOT EXISTS ix_model_registry_algorithm
+    ON model_registry (algorithm, created_at);
+CREATE INDEX IF NOT EXISTS ix_model_registry_dataset_hash
+    ON model_registry (dataset_hash);
+"""
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Model ids become file names and URL path segments
+MODEL_ID_PATTERN = r"^[A-Za-z0-9_-][A-Za-z0-9._-]*$"
+PREPROCESSOR_SUFFIX = ".preprocessor.joblib"
+
+
+def _connection():
+    return ensure_schema("model_registry", SCHEMA)
+
+
+def hash_file(path: str) -> str:
+    """
+    SHA-256 of a file, read in 1 MiB chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_version(version: Union[str, int, None]) -> Optional[int]:
+    """
+    Accept 3, "3", "v3" or "latest"/None (-> None, meaning newest).
+    Raises ValueError for anything else.
+    """
+    if version is None or isinstance(version, int):
+        return version
+    version = version.strip().lower()
+    if version in ("", "latest"):
+        return None
+    return int(version[1:] if version.startswith("v") else version)
+
+
+def check_model_id(model_id: str) -> str:
+    """
+    Return `model_id` if it is a safe model id: letters, digits, ".", "_"
+    and "-", not starting with ".". Raises ValueError otherwise.
+    """
+    if not re.match(MODEL_ID_PATTERN, model_id):
+        raise ValueError(
+            f"Invalid model name {model_id!r}: use letters, digits, '.', '_' "
+            "and '-', not starting with '.'"
+        )
+    return model_id
+
+
+def default_model_id(algorithm: str, dataset_path: str) -> str:
+    """
+    "<algorithm>_<dataset file name>", with characters a model id may not
+    contain replaced by "_".
+    """
+    name = f"{algorithm}_{os.path.basename(dataset_path)}"
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)
+
+
+def artifact_path_for(model_id: str, version: int, extension: str) -> str:
+    path = os.path.join(MODELS_DIR, f"{check_model_id(model_id)}_v{version}{extension}")
+    # Defence in depth: never write outside the models directory
+    if os.path.dirname(os.path.realpath(path)) != os.path.realpath(MODELS_DIR):
+        raise ValueError(f"Invalid model name {model_id!r}")
+    return path
+
+
+def preprocessor_path_for(artifact_path: str) -> str:
+    """
+    Where the fitted preprocessing pipeline of a model is kept: next to its
+    artifact, e.g. saved_models/<model_id>_v<n>.preprocessor.joblib.
+    """
+    return os.path.splitext(artifact_path)[0] + PREPROCESSOR_SUFFIX
+
+
+def _row_to_entry(row) -> dict:
+    return {
+        "model_id": row["model_id"],
+        "version": row["version"],
+        "algorithm": row["algorithm"],
+        "hyperparams": json.loads(row["hyperparams"]),
+        "label_column": row["label_column"],
+        "dataset_path": row["dataset_path"],
+        "dataset_hash": row["dataset_hash"],
+        "feature_schema": json.loads(row["feature_schema"]),
+        "file_size": row["file_size"],
+        "train_seconds": row["train_seconds"],
+        "artifact_path": row["artifact_path"],
+        "model_file": os.path.basename(row["artifact_path"]),
+        "created_at": row["created_at"],
+    }
+
+
+def register_model(
+    model_id: str,
+    algorithm: str,
+    staged_artifact: str,
+    hyperparams: Optional[dict] = None,
+    label_column: Optional[str] = None,
+    dataset_path: Optional[str] = None,
+    dataset_hash: Optional[str] = None,
+    feature_schema: Optional[list] = None,
+    train_seconds: Optional[float] = None,
+    staged_preprocessor: Optional[str] = None,
+) -> dict:
+    """
+    Register a newly trained model as the next version of `model_id`.
+
+    `staged_artifact` is a file already written to disk; it is moved to its
+    versioned location (saved_models/<model_id>_v<n><ext>) inside the same
+    write transaction that allocates the version, so concurrent trainings of
+    the same model never overwrite each other. `staged_preprocessor`, if
+    given, is moved next to it the same way.
+    """
+    extension = os.path.splitext(staged_artifact)[1]
+    conn = _connection()
+    # BEGIN IMMEDIATE takes the write lock before we read MAX(version)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM model_registry WHERE model_id = ?",
+            (model_id,),
+        ).fetchone()
+        version = row[0] + 1
+        artifact_path = artifact_path_for(model_id, version, extension)
+        conn.execute(
+            """
+            INSERT INTO model_registry (
+                model_id, version, algorithm, hyperparams, label_column,
+                dataset_path, dataset_hash, feature_schema, file_size,
+                train_seconds, artifact_path, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                model_id,
+                version,
+                algorithm,
+                json.dumps(hyperparams or {}),
+                label_column,
+                dataset_path,
+                dataset_hash,
+                json.dumps(feature_schema or []),
+                os.path.getsize(staged_artifact),
+                train_seconds,
+                artifact_path,
+                time.time(),
+            ),
+        )
+        if staged_preprocessor:
+            os.replace(staged_preprocessor, preprocessor_path_for(artifact_path))
+        os.replace(staged_artifact, artifact_path)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return get_model(model_id, version)
+
+
+def get_model(model_id: str, version: Union[str, int, None] = None):
+    """
+    Return the registry entry of a model version (newest if `version` is
+    None/"latest"), or None if there is no such model.
+    """
+    version = parse_version(version)
+    conn = _connection()
+    if version is None:
+        row = conn.execute(
+            """
+            SELECT * FROM model_registry WHERE model_id = ?
+            ORDER BY version DESC LIMIT 1
+            """,
+            (model_id,),
+        ).fetchone()
+    else:
+        row = conn.execute(
+            "SELECT * FROM model_registry WHERE model_id = ? AND version = ?",
+            (model_id, version),
+        ).fetchone()
+    return _row_to_entry(row) if row else None
+
+
+def list_models(
+    model_id: Optional[str] = None,
+    algorithm: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    """
+    List registered model versions, newest first.
+    """
+    clauses, params = [], []
+    if model_id is not None:
+        clauses.append("model_id = ?")
+        params.append(model_id)
+    if algorithm is not None:
+        clauses.append("algorithm = ?")
+        params.append(algorithm)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    sql = f"""
+        SELECT * FROM model_registry {where}
+        ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?
+    """
+    rows = _connection().execute(sql, (*params, limit, skip)).fetchall()
+    return [_row_to_entry(row) for row in rows]
+
+
+def resolve_model(model_name: str, version: Union[str, int, None] = None):
+    """
+    Find the artifact file for `model_name`.
+
+    Registered models are looked up by id (and version). Otherwise
+    `model_name` is treated as a file in saved_models, with or without its
+    .joblib/.h5 extension, as it was before the registry existed.
+    Returns (path, registry entry or None); path is None if nothing matches.
+    """
+    entry = get_model(model_name, version)
+    if entry is not None:
+        return entry["artifact_path"], entry
+    if parse_version(version) is not None:
+        return None, None
+
+    base_path = os.path.join(MODELS_DIR, model_name)
+    possible_paths = [base_path] + [
+        base_path + backend.extension for backend in backends.BACKENDS
+    ]
+    return next((p for p in possible_paths if os.path.isfile(p)), None), None
+
+
+def resolve_artifact(model_name: str, version: Union[str, int, None] = None):
+    """
+    Path of the artifact for `model_name` (see resolve_model), or None.
+    """
+    return resolve_model(model_name, version)[0]
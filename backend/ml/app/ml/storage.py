@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+DEFAULT_DB_PATH = os.path.join("saved_models", "ml_store.db")
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_initialized_schemas = set()
+
+
+def db_path() -> str:
+    """
+    Location of the ML service's SQLite database.
+
+    It lives on the saved_models volume by default, so it survives restarts
+    and is shared by every worker process of the service.
+    """
+    return os.getenv("ML_DB_PATH", DEFAULT_DB_PATH)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # WAL lets readers in other workers proceed while one worker writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+def connect() -> sqlite3.Connection:
+    """
+    Open a new connection to the ML database, not cached for the thread;
+    the caller closes it. For processes that fork afterwards (the gunicorn
+    master), where a connection must not be inherited.
+    """
+    return _connect(db_path())
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return this thread's connection to the ML database, opening it on first use.
+    """
+    path = db_path()
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _connect(path)
+    return conn
+
+
+def ensure_schema(
+    name: str, ddl: str, columns: Optional[Dict[str, Dict[str, str]]] = None
+) -> sqlite3.Connection:
+    """
+    Get a connection and make sure the DDL script `name` has been applied.
+    The DDL must be idempotent (CREATE ... IF NOT EXISTS). `columns`
+    ({table: {column: declaration}}) are added to tables that an earlier
+    version of the DDL created without them.
+    """
+    conn = get_connection()
+    key = (db_path(), name)
+    if key not in _initialized_schemas:
+        with _schema_lock:
+            if key not in _initialized_schemas:
+                apply_schema(conn, ddl, columns)
+                _initialized_schemas.add(key)
+    return conn
+
+
+def apply_schema(
+    conn: sqlite3.Connection,
+    ddl: str,
+    columns: Optional[Dict[str, Dict[str, str]]] = None,
+):
+    """
+    Apply the DDL and add any missing `columns` on `conn`, see ensure_schema.
+    """
+    conn.executescript(ddl)
+    for table, declarations in (columns or {}).items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column, declaration in declarations.items():
+            if column in existing:
+                continue
+            try:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+            except sqlite3.OperationalError as e:
+                # Another worker process added it first
+                if "duplicate column" not in str(e):
+                    raise
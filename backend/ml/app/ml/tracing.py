@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import SpanKind
+
+logger = logging.getLogger("app")
+
+SERVICE_NAME = "backend-ml"
+# "file" appends one JSON span per line to TRACES_DIR/<service>.jsonl,
+# "console" prints them; with "none" spans only feed the slow-request log
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACES_DIR = os.getenv("TRACES_DIR", "traces")
+# Requests and jobs slower than this are logged with a per-stage breakdown
+TRACING_SLOW_SECONDS = float(os.getenv("TRACING_SLOW_SECONDS", "1.0"))
+
+tracer = trace.get_tracer("app")
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def _is_local_root(span: ReadableSpan) -> bool:
+    # Queued jobs (CONSUMER spans) outlive the request that submitted them
+    return (
+        span.parent is None or span.parent.is_remote or span.kind == SpanKind.CONSUMER
+    )
+
+
+class SlowTraceLogger(SpanProcessor):
+    """
+    Keeps the finished spans of recent traces; when a local root span (a
+    request, a queued job or a training process) ends after `threshold`
+    seconds, logs how its time was split between the spans below it.
+    """
+
+    def __init__(self, threshold: float, max_traces: int = 1000):
+        self.threshold = threshold
+        self.max_traces = max_traces
+        self._traces = OrderedDict()  # trace id -> [span]
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan):
+        trace_id = span.context.trace_id
+        with self._lock:
+            spans = self._traces.setdefault(trace_id, [])
+            self._traces.move_to_end(trace_id)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+            if not _is_local_root(span):
+                spans.append(span)
+                return
+            below, rest = _split_descendants(spans, span)
+            if rest:
+                self._traces[trace_id] = rest
+            else:
+                self._traces.pop(trace_id, None)
+
+        seconds = (span.end_time - span.start_time) / 1e9
+        if seconds >= self.threshold:
+            logger.warning(
+                "Slow %s: %.3fs (trace %032x)\n%s",
+                span.name,
+                seconds,
+                trace_id,
+                breakdown(below, span),
+            )
+
+
+def _split_descendants(spans, root: ReadableSpan):
+    """
+    (spans below `root` in start order, the others). Children end before
+    their parent, so all of them have been collected when `root` ends.
+    """
+    ids = {root.context.span_id}
+    below, rest = [], []
+    for span in sorted(spans, key=lambda s: s.start_time):
+        if span.parent is not None and span.parent.span_id in ids:
+            ids.add(span.context.span_id)
+            below.append(span)
+        else:
+            rest.append(span)
+    return below, rest
+
+
+def breakdown(spans, root: ReadableSpan) -> str:
+    """
+    One line per span under `root`, indented by depth, in start order.
+    """
+    depth = {root.context.span_id: 0}
+    lines = []
+    for span in sorted(spans, key=lambda s: s.start_time):
+        level = depth.get(span.parent.span_id, 0) + 1
+        depth[span.context.span_id] = level
+        ms = (span.end_time - span.start_time) / 1e6
+        lines.append(f"{'  ' * level}{span.name}: {ms:.1f} ms")
+    return "\n".join(lines)
+
+
+def _file_exporter(service: str) -> ConsoleSpanExporter:
+    os.makedirs(TRACES_DIR, exist_ok=True)
+    out = open(os.path.join(TRACES_DIR, f"{service}.jsonl"), "a", buffering=1)
+    return ConsoleSpanExporter(
+        service_name=service,
+        out=out,
+        formatter=lambda span: span.to_json(indent=None) + "\n",
+    )
+
+
+def setup_tracing(service: str = SERVICE_NAME) -> TracerProvider:
+    """
+    Install the tracer provider of this process (once) with the configured
+    exporter. Worker processes call it again on start.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            provider = TracerProvider(
+                resource=Resource.create({"service.name": service})
+            )
+            provider.add_span_processor(SlowTraceLogger(TRACING_SLOW_SECONDS))
+            if TRACING_EXPORTER == "file":
+                provider.add_span_processor(BatchSpanProcessor(_file_exporter(service)))
+            elif TRACING_EXPORTER == "console":
+                provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+            trace.set_tracer_provider(provider)
+            _provider = provider
+        return _provider
+
+
+def flush():
+    """
+    Export pending spans; call before a worker process exits.
+    """
+    if _provider is not None:
+        _provider.force_flush()
+
+
+def span(name: str, kind: SpanKind = SpanKind.INTERNAL, **attributes):
+    """
+    `with span("read_csv", path=path):` - a child of the current span.
+    """
+    return tracer.start_as_current_span(name, kind=kind, attributes=attributes)
+
+
+def current_carrier() -> dict:
+    """
+    The current trace context as W3C headers, to hand to another thread,
+    process or service.
+    """
+    carrier = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attached(carrier: Optional[dict]):
+    """
+    Make the trace context from `current_carrier()` current while inside.
+    """
+    token = context.attach(propagate.extract(carrier or {}))
+    try:
+        yield
+    finally:
+        context.detach(token)
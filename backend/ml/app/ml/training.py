@@ -0,0 +1,615 @@
+import multiprocessing
+import os
+import resource
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import joblib
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from . import (
+    backends,
+    dataset_loader,
+    evaluation,
+    incremental,
+    jobs,
+    log_config,
+    pipeline,
+    registry,
+    tracing,
+)
+from .evaluation import classification_metrics
+from .metrics_manager import save_metrics
+from .pipeline import TabularPreprocessor
+
+SUPERVISED_ALGORITHMS = (
+    "logisticregression",
+    "randomforestclassifier",
+    "tensorflow_classifier",
+)
+SUPPORTED_ALGORITHMS = SUPERVISED_ALGORITHMS + ("kmeans",)
+
+# Training processes running at once across every worker process of the
+# service; further training and search jobs wait queued in the job table
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "1"))
+# Limits applied to each training process; 0 disables a limit
+TRAINING_MAX_MEMORY_MB = int(os.getenv("TRAINING_MAX_MEMORY_MB", "0"))
+TRAINING_MAX_CPU_SECONDS = int(os.getenv("TRAINING_MAX_CPU_SECONDS", "0"))
+TRAINING_TIMEOUT_SECONDS = float(os.getenv("TRAINING_TIMEOUT_SECONDS", "0"))
+# Training runs at a lower priority so prediction requests keep their CPU share
+TRAINING_NICE = int(os.getenv("TRAINING_NICE", "10"))
+# A random forest is grown in this many rounds so progress can be reported
+PROGRESS_ROUNDS = 10
+# Cores used by tree ensembles (-1 = all); "n_jobs" in hyperparams overrides it
+TRAINING_N_JOBS = int(os.getenv("TRAINING_N_JOBS", "-1"))
+
+IN_MEMORY = "in_memory"
+# Stream the CSV in chunks through partial_fit-capable estimators
+CHUNKED = "chunked"
+CHUNKED_ALGORITHMS = ("logisticregression", "kmeans", "tensorflow_classifier")
+
+_executor = None
+_executor_lock = threading.Lock()
+# Searches train too and share the limit
+SLOTS = jobs.Slots(("train", "search"), TRAINING_WORKERS)
+
+
+class TrainingError(ValueError):
+    """
+    The dataset, label column or algorithm of a training request is invalid.
+    """
+
+
+def check_request(params: dict):
+    """
+    Cheap up-front validation of a training request, reading only the CSV
+    header. Raises FileNotFoundError or TrainingError.
+    """
+    if not os.path.exists(params["dataset_path"]):
+        raise FileNotFoundError(f"File not found: {params['dataset_path']}")
+    try:
+        head = pd.read_csv(params["dataset_path"], nrows=1)
+    except pd.errors.EmptyDataError:
+        head = pd.DataFrame()
+    if head.empty:
+        raise TrainingError("Dataset is empty")
+
+    algo = params["algorithm"].lower()
+    if algo not in SUPPORTED_ALGORITHMS:
+        raise TrainingError(f"Unsupported algorithm: {params['algorithm']}")
+    if algo in SUPERVISED_ALGORITHMS and params["label_column"] not in head.columns:
+        raise TrainingError(f"Label column '{params['label_column']}' not found in CSV")
+    method = params.get("evaluation") or evaluation.HOLDOUT
+    if method not in evaluation.EVALUATIONS:
+        raise TrainingError(f"Unsupported evaluation: {method}")
+    if params.get("model_name"):
+        try:
+            registry.check_model_id(params["model_name"])
+        except ValueError as e:
+            raise TrainingError(str(e))
+    mode = params.get("mode") or IN_MEMORY
+    if mode not in (IN_MEMORY, CHUNKED):
+        raise TrainingError(f"Unsupported training mode: {mode}")
+    if mode == CHUNKED and algo not in CHUNKED_ALGORITHMS:
+        raise TrainingError(
+            f"Chunked training supports {', '.join(CHUNKED_ALGORITHMS)}; "
+            f"use the in-memory mode for {params['algorithm']}"
+        )
+
+
+def _report(job_id: Optional[str], progress: float, message: str, **result):
+    if job_id is None:
+        return
+    jobs.set_progress(job_id, progress, **result)
+    jobs.append_log(job_id, f"{message}\n")
+
+
+def register_trained_model(
+    params: dict,
+    algo: str,
+    preprocessor: TabularPreprocessor,
+    metrics: dict,
+    train_seconds: float,
+    save_artifact,
+    extension: str,
+    dataset_hash: Optional[str] = None,
+) -> dict:
+    """
+    Save the artifact via `save_artifact(path)` and the fitted preprocessor
+    next to it, register them as the next version of the model id and record
+    its metrics. Returns the result body.
+    """
+    dataset_path = params["dataset_path"]
+    model_id = params.get("model_name") or registry.default_model_id(algo, dataset_path)
+    registry.check_model_id(model_id)
+    os.makedirs(registry.MODELS_DIR, exist_ok=True)
+    staged = os.path.join(
+        registry.MODELS_DIR, f".staging-{uuid.uuid4().hex}{extension}"
+    )
+    staged_preprocessor = registry.preprocessor_path_for(staged)
+    try:
+        with tracing.span("save_artifact", extension=extension):
+            save_artifact(staged)
+            joblib.dump(preprocessor, staged_preprocessor)
+        entry = registry.register_model(
+            model_id,
+            algo,
+            staged,
+            hyperparams=params.get("hyperparams") or {},
+            label_column=params.get("label_column") or None,
+            dataset_path=dataset_path,
+            dataset_hash=dataset_hash or registry.hash_file(dataset_path),
+            feature_schema=preprocessor.feature_schema,
+            train_seconds=train_seconds,
+            staged_preprocessor=staged_preprocessor,
+        )
+    finally:
+        for path in (staged, staged_preprocessor):
+            if os.path.exists(path):
+                os.remove(path)
+
+    version = f"v{entry['version']}"
+    save_metrics(model_id, version, metrics, dataset=os.path.basename(dataset_path))
+    return {
+        "status": "ok",
+        "model_id": model_id,
+        "version": version,
+        "model_file": entry["model_file"],
+        "metrics": metrics,
+    }
+
+
+def _fit_random_forest(job_id, model, X, y, n_estimators: int):
+    """
+    Grow the forest in rounds with warm_start, reporting trees completed.
+    Rounds hold at least one tree per core so each fit keeps every core busy.
+    """
+    cores = joblib.effective_n_jobs(model.n_jobs)
+    step = max(cores, -(-n_estimators // PROGRESS_ROUNDS))
+    model.set_params(warm_start=True)
+    for trees in range(step, n_estimators + step, step):
+        model.set_params(n_estimators=min(trees, n_estimators))
+        model.fit(X, y)
+        _report(
+            job_id,
+            0.1 + 0.8 * model.n_estimators / n_estimators,
+            f"Trees completed: {model.n_estimators}/{n_estimators}",
+            trees_completed=model.n_estimators,
+            trees_total=n_estimators,
+        )
+    model.set_params(warm_start=False)
+
+
+def _fit_tensorflow(job_id, n_features: int, epochs: int, *data, **fit_kwargs):
+    """
+    Fit the TF classifier on `data` (arrays X, y or a tf.data.Dataset).
+    """
+    keras = backends.KERAS.keras()
+
+    class EpochProgress(keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            values = ", ".join(f"{k}={v:.4f}" for k, v in (logs or {}).items())
+            _report(
+                job_id,
+                0.1 + 0.8 * (epoch + 1) / epochs,
+                f"Epoch {epoch + 1}/{epochs}: {values}",
+                epochs_completed=epoch + 1,
+                epochs_total=epochs,
+            )
+
+    # Build simple TF model
+    model = keras.Sequential()
+    model.add(keras.layers.Dense(16, activation="relu", input_shape=(n_features,)))
+    model.add(keras.layers.Dense(1, activation="sigmoid"))
+    model.compile(optimizer="adam", loss="binary_crossentropy", metrics=["accuracy"])
+    with tracing.span("fit", algorithm="tensorflow_classifier", epochs=epochs):
+        history = model.fit(
+            *data, epochs=epochs, verbose=0, callbacks=[EpochProgress()], **fit_kwargs
+        )
+    return model, history
+
+
+def peak_memory_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def train(params: dict, job_id: Optional[str] = None) -> dict:
+    """
+    Train scikit-learn or TF models on the CSV at params["dataset_path"] and
+    register the result. With a `job_id`, progress and log lines are recorded
+    on that job as training proceeds.
+
+    params["mode"] is "in_memory" (default) or "chunked", which streams the
+    CSV in chunks for datasets that do not fit in memory.
+    """
+    check_request(params)
+    started = time.perf_counter()
+    mode = params.get("mode") or IN_MEMORY
+    if mode == CHUNKED:
+        result = _train_chunked(params, job_id)
+    else:
+        result = _train_in_memory(params, job_id)
+
+    result["mode"] = mode
+    result["wall_seconds"] = time.perf_counter() - started
+    # Peak of this process; training runs in a fresh process per job
+    result["peak_memory_mb"] = peak_memory_mb()
+    _report(
+        job_id, 1.0, f"Registered {result['model_id']} {result['version']}", **result
+    )
+    return result
+
+
+def _train_in_memory(params: dict, job_id: Optional[str]) -> dict:
+    dataset_path = params["dataset_path"]
+    label_column = params.get("label_column")
+    hyperparams = params.get("hyperparams") or {}
+    algo = params["algorithm"].lower()
+
+    # KMeans trains on every column; supervised models on all but the label
+    label = None if algo == "kmeans" else label_column
+    dataset_hash = registry.hash_file(dataset_path)
+    # Text columns become category codes; a dataset trained on before is not
+    # parsed or encoded again
+    preprocessor, X, y, cached = pipeline.encode_dataset(
+        lambda: dataset_loader.load_dataset(dataset_path, dataset_hash),
+        dataset_hash,
+        label,
+    )
+    source = "encoded cache" if cached else dataset_path
+    _report(job_id, 0.05, f"Loaded {len(X)} rows from {source}")
+
+    method = params.get("evaluation") or evaluation.HOLDOUT
+    fraction = float(
+        params.get("validation_fraction") or evaluation.VALIDATION_FRACTION
+    )
+    dataset_size = {"n_rows": len(X), "n_features": X.shape[1]}
+
+    # ----- SUPERVISED (Classification) -----
+    if algo in ["logisticregression", "randomforestclassifier"]:
+        if algo == "logisticregression":
+            c_val = float(hyperparams.get("C", 1.0))
+            model = LogisticRegression(C=c_val, max_iter=1000)
+        else:  # randomforestclassifier
+            n_est = int(hyperparams.get("n_estimators", 100))
+            n_jobs = int(hyperparams.get("n_jobs", TRAINING_N_JOBS))
+            model = RandomForestClassifier(n_estimators=n_est, n_jobs=n_jobs)
+
+        # Scored on rows the evaluated copy did not see; the registered model
+        # is then fitted on every row
+        if method != evaluation.NO_EVALUATION:
+            with tracing.span("evaluate", method=method):
+                metrics = evaluation.evaluate_classifier(
+                    model,
+                    X,
+                    y,
+                    method,
+                    fraction,
+                    int(params.get("cv_folds") or evaluation.CV_FOLDS),
+                    n_jobs=TRAINING_N_JOBS,
+                )
+            _report(
+                job_id,
+                0.1,
+                f"Evaluated {algo} ({method}): accuracy={metrics['accuracy']:.4f}",
+            )
+
+        started = time.perf_counter()
+        with tracing.span("fit", algorithm=algo, rows=len(X)):
+            if algo == "logisticregression":
+                model.fit(X, y)
+            else:
+                _fit_random_forest(job_id, model, X, y, n_est)
+        train_seconds = time.perf_counter() - started
+        _report(job_id, 0.9, f"Fitted {algo} in {train_seconds:.2f}s")
+        if method == evaluation.NO_EVALUATION:
+            metrics = classification_metrics(y, model.predict(X))
+            metrics["evaluation"] = "training_data"
+
+        result = register_trained_model(
+            params,
+            algo,
+            preprocessor,
+            {**metrics, **dataset_size, "train_seconds": train_seconds},
+            train_seconds,
+            lambda path: backends.SKLEARN.save(model, path),
+            backends.SKLEARN.extension,
+            dataset_hash,
+        )
+        result["details"] = f"Trained {algo} on {dataset_path}"
+
+    # ----- UNSUPERVISED (KMeans) -----
+    elif algo == "kmeans":
+        n_clusters = int(hyperparams.get("n_clusters", 2))
+        km = KMeans(n_clusters=n_clusters)
+        started = time.perf_counter()
+        with tracing.span("fit", algorithm=algo, rows=len(X)):
+            km.fit(X)
+        train_seconds = time.perf_counter() - started
+        _report(job_id, 0.9, f"Fitted KMeans in {train_seconds:.2f}s")
+        with tracing.span("evaluate", method="silhouette"):
+            metrics = evaluation.clustering_metrics(km, X)
+
+        result = register_trained_model(
+            params,
+            algo,
+            preprocessor,
+            {
+                **metrics,
+                **dataset_size,
+                "n_clusters": n_clusters,
+                "train_seconds": train_seconds,
+            },
+            train_seconds,
+            lambda path: backends.SKLEARN.save(km, path),
+            backends.SKLEARN.extension,
+            dataset_hash,
+        )
+        details = f"Trained KMeans with {n_clusters} clusters on {dataset_path}"
+        result["details"] = details
+
+    # ----- DEEP LEARNING (TensorFlow) -----
+    else:
+        # Basic binary classifier
+        epochs = int(hyperparams.get("epochs", 5))
+        X = X.to_numpy()
+        started = time.perf_counter()
+        if method == evaluation.NO_EVALUATION:
+            model, history = _fit_tensorflow(
+                job_id, X.shape[1], epochs, X, y, batch_size=32
+            )
+            metrics = {
+                name: float(values[-1]) for name, values in history.history.items()
+            }
+        else:
+            # Refitting a network is costly, so the registered model is the
+            # one trained on the training split (k-fold falls back to this)
+            train_rows, val_rows = evaluation.split_rows(len(y), y, fraction)
+            model, history = _fit_tensorflow(
+                job_id,
+                X.shape[1],
+                epochs,
+                X[train_rows],
+                y[train_rows],
+                batch_size=32,
+                validation_data=(X[val_rows], y[val_rows]),
+            )
+            proba = model.predict(X[val_rows], verbose=0).reshape(-1)
+            metrics = evaluation.classification_metrics(
+                y[val_rows], (proba >= 0.5).astype(int)
+            )
+            metrics.update(
+                mse=evaluation.probability_mse(y[val_rows], proba, [0, 1]),
+                evaluation=evaluation.HOLDOUT,
+                validation_rows=len(val_rows),
+            )
+        train_seconds = time.perf_counter() - started
+
+        result = register_trained_model(
+            params,
+            algo,
+            preprocessor,
+            {**metrics, **dataset_size, "train_seconds": train_seconds},
+            train_seconds,
+            lambda path: backends.KERAS.save(model, path),
+            backends.KERAS.extension,
+            dataset_hash,
+        )
+        result["details"] = f"Trained TF classifier for {dataset_path}"
+
+    return result
+
+
+def _train_chunked(params: dict, job_id: Optional[str]) -> dict:
+    dataset_path = params["dataset_path"]
+    label_column = params.get("label_column")
+    hyperparams = params.get("hyperparams") or {}
+    algo = params["algorithm"].lower()
+    chunk_rows = int(params.get("chunk_rows") or incremental.TRAINING_CHUNK_ROWS)
+
+    scan = incremental.scan_csv(dataset_path, chunk_rows)
+    _report(
+        job_id,
+        0.05,
+        f"Scanned {scan.total_rows} rows from {dataset_path} "
+        f"in chunks of {chunk_rows}",
+    )
+    preprocessor = scan.preprocessor(None if algo == "kmeans" else label_column)
+
+    def progress(fraction: float):
+        if job_id is not None:
+            jobs.set_progress(job_id, 0.05 + 0.85 * fraction)
+
+    started = time.perf_counter()
+    if algo == "logisticregression":
+        with tracing.span("fit", algorithm=algo, rows=scan.total_rows):
+            model, metrics = incremental.fit_sgd_classifier(
+                dataset_path,
+                scan,
+                preprocessor,
+                chunk_rows,
+                C=float(hyperparams.get("C", 1.0)),
+                epochs=int(hyperparams.get("epochs", 5)),
+                progress=progress,
+            )
+        details = f"Trained {algo} (SGD) on {dataset_path} in chunks"
+    elif algo == "kmeans":
+        n_clusters = int(hyperparams.get("n_clusters", 2))
+        with tracing.span("fit", algorithm=algo, rows=scan.total_rows):
+            model, metrics = incremental.fit_minibatch_kmeans(
+                dataset_path, scan, preprocessor, chunk_rows, n_clusters, progress
+            )
+        details = (
+            f"Trained MiniBatchKMeans with {n_clusters} clusters on {dataset_path}"
+        )
+    else:
+        dataset = incremental.tf_dataset(
+            dataset_path, scan, preprocessor, chunk_rows, 32
+        )
+        model, history = _fit_tensorflow(
+            job_id,
+            len(preprocessor.columns),
+            int(hyperparams.get("epochs", 5)),
+            dataset,
+        )
+        metrics = {name: float(values[-1]) for name, values in history.history.items()}
+        details = f"Trained TF classifier for {dataset_path} with tf.data streaming"
+    train_seconds = time.perf_counter() - started
+    _report(job_id, 0.9, f"Fitted {algo} in {train_seconds:.2f}s")
+    # Scored during the passes over the data, not on held-out rows
+    if algo != "kmeans":
+        metrics["evaluation"] = "training_data"
+    metrics.update(
+        n_rows=scan.total_rows,
+        n_features=len(preprocessor.columns),
+        train_seconds=train_seconds,
+    )
+
+    backend = backends.for_algorithm(algo)
+    result = register_trained_model(
+        params,
+        algo,
+        preprocessor,
+        metrics,
+        train_seconds,
+        lambda path: backend.save(model, path),
+        backend.extension,
+    )
+    result["details"] = details
+    return result
+
+
+def _limit_resources(nice: int, max_memory_mb: int, max_cpu_seconds: int):
+    if nice:
+        os.nice(nice)
+    if max_memory_mb:
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if max_cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (max_cpu_seconds, max_cpu_seconds))
+
+
+def _train_in_child(
+    target, params: dict, job_id: Optional[str], limits: tuple, conn, carrier=None
+):
+    log_config.configure_logging()
+    tracing.setup_tracing()
+    try:
+        _limit_resources(*limits)
+        # Continues the trace of the request that queued the job
+        with tracing.attached(carrier), tracing.span(
+            "training_process", target=target.__name__, job_id=job_id or ""
+        ):
+            result = target(params, job_id)
+        conn.send(("ok", result))
+    except TrainingError as e:
+        conn.send(("invalid", str(e)))
+    except MemoryError:
+        conn.send(("error", "Training ran out of memory"))
+    except Exception as e:
+        conn.send(("error", str(e) or e.__class__.__name__))
+    finally:
+        tracing.flush()
+        log_config.stop_logging()
+        conn.close()
+
+
+def run_training(job_id: Optional[str], request: dict, target=None) -> dict:
+    """
+    Train in a fresh child process, so its memory is returned when it exits
+    and the resource limits only apply to it. Blocks until it finishes.
+
+    `target(request, job_id)` runs in the child (default: `train`); it must
+    be a module-level function so the child can import it.
+    """
+    # spawn, not fork: the parent runs threads (job runner, batchers)
+    ctx = multiprocessing.get_context("spawn")
+    reader, writer = ctx.Pipe(duplex=False)
+    limits = (TRAINING_NICE, TRAINING_MAX_MEMORY_MB, TRAINING_MAX_CPU_SECONDS)
+    # Not a daemon: joblib only runs tree ensembles on all cores in a
+    # non-daemonic process. It is always joined below.
+    process = ctx.Process(
+        target=_train_in_child,
+        args=(
+            target or train,
+            request,
+            job_id,
+            limits,
+            writer,
+            tracing.current_carrier(),
+        ),
+    )
+    process.start()
+    writer.close()
+    try:
+        if not reader.poll(TRAINING_TIMEOUT_SECONDS or None):
+            process.kill()
+            raise TimeoutError(
+                f"Training exceeded the {TRAINING_TIMEOUT_SECONDS:g}s time limit"
+            )
+        status, payload = reader.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(
+            f"Training process exited unexpectedly (exit code {process.exitcode}); "
+            "it may have exceeded its memory or CPU limit"
+        )
+    finally:
+        reader.close()
+        process.join()
+
+    if status == "invalid":
+        raise TrainingError(payload)
+    if status == "error":
+        raise RuntimeError(payload)
+    return payload
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Threads that each wait on one training process, or for a slot to start
+    one (see SLOTS).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=TRAINING_WORKERS, thread_name_prefix="training"
+            )
+        return _executor
+
+
+def submit_training(params: dict) -> dict:
+    """
+    Queue a training job. Poll it with jobs.get_job; its result is the
+    registered model (id, version, file, metrics).
+    """
+    return jobs.submit(
+        "train",
+        params,
+        run_training,
+        executor=get_executor(),
+        slots=SLOTS,
+        request=params,
+    )
+
+
+def train_and_wait(params: dict) -> dict:
+    """
+    Train through the same queue and process limits, waiting for the result.
+    """
+    return jobs.submit_and_wait(
+        "train",
+        params,
+        run_training,
+        executor=get_executor(),
+        slots=SLOTS,
+        request=params,
+    )
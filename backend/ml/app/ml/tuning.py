@@ -0,0 +1,372 @@
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import silhouette_score
+
+from . import backends, dataset_loader, evaluation, jobs, pipeline, registry, training
+
+GRID = "grid"
+RANDOM = "random"
+# Successive halving: every candidate starts on a small sample of the
+# training rows; only the best 1/factor move on to a larger sample
+HALVING = "halving"
+STRATEGIES = (GRID, RANDOM, HALVING)
+
+# Estimator class and the defaults training uses for it
+SEARCHABLE = {
+    "logisticregression": (LogisticRegression, {"max_iter": 1000}),
+    "randomforestclassifier": (RandomForestClassifier, {}),
+    "kmeans": (KMeans, {}),
+}
+# Trial processes per search; 0 = one per core
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "0"))
+# Upper bound on the number of candidates, whatever the grid size
+MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "200"))
+# Smallest sample a halving rung trains on
+MIN_HALVING_ROWS = 30
+
+# Shared arrays attached by each trial process
+_shared: Dict[str, np.ndarray] = {}
+_segments: List[shared_memory.SharedMemory] = []
+
+
+def _score_name(algo: str) -> str:
+    return "silhouette" if algo == "kmeans" else "accuracy"
+
+
+def build_estimator(algo: str, hyperparams: dict, **overrides):
+    cls, defaults = SEARCHABLE[algo]
+    return cls(**{**defaults, **hyperparams, **overrides})
+
+
+def check_search_request(params: dict):
+    """
+    Validate a search request up front. Raises FileNotFoundError or
+    training.TrainingError.
+    """
+    training.check_request(params)
+    algo = params["algorithm"].lower()
+    if algo not in SEARCHABLE:
+        raise training.TrainingError(
+            f"Hyperparameter search supports {', '.join(SEARCHABLE)}"
+        )
+    strategy = params.get("strategy") or GRID
+    if strategy not in STRATEGIES:
+        raise training.TrainingError(f"Unsupported search strategy: {strategy}")
+
+    space = params.get("param_grid") or {}
+    if not space:
+        raise training.TrainingError("param_grid must name at least one parameter")
+    valid = SEARCHABLE[algo][0]().get_params()
+    unknown = sorted(set(space) - set(valid))
+    if unknown:
+        raise training.TrainingError(
+            f"Unknown hyperparameters for {params['algorithm']}: {unknown}"
+        )
+    for name, values in space.items():
+        if isinstance(values, dict):
+            if strategy == GRID:
+                raise training.TrainingError(
+                    f"Grid search needs a list of values for '{name}'"
+                )
+            if not {"low", "high"} <= set(values) or values["low"] > values["high"]:
+                raise training.TrainingError(
+                    f"Range for '{name}' needs 'low' <= 'high'"
+                )
+        elif not isinstance(values, list) or not values:
+            raise training.TrainingError(
+                f"'{name}' needs a non-empty list of values or a low/high range"
+            )
+
+
+def _sample(spec, rng: random.Random):
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    low, high = spec["low"], spec["high"]
+    if spec.get("log"):
+        value = math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        value = rng.uniform(low, high)
+    if isinstance(low, int) and isinstance(high, int):
+        return int(round(value))
+    return value
+
+
+def candidates(params: dict) -> List[dict]:
+    """
+    The hyperparameter sets to try: the full grid, or `n_trials` random
+    draws (random search, or halving with n_trials set).
+    """
+    space = params["param_grid"]
+    n_trials = params.get("n_trials")
+    strategy = params.get("strategy") or GRID
+    names = sorted(space)
+    ranges = any(isinstance(space[name], dict) for name in names)
+    if strategy == GRID or (strategy == HALVING and not n_trials and not ranges):
+        grid = itertools.product(*(space[name] for name in names))
+        return [dict(zip(names, values)) for values in grid][:MAX_CANDIDATES]
+
+    rng = random.Random(params.get("random_state", 0))
+    found, seen = [], set()
+    wanted = min(n_trials or 10, MAX_CANDIDATES)
+    # Draw until enough distinct sets or the space looks exhausted
+    for _ in range(wanted * 20):
+        candidate = {name: _sample(space[name], rng) for name in names}
+        key = tuple(candidate[name] for name in names)
+        if key not in seen:
+            seen.add(key)
+            found.append(candidate)
+            if len(found) == wanted:
+                break
+    return found
+
+
+def _share(arrays: Dict[str, np.ndarray]) -> dict:
+    """
+    Copy arrays into shared memory. Returns {name: (segment, shape, dtype)}
+    for the trial processes to attach to.
+    """
+    specs = {}
+    for name, array in arrays.items():
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        _segments.append(segment)
+        np.ndarray(array.shape, array.dtype, buffer=segment.buf)[...] = array
+        specs[name] = (segment.name, array.shape, array.dtype.str)
+    return specs
+
+
+def _release_shared():
+    while _segments:
+        segment = _segments.pop()
+        segment.close()
+        segment.unlink()
+
+
+def _attach(specs: dict):
+    for name, (segment_name, shape, dtype) in specs.items():
+        # Spawned processes share the search process's resource tracker, so
+        # the segment is unlinked once, by the search process
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _segments.append(segment)
+        _shared[name] = np.ndarray(shape, np.dtype(dtype), buffer=segment.buf)
+
+
+def run_trial(algo: str, hyperparams: dict, n_rows: int) -> dict:
+    """
+    Fit one candidate on the first `n_rows` training rows and score it on
+    the validation rows. Runs in a trial process with the data attached.
+    """
+    rows = _shared["train_rows"][:n_rows]
+    X_train, X_val = _shared["X"][rows], _shared["X"][_shared["val_rows"]]
+    trial = {"params": hyperparams, "n_rows": int(n_rows)}
+    started = time.perf_counter()
+    try:
+        # Trials already run one per core
+        extra = {"n_jobs": 1} if algo == "randomforestclassifier" else {}
+        model = build_estimator(algo, hyperparams, **extra)
+        if algo == "kmeans":
+            model.fit(X_train)
+            sample = min(len(X_val), evaluation.SILHOUETTE_SAMPLE_ROWS)
+            metrics = {
+                "silhouette": float(
+                    silhouette_score(
+                        X_val, model.predict(X_val), sample_size=sample, random_state=0
+                    )
+                ),
+                "inertia": float(model.inertia_),
+            }
+        else:
+            model.fit(X_train, _shared["y"][rows])
+            y_val = _shared["y"][_shared["val_rows"]]
+            metrics = evaluation.classification_metrics(y_val, model.predict(X_val))
+    except Exception as e:
+        trial.update(error=str(e) or e.__class__.__name__, score=None)
+    else:
+        trial.update(metrics=metrics, score=metrics[_score_name(algo)])
+    trial["fit_seconds"] = time.perf_counter() - started
+    return trial
+
+
+def _rungs(n_candidates: int, n_train: int, factor: int) -> List[int]:
+    """
+    Training rows per halving rung; the last rung uses every training row.
+    """
+    count = 1
+    while n_candidates > 1:
+        n_candidates = math.ceil(n_candidates / factor)
+        count += 1
+    sizes = [n_train // factor ** (count - 1 - rung) for rung in range(count)]
+    return [min(n_train, max(size, MIN_HALVING_ROWS)) for size in sizes]
+
+
+def search(params: dict, job_id: Optional[str] = None) -> dict:
+    """
+    Run a hyperparameter search: encode the dataset once, share it with a
+    pool of trial processes, score every candidate on a validation split,
+    then refit the best one on the whole dataset and register it with the
+    metrics of every trial.
+    """
+    check_search_request(params)
+    started = time.perf_counter()
+    dataset_path = params["dataset_path"]
+    algo = params["algorithm"].lower()
+    strategy = params.get("strategy") or GRID
+    factor = int(params.get("factor") or 3)
+    label = None if algo == "kmeans" else params.get("label_column")
+
+    dataset_hash = registry.hash_file(dataset_path)
+    preprocessor, X, y, cached = pipeline.encode_dataset(
+        lambda: dataset_loader.load_dataset(dataset_path, dataset_hash),
+        dataset_hash,
+        label,
+    )
+    X = np.ascontiguousarray(X.to_numpy())
+    source = "encoded cache" if cached else dataset_path
+    training._report(job_id, 0.05, f"Loaded {len(X)} rows from {source}")
+
+    train_rows, val_rows = evaluation.split_rows(
+        len(X),
+        y,
+        float(params.get("validation_fraction") or evaluation.VALIDATION_FRACTION),
+        params.get("random_state", 0),
+    )
+    pending = candidates(params)
+    if strategy == HALVING:
+        rungs = _rungs(len(pending), len(train_rows), factor)
+    else:
+        rungs = [len(train_rows)]
+    total = sum(
+        max(1, math.ceil(len(pending) / factor**rung)) for rung in range(len(rungs))
+    )
+    workers = min(SEARCH_WORKERS or os.cpu_count() or 1, len(pending))
+    training._report(
+        job_id,
+        0.1,
+        f"Searching {len(pending)} candidates ({strategy}) " f"in {workers} processes",
+    )
+
+    score_name = _score_name(algo)
+    trials = []
+    arrays = {"X": X, "train_rows": train_rows, "val_rows": val_rows}
+    if y is not None:
+        arrays["y"] = np.asarray(y)
+    try:
+        specs = _share(arrays)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach,
+            initargs=(specs,),
+        ) as pool:
+            for rung, n_rows in enumerate(rungs):
+                futures = [
+                    pool.submit(run_trial, algo, hyper, n_rows) for hyper in pending
+                ]
+                results = []
+                for future in as_completed(futures):
+                    trial = future.result()
+                    trial["rung"] = rung
+                    results.append(trial)
+                    trials.append(trial)
+                    outcome = (
+                        f"{score_name}={trial['score']:.4f}"
+                        if trial["score"] is not None
+                        else f"failed: {trial['error']}"
+                    )
+                    training._report(
+                        job_id,
+                        0.1 + 0.75 * min(len(trials) / total, 1.0),
+                        f"Trial {len(trials)} {trial['params']} on "
+                        f"{trial['n_rows']} rows: {outcome} "
+                        f"({trial['fit_seconds']:.2f}s)",
+                        trials_completed=len(trials),
+                    )
+                results.sort(
+                    key=lambda t: -math.inf if t["score"] is None else t["score"],
+                    reverse=True,
+                )
+                if rung < len(rungs) - 1:
+                    # Early stopping: only the best 1/factor get more rows
+                    keep = max(1, math.ceil(len(results) / factor))
+                    pending = [t["params"] for t in results[:keep]]
+    finally:
+        _release_shared()
+
+    final = [t for t in trials if t["rung"] == len(rungs) - 1]
+    scored = [t for t in final if t["score"] is not None]
+    if not scored:
+        errors = sorted({t["error"] for t in final})
+        raise training.TrainingError(f"Every trial failed: {'; '.join(errors)}")
+    best = max(scored, key=lambda t: t["score"])
+    training._report(job_id, 0.85, f"Best {best['params']}: {best['score']:.4f}")
+
+    # The winner is refitted on every row, as /ml/train2 would train it
+    extra = (
+        {"n_jobs": training.TRAINING_N_JOBS} if algo == "randomforestclassifier" else {}
+    )
+    model = build_estimator(algo, best["params"], **extra)
+    fit_started = time.perf_counter()
+    if y is None:
+        model.fit(X)
+    else:
+        model.fit(X, y)
+    train_seconds = time.perf_counter() - fit_started
+
+    metrics = {
+        **best["metrics"],
+        "best_params": best["params"],
+        "strategy": strategy,
+        "trials": trials,
+    }
+    backend = backends.for_algorithm(algo)
+    result = training.register_trained_model(
+        {**params, "hyperparams": best["params"]},
+        algo,
+        preprocessor,
+        metrics,
+        train_seconds,
+        lambda path: backend.save(model, path),
+        backend.extension,
+        dataset_hash,
+    )
+    result.update(
+        details=f"Searched {len(trials)} trials of {algo} on {dataset_path}",
+        best_params=best["params"],
+        best_score=best["score"],
+        score=score_name,
+        strategy=strategy,
+        workers=workers,
+        wall_seconds=time.perf_counter() - started,
+        peak_memory_mb=training.peak_memory_mb(),
+    )
+    training._report(
+        job_id, 1.0, f"Registered {result['model_id']} {result['version']}", **result
+    )
+    return result
+
+
+def submit_search(params: dict) -> dict:
+    """
+    Queue a search job on the training queue; it runs in one limited
+    process, which starts the trial processes.
+    """
+    return jobs.submit(
+        "search",
+        params,
+        training.run_training,
+        executor=training.get_executor(),
+        slots=training.SLOTS,
+        request=params,
+        target=search,
+    )
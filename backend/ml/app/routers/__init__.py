@@ -1,7 +1,13 @@
+from .jobs import router as jobs_router
+from .metrics import router as metrics_router
+from .models import router as models_router
 from .predict2 import router as predict2_router
 from .train2 import router as train2_router
 
 __all__ = [
     "train2_router",
     "predict2_router",
+    "metrics_router",
+    "models_router",
+    "jobs_router",
 ]
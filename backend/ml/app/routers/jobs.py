@@ -0,0 +1,60 @@
+import os
+from typing import Optional
+
+from app.ml import batch_predict, jobs, registry
+from app.schemas_ml import BatchPredictionJobRequest
+from fastapi import APIRouter, HTTPException, Query
+
+router = APIRouter(prefix="/ml", tags=["jobs"])
+
+
+@router.post("/jobs/batch-predict", status_code=202)
+def create_batch_prediction_job(req: BatchPredictionJobRequest):
+    """
+    Start a batch prediction job over a CSV file. Poll GET /ml/jobs/{job_id}
+    for progress; the result holds the path of the output CSV, which is
+    always written under the uploads directory.
+    """
+    if not os.path.isfile(req.dataset_path):
+        raise HTTPException(404, detail=f"File not found: {req.dataset_path}")
+    try:
+        model_path = registry.resolve_artifact(req.model_name, req.version)
+    except ValueError:
+        raise HTTPException(400, detail=f"Invalid model version: {req.version}")
+    if not model_path:
+        raise HTTPException(404, detail=f"Model file not found for: {req.model_name}")
+
+    params = {
+        "dataset_path": req.dataset_path,
+        "model_name": req.model_name,
+        "version": req.version,
+        "metadata": req.metadata,
+    }
+    return jobs.submit(
+        "batch_predict",
+        params,
+        batch_predict.run_batch_prediction,
+        dataset_path=req.dataset_path,
+        model_name=req.model_name,
+        version=req.version,
+    )
+
+
+@router.get("/jobs")
+def list_jobs(
+    kind: Optional[str] = None,
+    status: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+):
+    return jobs.list_jobs(
+        kind=kind, status=status, skip=(page - 1) * page_size, limit=page_size
+    )
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
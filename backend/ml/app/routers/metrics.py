@@ -1,14 +1,59 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from app.ml import registry
+from app.ml.metrics_manager import get_metrics as load_metrics
+from app.ml.metrics_manager import list_metrics as query_metrics
+from fastapi import APIRouter, HTTPException, Query
 
 router = APIRouter(prefix="/ml", tags=["metrics"])
 
-# In-memory store for example
-metrics_store = {}
+
+def stored_version(model_name: Optional[str], version: str) -> Optional[str]:
+    """
+    The "vN" form metrics are stored under, for a version given as 2, "2",
+    "v2" or "latest" (the newest registered version of `model_name`). None
+    when there is no such model.
+    """
+    try:
+        number = registry.parse_version(version)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid version: {version}")
+    if number is None:
+        entry = registry.get_model(model_name) if model_name else None
+        if entry is None:
+            return None
+        number = entry["version"]
+    return f"v{number}"
+
+
+@router.get("/metrics")
+def list_metrics(
+    model_name: Optional[str] = None,
+    version: Optional[str] = None,
+    dataset: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+):
+    """
+    Query the persisted metrics by model, version and/or dataset (newest first).
+    """
+    if version is not None:
+        version = stored_version(model_name, version)
+        if version is None:
+            return []
+    return query_metrics(
+        model_name=model_name,
+        version=version,
+        dataset=dataset,
+        skip=(page - 1) * page_size,
+        limit=page_size,
+    )
 
 
 @router.get("/metrics/{model_name}/{version}")
-def get_metrics(model_name: str, version: str):
-    # If no metrics found, raise 404 or return empty
-    if (model_name, version) not in metrics_store:
+def get_metrics(model_name: str, version: str, dataset: Optional[str] = None):
+    version = stored_version(model_name, version)
+    metrics = load_metrics(model_name, version, dataset) if version else None
+    if metrics is None:
         raise HTTPException(status_code=404, detail="No metrics found.")
-    return metrics_store[(model_name, version)]
+    return metrics
@@ -0,0 +1,79 @@
+import os
+from typing import Optional
+
+from app.ml import batching, model_cache, registry
+from app.schemas_ml import WarmupRequest
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+
+router = APIRouter(prefix="/ml", tags=["models"])
+
+
+@router.get("/models")
+def list_models(
+    model_id: Optional[str] = None,
+    algorithm: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+):
+    """
+    Registered model versions, newest first.
+    """
+    return registry.list_models(
+        model_id=model_id,
+        algorithm=algorithm,
+        skip=(page - 1) * page_size,
+        limit=page_size,
+    )
+
+
+@router.post("/models/warmup")
+def warm_up_models(req: WarmupRequest):
+    """
+    Preload models into this worker's model cache.
+    """
+    return model_cache.warm_up((ref.model_name, ref.version) for ref in req.models)
+
+
+@router.get("/models/cache")
+def model_cache_stats():
+    """
+    Hit/miss/eviction counters and memory use of this worker's model cache.
+    """
+    return model_cache.stats()
+
+
+@router.get("/models/batching")
+def batching_stats():
+    """
+    Per-model micro-batching counters of this worker.
+    """
+    return batching.stats()
+
+
+@router.get("/models/{model_id}/{version}")
+def get_model(model_id: str, version: str):
+    """
+    Registry entry of one model version; `version` may be "latest".
+    """
+    try:
+        entry = registry.get_model(model_id, version)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid version: {version}")
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Model not found.")
+    return entry
+
+
+@router.get("/models/{model_id}/{version}/artifact")
+def download_model_artifact(model_id: str, version: str):
+    """
+    The trained model file of one model version.
+    """
+    try:
+        entry = registry.get_model(model_id, version)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid version: {version}")
+    if entry is None or not os.path.isfile(entry["artifact_path"]):
+        raise HTTPException(status_code=404, detail="Model not found.")
+    return FileResponse(entry["artifact_path"], filename=entry["model_file"])
@@ -1,44 +1,89 @@
-import os
+from typing import Dict, Optional
 
-import joblib
-import pandas as pd
+from app.ml import backends, batching, features, model_cache, pipeline, registry
 from app.schemas_ml import PredictionRequest, PredictionResponse
-from fastapi import APIRouter, HTTPException
-from tensorflow import keras
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/ml", tags=["predict2"])
 
 
+def run_prediction(
+    model_name: str, version: Optional[str], columns: Dict
+) -> PredictionResponse:
+    """
+    Resolve the model, encode `columns` (name -> values) with the model's
+    fitted preprocessor (or validate them against its feature schema for
+    older models) and predict.
+    """
+    try:
+        found_path, entry = registry.resolve_model(model_name, version)
+    except ValueError:
+        raise HTTPException(400, f"Invalid model version: {version}")
+    if not found_path:
+        raise HTTPException(404, f"Model file not found for: {model_name}")
+    if not backends.is_model_file(found_path):
+        raise HTTPException(400, f"Unknown model file extension in {found_path}")
+
+    model = model_cache.get_model(found_path)
+    schema = entry["feature_schema"] if entry else None
+    try:
+        X, names, preprocessor = pipeline.encode_inputs(
+            found_path, model, schema, columns
+        )
+    except features.FeatureValidationError as e:
+        raise HTTPException(422, str(e))
+
+    predict_fn = backends.for_path(found_path).predict_fn(model, names)
+    if batching.PREDICT_BATCHING and len(X) < batching.PREDICT_BATCH_MAX_ROWS:
+        batcher = batching.get_batcher((found_path, tuple(names)), model, predict_fn)
+        preds, probabilities = batcher.predict(X)
+    else:
+        preds, probabilities = predict_fn(X)
+    if preprocessor is not None:
+        preds = preprocessor.decode_label(preds)
+    return PredictionResponse(
+        predictions=preds.tolist(), probabilities=probabilities.tolist()
+    )
+
+
 @router.post("/predict2", response_model=PredictionResponse)
 def predict2(req: PredictionRequest):
     """
     Predict with a model stored in saved_models.
-    Model can be scikit-learn (joblib) or TF (h5).
+    Model can be scikit-learn (joblib) or TF (h5), looked up in the model
+    registry by id and version, or by its file name. Loaded models are kept
+    in the process-wide model cache, and concurrent small requests for the
+    same model are micro-batched into one predict call.
+
+    Input is validated against the feature schema recorded at training time
+    and may be sent as row records (`data`) or columns (`columns`).
 
     Final route => /ml/predict2
     """
-    base_path = os.path.join("saved_models", req.model_name)
-    possible_paths = [base_path, base_path + ".joblib", base_path + ".h5"]
-    found_path = next((p for p in possible_paths if os.path.exists(p)), None)
-    if not found_path:
-        raise HTTPException(404, f"Model file not found for: {req.model_name}")
-    df = pd.DataFrame([row.dict() for row in req.data])
-    if found_path.endswith(".joblib"):
-        model = joblib.load(found_path)
-        if hasattr(model, "predict_proba"):
-            probs = model.predict_proba(df)
-            probabilities = (
-                probs[:, 1].tolist() if probs.shape[1] > 1 else probs.flatten().tolist()
-            )
-            preds = model.predict(df).tolist()
-        else:
-            preds = model.predict(df).tolist()
-            probabilities = [0.0] * len(preds)
-        return PredictionResponse(predictions=preds, probabilities=probabilities)
-    elif found_path.endswith(".h5"):
-        tf_model = keras.models.load_model(found_path)
-        raw_preds = tf_model.predict(df.values).flatten()
-        preds = (raw_preds >= 0.5).astype(int).tolist()
-        return PredictionResponse(predictions=preds, probabilities=raw_preds.tolist())
+    if req.columns is not None:
+        columns = req.columns
     else:
-        raise HTTPException(400, f"Unknown model file extension in {found_path}")
+        columns = features.records_to_columns(req.data)
+    return run_prediction(req.model_name, req.version, columns)
+
+
+@router.post("/predict2/table", response_model=PredictionResponse)
+async def predict2_table(
+    request: Request, model_name: str, version: Optional[str] = None
+):
+    """
+    Same as /ml/predict2, with the input rows sent as an Arrow IPC stream/file
+    or Parquet body (Content-Type application/vnd.apache.arrow.stream,
+    application/vnd.apache.arrow.file or application/vnd.apache.parquet).
+    """
+    content_type = features.media_type(request.headers.get("content-type", ""))
+    if features.pa is None or content_type not in features.TABLE_CONTENT_TYPES:
+        raise HTTPException(415, f"Unsupported content type: {content_type}")
+
+    body = await request.body()
+    try:
+        columns = await run_in_threadpool(features.table_to_columns, body, content_type)
+    except Exception as e:
+        raise HTTPException(400, f"Could not decode {content_type} body: {e}")
+    return await run_in_threadpool(run_prediction, model_name, version, columns)
@@ -1,14 +1,8 @@
-import os
+from typing import Any, Dict, Optional
 
-import joblib
-import pandas as pd
+from app.ml import jobs, registry, training, tuning
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from sklearn.cluster import KMeans
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import LabelEncoder
-from tensorflow import keras
+from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/ml", tags=["ml_ops"])
 
@@ -18,116 +12,86 @@ class Train2Request(BaseModel):
     label_column: str
     algorithm: str
     hyperparams: dict = {}
-
-
-def encode_text_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Convert all object/string columns in df to numeric via LabelEncoder.
-    For large or purely free-text columns, consider a more robust approach.
-    """
-    text_cols = df.select_dtypes(include=["object", "string"]).columns
-    for col in text_cols:
-        le = LabelEncoder()
-        # Convert column to string just in case it has mixed types
-        df[col] = le.fit_transform(df[col].astype(str))
-    return df
+    # Registry id; defaults to "<algorithm>_<dataset file name>"
+    model_name: Optional[str] = Field(None, pattern=registry.MODEL_ID_PATTERN)
+    # "in_memory", or "chunked" for datasets that do not fit in memory
+    mode: str = "in_memory"
+    # Rows per chunk in chunked mode
+    chunk_rows: Optional[int] = Field(None, ge=1)
+    # "holdout", "kfold" or "none" (metrics on the training data)
+    evaluation: str = "holdout"
+    validation_fraction: float = Field(0.2, gt=0, lt=1)
+    cv_folds: int = Field(5, ge=2, le=20)
+    # Opaque to backend-ml; stored with the job (e.g. the requesting user)
+    metadata: dict = {}
+
+
+class SearchRequest(BaseModel):
+    dataset_path: str
+    label_column: str
+    algorithm: str
+    # "grid", "random" or "halving" (successive halving)
+    strategy: str = "grid"
+    # Parameter -> list of values, or {"low", "high", "log"} for random draws
+    param_grid: Dict[str, Any]
+    # Candidates drawn by random search (and halving over ranges)
+    n_trials: Optional[int] = Field(None, ge=1)
+    # Halving keeps the best 1/factor of the candidates per round
+    factor: int = Field(3, ge=2)
+    validation_fraction: float = Field(0.2, gt=0, lt=1)
+    random_state: int = 0
+    model_name: Optional[str] = Field(None, pattern=registry.MODEL_ID_PATTERN)
+    metadata: dict = {}
+
+
+def checked_params(request: BaseModel, check=training.check_request) -> dict:
+    params = request.model_dump()
+    try:
+        check(params)
+    except FileNotFoundError as e:
+        raise HTTPException(404, detail=str(e))
+    except training.TrainingError as e:
+        raise HTTPException(400, detail=str(e))
+    return params
 
 
 @router.post("/train2")
 def train_model_any(request: Train2Request):
     """
-    Train scikit-learn or TF models.
+    Train scikit-learn or TF models and wait for the result.
 
     Expects a direct path to the CSV file (dataset_path).
     We do NOT call 'app.database' or any DB session.
+    Training runs in a separate, resource-limited process; POST /ml/train2/jobs
+    does the same without holding the request open.
     """
-    # 1) Ensure the CSV file exists
-    if not os.path.exists(request.dataset_path):
-        raise HTTPException(404, detail=f"File not found: {request.dataset_path}")
-
-    df = pd.read_csv(request.dataset_path)
-    if df.empty:
-        raise HTTPException(400, detail="Dataset is empty")
-
-    algo = request.algorithm.lower()
-
-    # Encode all object/string columns to numeric so scikit-learn won't crash.
-    df = encode_text_columns(df)
-
-    # ----- SUPERVISED (Classification) -----
-    if algo in ["logisticregression", "randomforestclassifier"]:
-        # Expect a label column
-        if request.label_column not in df.columns:
-            raise HTTPException(
-                400, detail=f"Label column '{request.label_column}' not found in CSV"
-            )
-
-        X = df.drop(columns=[request.label_column])
-        y = df[request.label_column]
-
-        if algo == "logisticregression":
-            c_val = float(request.hyperparams.get("C", 1.0))
-            model = LogisticRegression(C=c_val, max_iter=1000)
-        else:  # randomforestclassifier
-            n_est = int(request.hyperparams.get("n_estimators", 100))
-            model = RandomForestClassifier(n_estimators=n_est)
-
-        model.fit(X, y)
-        model_filename = f"{algo}_{os.path.basename(request.dataset_path)}.joblib"
-        os.makedirs("saved_models", exist_ok=True)
-        joblib.dump(model, os.path.join("saved_models", model_filename))
-
-        return {
-            "status": "ok",
-            "model_file": model_filename,
-            "details": f"Trained {algo} on {request.dataset_path}",
-        }
-
-    # ----- UNSUPERVISED (KMeans) -----
-    elif algo == "kmeans":
-        n_clusters = int(request.hyperparams.get("n_clusters", 2))
-        km = KMeans(n_clusters=n_clusters)
-        km.fit(df)  # KMeans will also fail if it sees strings, so label-encoding helps
-        model_filename = f"kmeans_{os.path.basename(request.dataset_path)}.joblib"
-        os.makedirs("saved_models", exist_ok=True)
-        joblib.dump(km, os.path.join("saved_models", model_filename))
-        return {
-            "status": "ok",
-            "model_file": model_filename,
-            "details": f"Trained KMeans with {n_clusters} clusters on {request.dataset_path}",
-        }
-
-    # ----- DEEP LEARNING (TensorFlow) -----
-    elif algo == "tensorflow_classifier":
-        # Basic binary classifier
-        if request.label_column not in df.columns:
-            raise HTTPException(
-                400, detail=f"Label column '{request.label_column}' not in CSV"
-            )
-
-        X = df.drop(columns=[request.label_column]).values
-        y = df[request.label_column].values
-
-        # Build simple TF model
-        model = keras.Sequential()
-        model.add(keras.layers.Dense(16, activation="relu", input_shape=(X.shape[1],)))
-        model.add(keras.layers.Dense(1, activation="sigmoid"))
-        model.compile(
-            optimizer="adam", loss="binary_crossentropy", metrics=["accuracy"]
-        )
-
-        epochs = int(request.hyperparams.get("epochs", 5))
-        model.fit(X, y, epochs=epochs, batch_size=32, verbose=1)
-
-        model_filename = f"tf_{os.path.basename(request.dataset_path)}.h5"
-        os.makedirs("saved_models", exist_ok=True)
-        model.save(os.path.join("saved_models", model_filename))
+    params = checked_params(request)
+    try:
+        return training.train_and_wait(params)
+    except training.TrainingError as e:
+        raise HTTPException(400, detail=str(e))
+    except jobs.QuotaExceeded:
+        raise
+    except Exception as e:
+        raise HTTPException(500, detail=f"Training failed: {e}")
+
+
+@router.post("/train2/jobs", status_code=202)
+def create_training_job(request: Train2Request):
+    """
+    Queue a training job. Poll GET /ml/jobs/{job_id} for status, progress
+    (trees or epochs completed) and logs; the result holds the registered
+    model id, version and file.
+    """
+    return training.submit_training(checked_params(request))
 
-        return {
-            "status": "ok",
-            "model_file": model_filename,
-            "details": f"Trained TF classifier for {request.dataset_path}",
-        }
 
-    else:
-        raise HTTPException(400, detail=f"Unsupported algorithm: {request.algorithm}")
+@router.post("/search/jobs", status_code=202)
+def create_search_job(request: SearchRequest):
+    """
+    Queue a hyperparameter search. The dataset is encoded once and shared
+    with one trial process per core; the best candidate is refitted on the
+    whole dataset and registered, with every trial's metrics. Poll
+    GET /ml/jobs/{job_id} like a training job.
+    """
+    return tuning.submit_search(checked_params(request, tuning.check_search_request))
@@ -1,18 +1,43 @@
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel
-
-
-class RowData(BaseModel):
-    feature1: float
-    feature2: float
+from pydantic import BaseModel, model_validator
 
 
 class PredictionRequest(BaseModel):
     model_name: str
-    data: List[RowData]
+    # Registry version ("v2", "2" or "latest"); newest when omitted
+    version: Optional[str] = None
+    # Row records: [{"feature1": 0.5, "feature2": 1.0}, ...]
+    data: Optional[List[Dict[str, Any]]] = None
+    # Columnar: {"feature1": [0.5, ...], "feature2": [1.0, ...]}; much cheaper
+    # to parse than records for large batches
+    columns: Optional[Dict[str, List[Any]]] = None
+
+    @model_validator(mode="after")
+    def check_payload(self):
+        if (self.data is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of 'data' or 'columns'")
+        return self
 
 
 class PredictionResponse(BaseModel):
-    predictions: List[int]
+    # Class names for models trained on a text label, codes/numbers otherwise
+    predictions: List[Union[int, float, str]]
     probabilities: List[float]
+
+
+class ModelRef(BaseModel):
+    model_name: str
+    version: Optional[str] = None
+
+
+class WarmupRequest(BaseModel):
+    models: List[ModelRef]
+
+
+class BatchPredictionJobRequest(BaseModel):
+    dataset_path: str
+    model_name: str
+    version: Optional[str] = None
+    # Opaque caller data stored with the job (e.g. the requesting user)
+    metadata: Dict[str, Any] = {}
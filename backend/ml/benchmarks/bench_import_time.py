@@ -0,0 +1,108 @@
+"""
+Cold-start cost of the ML service: time and peak memory to import app.main.
+
+Run from backend/ml:
+
+    python -m benchmarks.bench_import_time --runs 5 --with-keras
+
+Each run imports the app in a fresh interpreter, as a new worker process
+does. --with-keras also loads TensorFlow through the Keras backend, which
+is what a worker pays the first time it serves a .h5 model or trains a
+tensorflow_classifier; without it the numbers are those of a worker that
+only serves scikit-learn models.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import app.main
+if {with_keras}:
+    from app.ml import backends
+    backends.KERAS.keras()
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "tensorflow": "tensorflow" in sys.modules,
+}}))
+"""
+
+
+def measure(with_keras: bool = False, importtime: bool = False) -> dict:
+    """
+    Import the app in a fresh interpreter. With `importtime`, the result
+    also holds the slowest modules by cumulative import time.
+    """
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", CHILD.format(with_keras=with_keras)]
+    done = subprocess.run(
+        cmd, cwd=ML_DIR, capture_output=True, text=True, check=True, timeout=300
+    )
+    result = json.loads(done.stdout.strip().splitlines()[-1])
+    if importtime:
+        result["slowest"] = slowest_modules(done.stderr)
+    return result
+
+
+def slowest_modules(importtime_output: str, top: int = 10):
+    """
+    Top-level packages by cumulative import time, from `-X importtime` lines
+    ("import time: self | cumulative | module").
+    """
+    packages = {}
+    for line in importtime_output.splitlines():
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1])
+        except ValueError:  # the header line
+            continue
+        module = parts[2].strip()
+        package = module.split(".")[0]
+        packages[package] = max(packages.get(package, 0), cumulative)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return [(name, micros / 1e6) for name, micros in ranked[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--with-keras", action="store_true")
+    args = parser.parse_args()
+
+    variants = [("sklearn only", False)]
+    if args.with_keras:
+        variants.append(("with keras", True))
+
+    print(f"{'variant':>14} {'median s':>9} {'max s':>7} {'rss MB':>8} {'tf':>4}")
+    for label, with_keras in variants:
+        try:
+            runs = [measure(with_keras) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"{label:>14} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        seconds = [run["seconds"] for run in runs]
+        print(
+            f"{label:>14} {statistics.median(seconds):>9.2f} {max(seconds):>7.2f} "
+            f"{max(run['max_rss_mb'] for run in runs):>8.0f} "
+            f"{'yes' if runs[0]['tensorflow'] else 'no':>4}"
+        )
+
+    print("slowest packages (cumulative import seconds):")
+    for name, seconds in measure(importtime=True)["slowest"]:
+        print(f"  {name:<24} {seconds:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
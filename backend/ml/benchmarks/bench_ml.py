@@ -0,0 +1,155 @@
+"""
+Training and prediction benchmarks of the ML service, run in-process.
+
+Run from backend/ml:
+
+    python -m benchmarks.bench_ml --output results.json
+    python -m benchmarks.bench_ml --baseline results.json --quick
+
+Trains each algorithm through POST /ml/train2 on a synthetic CSV (including
+the training process start-up, as a real request pays it), then times
+/ml/predict2 for single-row and batch calls against the trained models.
+tensorflow_classifier is included when TensorFlow is installed. Everything
+lives in a temporary directory. Exits with status 1 when a benchmark
+regressed against --baseline.
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from benchmarks.results import Results, add_arguments, finish, timed
+
+FEATURES = ["feature1", "feature2", "feature3", "feature4"]
+HYPERPARAMS = {
+    "logisticregression": {},
+    "randomforestclassifier": {"n_estimators": 50},
+    "kmeans": {"n_clusters": 3},
+    "tensorflow_classifier": {"epochs": 3},
+}
+
+
+def setup_app(workdir: str):
+    os.chdir(workdir)
+    os.environ["ML_DB_PATH"] = os.path.join(workdir, "ml_store.db")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Training requests would otherwise log a slow-trace breakdown each
+    os.environ.setdefault("TRACING_SLOW_SECONDS", "3600")
+
+    from app.main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return app
+
+
+def write_dataset(path: str, rows: int):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, len(FEATURES)))
+    df = pd.DataFrame(X, columns=FEATURES)
+    df["segment"] = rng.choice(["a", "b", "c"], size=rows)
+    df["label"] = (X[:, 0] + X[:, 1] > 0).astype(int)
+    df.to_csv(path, index=False)
+    return df
+
+
+def algorithms():
+    names = ["logisticregression", "randomforestclassifier", "kmeans"]
+    if importlib.util.find_spec("tensorflow") is not None:
+        names.append("tensorflow_classifier")
+    return names
+
+
+def bench_train(results: Results, client, dataset_path: str, rows: int, repeat):
+    trained = []
+    for algorithm in algorithms():
+        body = {
+            "dataset_path": dataset_path,
+            "label_column": "label",
+            "algorithm": algorithm,
+            "hyperparams": HYPERPARAMS[algorithm],
+            "model_name": f"bench_{algorithm}",
+        }
+        fit_seconds = []
+
+        def train():
+            resp = client.post("/ml/train2", json=body)
+            resp.raise_for_status()
+            fit_seconds.append(resp.json()["metrics"].get("train_seconds", 0.0))
+
+        stats = timed(train, repeat, warmup=0)
+        results.latency(f"train2.{algorithm}", stats, rows=rows)
+        # The fit alone, without process start-up and saving the artifact
+        results.add(
+            f"train2.{algorithm}.fit",
+            "p50_seconds",
+            float(np.median(fit_seconds)),
+            False,
+        )
+        if algorithm != "kmeans":
+            trained.append(algorithm)
+    return trained
+
+
+def bench_predict(results: Results, client, df, trained, batch_rows, repeat):
+    rows = df[FEATURES + ["segment"]]
+    single = {"data": rows.head(1).to_dict(orient="records")}
+    batch = {"columns": rows.head(batch_rows).to_dict(orient="list")}
+    for algorithm in trained:
+        model = {"model_name": f"bench_{algorithm}"}
+
+        def predict_single():
+            client.post("/ml/predict2", json={**model, **single}).raise_for_status()
+
+        def predict_batch():
+            client.post("/ml/predict2", json={**model, **batch}).raise_for_status()
+
+        results.latency(
+            f"predict2.{algorithm}.single_row", timed(predict_single, repeat * 10)
+        )
+        stats = timed(predict_batch, repeat)
+        results.latency(f"predict2.{algorithm}.batch_{batch_rows}", stats)
+        results.throughput(
+            f"predict2.{algorithm}.batch_{batch_rows}.throughput",
+            "rows_per_second",
+            batch_rows / stats["p50_seconds"],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch-rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--quick", action="store_true", help="smaller sizes and fewer repeats"
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+    for path in ("output", "baseline"):
+        if getattr(args, path):
+            # The app runs from a temporary directory
+            setattr(args, path, os.path.abspath(getattr(args, path)))
+
+    repeat = 3 if args.quick else args.repeat
+    rows = 2000 if args.quick else args.rows
+    train_repeat = 1 if args.quick else 3
+
+    workdir = tempfile.mkdtemp(prefix="bench_ml_")
+    app = setup_app(workdir)
+    from fastapi.testclient import TestClient
+
+    df = write_dataset(os.path.join(workdir, "bench.csv"), rows)
+    results = Results("ml")
+    with TestClient(app) as client:
+        trained = bench_train(results, client, "bench.csv", rows, train_repeat)
+        bench_predict(results, client, df, trained, args.batch_rows, repeat)
+    sys.exit(finish(results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Throughput of single-row predictions with and without micro-batching.
+
+Run from backend/ml:
+
+    python -m benchmarks.bench_predict_batching --requests 2000 \
+        --concurrency 1 4 16 64
+
+Each client thread sends one-row requests back to back, as concurrent
+/ml/predict2 callers would, against an in-process RandomForest. The HTTP layer
+is left out so the numbers isolate the model-call overhead that batching saves.
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from app.ml.batching import MicroBatcher
+from app.ml.inference import make_predict_fn
+from sklearn.ensemble import RandomForestClassifier
+
+COLUMNS = ["feature1", "feature2", "feature3", "feature4"]
+
+
+def train_model(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(2000, len(COLUMNS)))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=50, random_state=seed)
+    model.fit(pd.DataFrame(X, columns=COLUMNS), y)
+    return model
+
+
+def run_clients(call, concurrency: int, total_requests: int) -> float:
+    """
+    Run `total_requests` one-row calls spread over `concurrency` threads.
+    Returns requests per second.
+    """
+    per_thread = max(1, total_requests // concurrency)
+    rows = np.random.default_rng(1).normal(size=(per_thread, 1, len(COLUMNS)))
+
+    def client():
+        for row in rows:
+            call(row)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return per_thread * concurrency / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--max-batch-rows", type=int, default=512)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    model = train_model()
+    predict_fn = make_predict_fn(model, is_keras=False, columns=COLUMNS)
+    batcher = MicroBatcher(
+        predict_fn, max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms
+    )
+
+    print(f"{'concurrency':>12} {'direct req/s':>14} {'batched req/s':>14} {'x':>6}")
+    for concurrency in args.concurrency:
+        direct = run_clients(predict_fn, concurrency, args.requests)
+        batched = run_clients(batcher.predict, concurrency, args.requests)
+        print(
+            f"{concurrency:>12} {direct:>14.0f} {batched:>14.0f} "
+            f"{batched / direct:>6.1f}"
+        )
+    print("batcher:", batcher.stats())
+    batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Production server settings: gunicorn supervising uvicorn workers. Read
+automatically by `gunicorn app.main:app` run from this directory.
+"""
+
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+# Predictions are CPU-bound: one worker per core
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+# Import the app (pandas, scikit-learn, ...) once in the master; workers are
+# forked with it already loaded and share its memory pages
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+# Synchronous training requests can hold a worker for minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+# In-flight requests get this long to finish on SIGTERM or a reload
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "60"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers after this many requests (0: never), staggered by jitter.
+# Jobs still queued or running in a worker die with it; they are marked
+# failed when it exits (child_exit) and have to be submitted again.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+_metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _metrics_dir:
+    # Metric files left by a previous run would be added to this one's
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def on_starting(server):
+    from app.ml import jobs
+
+    # Left over from a previous run: nothing will ever finish them
+    jobs.fail_unfinished()
+
+
+def child_exit(server, worker):
+    from app.ml import jobs
+
+    # Its job threads are gone; failed jobs free their training slot and
+    # count no more against their owner's quota
+    jobs.fail_unfinished(worker.pid)
+    if _metrics_dir:
+        from prometheus_client import multiprocess
+
+        # Drop the worker's live gauges (in-flight requests)
+        multiprocess.mark_process_dead(worker.pid)
@@ -11,6 +11,8 @@ setup(
         "tensorflow==2.15.0",
         "scikit-learn",
         "pandas",
+        "orjson",
+        "pyarrow",
         "textblob",
         "torch",
     ],
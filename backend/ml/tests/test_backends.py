@@ -0,0 +1,48 @@
+import os
+import sys
+import types
+
+import pytest
+from app.ml import backends, model_cache
+from benchmarks.bench_import_time import measure
+
+# Generous enough for a loaded CI runner; TensorFlow alone takes longer
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "10"))
+
+
+def test_app_starts_without_tensorflow_within_budget():
+    startup = measure()
+    assert not startup["tensorflow"]
+    assert startup["seconds"] < STARTUP_BUDGET_SECONDS
+
+
+def test_backend_lookup():
+    assert backends.for_path("saved_models/m.h5") is backends.KERAS
+    assert backends.for_path("saved_models/m.joblib") is backends.SKLEARN
+    # Files from before the registry may have no extension
+    assert backends.for_path("saved_models/m") is backends.SKLEARN
+    assert backends.for_algorithm("tensorflow_classifier") is backends.KERAS
+    assert backends.for_algorithm("kmeans") is backends.SKLEARN
+    assert not backends.is_model_file("saved_models/m.pt")
+    with pytest.raises(ValueError):
+        backends.for_algorithm("xgboost")
+
+
+def test_keras_is_imported_on_first_h5_load(tmp_path, monkeypatch):
+    loaded = []
+    fake_tf = types.ModuleType("tensorflow")
+    fake_tf.keras = types.SimpleNamespace(
+        models=types.SimpleNamespace(load_model=lambda path: loaded.append(path))
+    )
+    monkeypatch.setitem(sys.modules, "tensorflow", fake_tf)
+    monkeypatch.setattr(backends, "_frameworks", {})
+    path = tmp_path / "model.h5"
+    path.write_bytes(b"")
+
+    model_cache.clear()
+    model_cache.get_model(str(path))
+
+    assert loaded == [str(path)]
+    assert list(backends.loaded_frameworks()) == ["tensorflow"]
+    assert "tensorflow" in model_cache.stats()["frameworks_loaded"]
+    model_cache.clear()
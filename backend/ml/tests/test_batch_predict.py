@@ -0,0 +1,241 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from app.ml import batch_predict, features, jobs, model_cache, registry
+from sklearn.linear_model import LogisticRegression
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    monkeypatch.setattr(batch_predict, "BATCH_PREDICT_CHUNK_ROWS", 40)
+    monkeypatch.setattr(batch_predict, "BATCH_PREDICT_WORKERS", 0)
+    os.makedirs(registry.MODELS_DIR)
+    model_cache.clear()
+
+
+def _register_model():
+    X = pd.DataFrame({"feature1": [0.0, 1.0, 2.0, 3.0], "feature2": [1, 0, 1, 0]})
+    model = LogisticRegression().fit(X, [0, 0, 1, 1])
+    staged = os.path.join(registry.MODELS_DIR, ".staging.joblib")
+    joblib.dump(model, staged)
+    registry.register_model(
+        "lr",
+        "logisticregression",
+        staged,
+        feature_schema=[
+            {"name": "feature1", "dtype": "float64"},
+            {"name": "feature2", "dtype": "int64"},
+        ],
+    )
+    return model
+
+
+def test_count_rows(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("a,b\n1,2\n3,4")
+    assert batch_predict.count_rows(str(path)) == 2
+    path.write_text("a,b\n1,2\n3,4\n")
+    assert batch_predict.count_rows(str(path)) == 2
+
+
+def test_run_batch_prediction_streams_chunks():
+    model = _register_model()
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "feature2": rng.integers(0, 2, 100),
+            "feature1": rng.normal(size=100),
+            "id": range(100),
+        }
+    )
+    df.to_csv("input.csv", index=False)
+    job = jobs.create_job("batch_predict", {})
+
+    result = batch_predict.run_batch_prediction(job["job_id"], "input.csv", "lr")
+
+    assert result["rows"] == result["total_rows"] == 100
+    assert result["output_path"] == os.path.realpath(
+        os.path.join("uploads", f"{job['job_id']}_predictions.csv")
+    )
+    out = pd.read_csv(result["output_path"])
+    assert out.columns.tolist() == [
+        "feature2",
+        "feature1",
+        "id",
+        "Predicted",
+        "Probability",
+    ]
+    assert out["id"].tolist() == list(range(100))
+    expected = model.predict(df[["feature1", "feature2"]])
+    assert out["Predicted"].tolist() == expected.tolist()
+
+    progress = jobs.get_job(job["job_id"])
+    assert progress["progress"] == 1.0
+    assert progress["result"]["rows"] == 100
+
+
+def test_job_failure_is_recorded():
+    _register_model()
+    pd.DataFrame({"feature1": [1.0]}).to_csv("missing_column.csv", index=False)
+
+    job = jobs.create_job("batch_predict", {})
+    with pytest.raises(features.FeatureValidationError):
+        jobs._run(
+            job["job_id"],
+            batch_predict.run_batch_prediction,
+            {"dataset_path": "missing_column.csv", "model_name": "lr"},
+        )
+
+    failed = jobs.get_job(job["job_id"])
+    assert failed["status"] == jobs.FAILED
+    assert "feature2" in failed["error"]
+    assert os.listdir("uploads") == []
+
+
+def test_output_path_stays_in_uploads():
+    assert batch_predict.output_path_for("abc") == os.path.realpath(
+        os.path.join("uploads", "abc_predictions.csv")
+    )
+    with pytest.raises(ValueError):
+        batch_predict.output_path_for("../../tmp/evil")
+
+
+def test_list_jobs_and_logs():
+    first = jobs.create_job("train", {"n": 1})
+    jobs.create_job("batch_predict", {"n": 2})
+    jobs.append_log(first["job_id"], "epoch 1\n")
+    jobs.append_log(first["job_id"], "epoch 2\n")
+
+    assert [j["kind"] for j in jobs.list_jobs(kind="train")] == ["train"]
+    assert jobs.get_job(first["job_id"])["logs"] == "epoch 1\nepoch 2\n"
+    assert len(jobs.list_jobs(status=jobs.QUEUED)) == 2
+
+
+def test_active_job_quota_per_owner(monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_ACTIVE_JOBS_PER_OWNER", 2)
+    owned = {"metadata": {"owner_id": 1}}
+    first = jobs.create_job("train", owned)
+    jobs.create_job("batch_predict", owned)
+    with pytest.raises(jobs.QuotaExceeded) as refused:
+        jobs.create_job("train", owned)
+    assert refused.value.retry_after == jobs.DEFAULT_RETRY_AFTER_SECONDS
+
+    # Other owners and jobs without an owner are not counted
+    jobs.create_job("train", {"metadata": {"owner_id": 2}})
+    jobs.create_job("train", {})
+
+    jobs.mark_running(first["job_id"])
+    with pytest.raises(jobs.QuotaExceeded):
+        jobs.create_job("train", owned)
+    jobs.mark_succeeded(first["job_id"], {})
+    jobs.create_job("train", owned)
+    with pytest.raises(jobs.QuotaExceeded) as refused:
+        jobs.create_job("train", owned)
+    assert refused.value.retry_after == 1
+
+
+def test_job_over_quota_is_refused_with_retry_after(monkeypatch):
+    from app.main import app
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(jobs, "MAX_ACTIVE_JOBS_PER_OWNER", 1)
+    _register_model()
+    pd.DataFrame({"feature1": [0.5], "feature2": [1]}).to_csv("in.csv", index=False)
+    jobs.create_job("train", {"metadata": {"owner_id": 7}})
+
+    with TestClient(app) as client:
+        resp = client.post(
+            "/ml/jobs/batch-predict",
+            json={
+                "dataset_path": "in.csv",
+                "model_name": "lr",
+                "metadata": {"owner_id": 7},
+            },
+        )
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == str(jobs.DEFAULT_RETRY_AFTER_SECONDS)
+    assert "1 jobs queued or running" in resp.json()["detail"]
+
+
+def test_slots_claim_oldest_job_under_the_limit():
+    slots = jobs.Slots(("train", "search"), 1)
+    first = jobs.create_job("train", {})
+    second = jobs.create_job("search", {})
+    other = jobs.create_job("batch_predict", {})
+
+    # The older job goes first, then the limit holds the next back
+    assert not slots.try_claim(second["job_id"])
+    assert slots.try_claim(first["job_id"])
+    assert not slots.try_claim(second["job_id"])
+    jobs.mark_running(other["job_id"])
+
+    jobs.mark_succeeded(first["job_id"], {})
+    assert slots.try_claim(second["job_id"])
+    assert jobs.get_job(second["job_id"])["status"] == jobs.RUNNING
+
+
+def test_slots_limit_jobs_on_every_thread(monkeypatch):
+    monkeypatch.setattr(jobs, "CLAIM_INTERVAL_SECONDS", 0.01)
+    slots = jobs.Slots(("train",), 1)
+    running, peak, order = [], [], []
+    lock = threading.Lock()
+
+    def fn(job_id):
+        with lock:
+            running.append(job_id)
+            peak.append(len(running))
+            order.append(job_id)
+        time.sleep(0.05)
+        with lock:
+            running.remove(job_id)
+        return {}
+
+    # Threads stand in for worker processes: each has its own connection
+    with ThreadPoolExecutor(3) as executor:
+        submitted = [
+            jobs.submit("train", {}, fn, executor=executor, slots=slots)
+            for _ in range(3)
+        ]
+    assert max(peak) == 1
+    assert order == [job["job_id"] for job in submitted]
+    assert all(
+        jobs.get_job(job["job_id"])["status"] == jobs.SUCCEEDED for job in submitted
+    )
+
+
+def test_jobs_of_an_exited_worker_are_failed():
+    queued = jobs.create_job("train", {})
+    running = jobs.create_job("train", {})
+    jobs.mark_running(running["job_id"])
+    done = jobs.create_job("train", {})
+    jobs.mark_succeeded(done["job_id"], {})
+
+    assert jobs.fail_unfinished(os.getpid() + 1) == 0
+    assert jobs.fail_unfinished(os.getpid()) == 2
+    for job in (queued, running):
+        failed = jobs.get_job(job["job_id"])
+        assert failed["status"] == jobs.FAILED
+        assert failed["error"] == "The worker process exited"
+    assert jobs.get_job(done["job_id"])["status"] == jobs.SUCCEEDED
+
+
+def test_worker_pid_is_added_to_an_older_jobs_table(tmp_path, monkeypatch):
+    path = tmp_path / "older.db"
+    monkeypatch.setenv("ML_DB_PATH", str(path))
+    older = jobs.SCHEMA.replace(",\n    worker_pid INTEGER", "")
+    assert "worker_pid" not in older
+    with sqlite3.connect(path) as conn:
+        conn.executescript(older)
+
+    job = jobs.create_job("train", {})
+    assert jobs.fail_unfinished(os.getpid()) == 1
+    assert jobs.get_job(job["job_id"])["status"] == jobs.FAILED
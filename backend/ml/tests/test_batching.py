@@ -0,0 +1,107 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from app.ml.batching import MicroBatcher
+
+
+def _doubling_predict_fn(batch_sizes):
+    def predict_fn(X):
+        batch_sizes.append(len(X))
+        time.sleep(0.01)
+        return X[:, 0] * 2, X[:, 0] / 10
+
+    return predict_fn
+
+
+def test_results_are_fanned_out_in_order():
+    batch_sizes = []
+    batcher = MicroBatcher(_doubling_predict_fn(batch_sizes), max_wait_ms=50)
+    # Mark the batcher as under concurrent load so it waits for company
+    batcher._requests_per_batch = 4.0
+
+    futures = [batcher.submit(np.array([[float(i)], [float(i)]])) for i in range(10)]
+    results = [f.result(timeout=5) for f in futures]
+    batcher.close()
+
+    for i, (preds, probs) in enumerate(results):
+        assert preds.tolist() == [2.0 * i, 2.0 * i]
+        assert probs.tolist() == [i / 10, i / 10]
+    assert max(batch_sizes) > 2
+    assert sum(batch_sizes) == 20
+
+
+def test_concurrent_clients_are_batched():
+    batch_sizes = []
+    batcher = MicroBatcher(_doubling_predict_fn(batch_sizes), max_wait_ms=5)
+    results = {}
+
+    def client(i):
+        for j in range(20):
+            preds, _ = batcher.predict(np.array([[float(i * 100 + j)]]))
+            results[(i, j)] = preds[0]
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert all(results[(i, j)] == 2 * (i * 100 + j) for i, j in results)
+    assert len(results) == 160
+    assert batcher.stats()["avg_requests_per_batch"] > 1
+
+
+def test_max_batch_rows_is_respected():
+    batch_sizes = []
+    batcher = MicroBatcher(
+        _doubling_predict_fn(batch_sizes), max_batch_rows=4, max_wait_ms=50
+    )
+    batcher._requests_per_batch = 4.0
+    futures = [batcher.submit(np.array([[1.0]])) for _ in range(12)]
+    for f in futures:
+        f.result(timeout=5)
+    batcher.close()
+    assert max(batch_sizes) <= 4
+
+
+def test_bad_request_does_not_fail_the_batch():
+    def predict_fn(X):
+        if np.isnan(X).any():
+            raise ValueError("NaN in input")
+        return X[:, 0], X[:, 0]
+
+    batcher = MicroBatcher(predict_fn, max_wait_ms=50)
+    batcher._requests_per_batch = 4.0
+    good = batcher.submit(np.array([[1.0]]))
+    bad = batcher.submit(np.array([[np.nan]]))
+    also_good = batcher.submit(np.array([[3.0]]))
+
+    assert good.result(timeout=5)[0].tolist() == [1.0]
+    assert also_good.result(timeout=5)[0].tolist() == [3.0]
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    batcher.close()
+
+
+def test_close_answers_queued_requests():
+    batch_sizes = []
+    batcher = MicroBatcher(_doubling_predict_fn(batch_sizes), max_wait_ms=50)
+    futures = [batcher.submit(np.array([[float(i)]])) for i in range(5)]
+    batcher.close()
+
+    for i, future in enumerate(futures):
+        assert future.result(timeout=5)[0].tolist() == [i * 2.0]
+
+
+def test_submit_after_close_runs_unbatched():
+    # A request that got the batcher just before a model reload replaced it
+    batcher = MicroBatcher(lambda X: (X, X))
+    batcher.close()
+
+    predictions, _ = batcher.predict(np.array([[1.0]]))
+
+    assert predictions.tolist() == [[1.0]]
+    assert batcher.stats()["requests"] == 0
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.ml import dataset_loader, registry
+from app.ml.pipeline import TabularPreprocessor
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dataset_loader, "COLUMNAR_DIR", str(tmp_path / "columnar"))
+    dataset_loader.clear()
+    pd.DataFrame(
+        {
+            "city": ["London", "Paris", "Berlin", "London"] * 25,
+            "id": [f"row-{i}" for i in range(100)],
+            "visits": range(100),
+            "score": np.linspace(0, 1, 100),
+            "label": ["A", "B"] * 50,
+        }
+    ).to_csv("data.csv", index=False)
+    yield
+    dataset_loader.clear()
+
+
+def test_optimize_dtypes_downcasts_and_categorizes():
+    df = dataset_loader.optimize_dtypes(pd.read_csv("data.csv"))
+    assert df["visits"].dtype == np.int8
+    assert df["score"].dtype == np.float32
+    assert isinstance(df["city"].dtype, pd.CategoricalDtype)
+    assert not isinstance(df["id"].dtype, pd.CategoricalDtype)
+    assert df["visits"].tolist() == list(range(100))
+
+
+def test_large_values_keep_wide_dtypes():
+    df = dataset_loader.optimize_dtypes(
+        pd.DataFrame({"big": [0, 2**40], "huge": [0.0, 1e300]})
+    )
+    assert df["big"].dtype == np.int64
+    assert df["huge"].dtype == np.float64
+
+
+@pytest.mark.skipif(dataset_loader.pa is None, reason="pyarrow not installed")
+def test_columnar_copy_is_written_and_reused(monkeypatch):
+    dataset_hash = registry.hash_file("data.csv")
+    first = dataset_loader.read_dataset("data.csv", dataset_hash)
+    assert os.path.isfile(dataset_loader.columnar_path(dataset_hash))
+
+    def no_csv(*args, **kwargs):
+        raise AssertionError("CSV parsed again")
+
+    monkeypatch.setattr(pd, "read_csv", no_csv)
+    second = dataset_loader.read_dataset("data.csv", dataset_hash)
+    pd.testing.assert_frame_equal(first, second)
+    assert isinstance(second["city"].dtype, pd.CategoricalDtype)
+
+
+@pytest.mark.skipif(dataset_loader.pa is None, reason="pyarrow not installed")
+def test_newer_sibling_parquet_is_preferred():
+    pd.DataFrame({"visits": [7, 8]}).to_parquet("data.parquet")
+    df = dataset_loader.read_dataset("data.csv", registry.hash_file("data.csv"))
+    assert df["visits"].tolist() == [7, 8]
+
+
+def test_load_dataset_is_cached_by_hash():
+    first = dataset_loader.load_dataset("data.csv")
+    os.rename("data.csv", "copy.csv")
+    assert dataset_loader.load_dataset("copy.csv") is first
+    stats = dataset_loader.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_preprocessor_encodes_optimized_frame_like_raw_csv():
+    raw = pd.read_csv("data.csv")
+    optimized = dataset_loader.load_dataset("data.csv")
+    expected = TabularPreprocessor.fit(raw, "label")
+    pre = TabularPreprocessor.fit(optimized, "label")
+    assert pre.categories == expected.categories
+    np.testing.assert_array_equal(
+        pre.transform_frame(optimized).to_numpy(),
+        expected.transform_frame(raw).to_numpy(),
+    )
+    np.testing.assert_array_equal(
+        pre.encode_label(optimized["label"]), expected.encode_label(raw["label"])
+    )
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from app.ml import evaluation
+from sklearn.cluster import KMeans
+from sklearn.linear_model import LogisticRegression
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    y = (X[:, 0] > 0).astype(int)
+    return X, y
+
+
+def test_split_rows_is_stratified(data):
+    _, y = data
+    train_rows, val_rows = evaluation.split_rows(len(y), y, 0.25)
+    assert len(val_rows) == 50
+    assert sorted(np.concatenate([train_rows, val_rows])) == list(range(200))
+    assert abs(y[val_rows].mean() - y.mean()) < 0.02
+
+    # One row of a class cannot be stratified; the split still happens
+    y[0] = 2
+    train_rows, val_rows = evaluation.split_rows(len(y), y, 0.25)
+    assert len(val_rows) == 50
+
+
+def test_holdout_scores_unseen_rows(data):
+    X, y = data
+    model = LogisticRegression()
+    metrics = evaluation.evaluate_classifier(model, X, y)
+    assert metrics["evaluation"] == "holdout"
+    assert metrics["validation_rows"] == 40
+    assert metrics["accuracy"] > 0.9
+    assert 0 <= metrics["mse"] < 0.25
+    assert not hasattr(model, "coef_")
+
+
+def test_kfold_scores_every_row_out_of_fold(data):
+    X, y = data
+    metrics = evaluation.evaluate_classifier(
+        LogisticRegression(), X, y, evaluation.KFOLD, folds=4, n_jobs=2
+    )
+    assert metrics["validation_rows"] == 200
+    assert metrics["cv_folds"] == 4
+    assert metrics["accuracy"] > 0.9
+
+
+def test_probability_mse():
+    assert evaluation.probability_mse([0, 1], np.array([0.0, 1.0]), [0, 1]) == 0.0
+    proba = np.array([[1.0, 0.0, 0.0], [0.5, 0.5, 0.0]])
+    assert evaluation.probability_mse(["a", "b"], proba, ["a", "b", "c"]) == 0.25
+
+
+def test_clustering_metrics(data):
+    X, _ = data
+    km = KMeans(n_clusters=3, n_init=1, random_state=0).fit(X)
+    metrics = evaluation.clustering_metrics(km, X)
+    assert metrics["inertia"] == pytest.approx(km.inertia_)
+    assert -1 <= metrics["silhouette"] <= 1
@@ -0,0 +1,90 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.ml import features
+from app.schemas_ml import PredictionRequest
+from pydantic import ValidationError
+from sklearn.linear_model import LogisticRegression
+
+SCHEMA = [
+    {"name": "feature1", "dtype": "float64"},
+    {"name": "feature2", "dtype": "int64"},
+]
+
+
+def test_build_matrix_orders_columns_and_ignores_extras():
+    X, names = features.build_matrix(
+        {"label": ["a", "b"], "feature2": [3, 4], "feature1": [0.5, 1.5]}, SCHEMA
+    )
+    assert names == ["feature1", "feature2"]
+    assert X.dtype == np.float64
+    assert X.tolist() == [[0.5, 3.0], [1.5, 4.0]]
+
+
+def test_build_matrix_rejects_bad_input():
+    with pytest.raises(features.FeatureValidationError, match="Missing"):
+        features.build_matrix({"feature1": [1.0]}, SCHEMA)
+    with pytest.raises(features.FeatureValidationError, match="expected"):
+        features.build_matrix({"feature1": [1.0, 2.0], "feature2": [1]}, SCHEMA)
+    with pytest.raises(features.FeatureValidationError, match="numeric"):
+        features.build_matrix({"feature1": ["x"], "feature2": [1]}, SCHEMA)
+
+
+def test_build_matrix_keeps_text_features_as_objects():
+    schema = SCHEMA + [{"name": "city", "dtype": "object"}]
+    X, _ = features.build_matrix(
+        {"feature1": [1.0], "feature2": [2], "city": ["Paris"]}, schema
+    )
+    assert X.dtype == object
+    assert X[0, 2] == "Paris"
+
+
+def test_records_to_columns():
+    columns = features.records_to_columns(
+        [{"feature1": 1.0, "feature2": 2}, {"feature1": 3.0, "feature2": 4}]
+    )
+    X, _ = features.build_matrix(columns, SCHEMA)
+    assert X.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+
+
+def test_schema_from_model():
+    model = LogisticRegression().fit(
+        pd.DataFrame({"a": [0.0, 1.0, 0.0, 1.0], "b": [1.0, 0.0, 1.0, 0.0]}),
+        [0, 1, 0, 1],
+    )
+    assert [f["name"] for f in features.schema_from_model(model)] == ["a", "b"]
+    assert features.schema_from_model(object()) is None
+
+
+def test_table_bodies():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    table = pa.table({"feature1": [0.5, 1.5], "feature2": [3, 4]})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    arrow_body = sink.getvalue().to_pybytes()
+
+    parquet_buffer = io.BytesIO()
+    pq.write_table(table, parquet_buffer)
+
+    for body, content_type in [
+        (arrow_body, "application/vnd.apache.arrow.stream"),
+        (parquet_buffer.getvalue(), "application/vnd.apache.parquet"),
+    ]:
+        columns = features.table_to_columns(body, content_type)
+        X, _ = features.build_matrix(columns, SCHEMA)
+        assert X.tolist() == [[0.5, 3.0], [1.5, 4.0]]
+
+
+def test_prediction_request_needs_exactly_one_payload():
+    PredictionRequest(model_name="m", columns={"feature1": [1.0]})
+    PredictionRequest(model_name="m", data=[{"feature1": 1.0}])
+    with pytest.raises(ValidationError):
+        PredictionRequest(model_name="m")
+    with pytest.raises(ValidationError):
+        PredictionRequest(model_name="m", data=[], columns={})
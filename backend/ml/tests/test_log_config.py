@@ -0,0 +1,27 @@
+import json
+import logging
+
+from app.ml import log_config
+
+
+def test_records_are_written_as_rotated_json_lines(tmp_path, monkeypatch):
+    log_file = tmp_path / "ml.log"
+    monkeypatch.setattr(log_config, "LOG_FILE", str(log_file))
+    monkeypatch.setattr(log_config, "LOG_MAX_BYTES", 2000)
+    monkeypatch.setattr(log_config, "LOG_SAMPLE_PER_SECOND", 0)
+    log_config.stop_logging()
+    log_config.configure_logging()
+    try:
+        for i in range(40):
+            logging.getLogger("app").info("Trained model %d", i, extra={"job": i})
+    finally:
+        # Drains the queue; later tests log through a fresh listener
+        log_config.stop_logging()
+        monkeypatch.undo()
+        log_config.configure_logging()
+
+    assert (tmp_path / "ml.log.1").exists()
+    last = json.loads(log_file.read_text().splitlines()[-1])
+    assert last["message"] == "Trained model 39"
+    assert last["job"] == 39
+    assert last["service"] == "backend-ml"
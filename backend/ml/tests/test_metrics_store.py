@@ -0,0 +1,68 @@
+import pytest
+from app.ml import metrics_manager
+
+
+@pytest.fixture(autouse=True)
+def metrics_db(tmp_path, monkeypatch):
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    metrics_manager.clear_cache()
+    yield
+    metrics_manager.clear_cache()
+
+
+def test_save_and_get_metrics():
+    metrics_manager.save_metrics("rf.joblib", "v1", {"accuracy": 0.9}, dataset="a.csv")
+    assert metrics_manager.get_metrics("rf.joblib", "v1") == {"accuracy": 0.9}
+    assert metrics_manager.get_metrics("rf.joblib", "v1", dataset="a.csv") == {
+        "accuracy": 0.9
+    }
+    assert metrics_manager.get_metrics("rf.joblib", "v1", dataset="b.csv") is None
+    assert metrics_manager.get_metrics("rf.joblib", "v2") is None
+
+
+def test_overwrite_invalidates_cache():
+    metrics_manager.save_metrics("rf.joblib", "v1", {"accuracy": 0.5})
+    assert metrics_manager.get_metrics("rf.joblib", "v1") == {"accuracy": 0.5}
+    metrics_manager.save_metrics("rf.joblib", "v1", {"accuracy": 0.7})
+    assert metrics_manager.get_metrics("rf.joblib", "v1") == {"accuracy": 0.7}
+
+
+def test_metrics_survive_restart():
+    metrics_manager.save_metrics("km.joblib", "v1", {"inertia": 1.5}, dataset="d.csv")
+    # Simulate a fresh process: nothing in the in-memory cache
+    metrics_manager.clear_cache()
+    assert metrics_manager.get_metrics("km.joblib", "v1") == {"inertia": 1.5}
+
+
+def test_list_metrics_filters():
+    metrics_manager.save_metrics("m1", "v1", {"accuracy": 0.1}, dataset="x.csv")
+    metrics_manager.save_metrics("m1", "v2", {"accuracy": 0.2}, dataset="y.csv")
+    metrics_manager.save_metrics("m2", "v1", {"accuracy": 0.3}, dataset="x.csv")
+
+    by_model = metrics_manager.list_metrics(model_name="m1")
+    assert [r["version"] for r in by_model] == ["v2", "v1"]
+
+    by_dataset = metrics_manager.list_metrics(dataset="x.csv")
+    assert {r["model_name"] for r in by_dataset} == {"m1", "m2"}
+
+    page = metrics_manager.list_metrics(skip=1, limit=1)
+    assert len(page) == 1
+
+
+def test_routes_accept_every_version_form(tmp_path, monkeypatch):
+    from app.main import app
+    from fastapi.testclient import TestClient
+
+    monkeypatch.chdir(tmp_path)
+    metrics_manager.save_metrics("m1", "v2", {"accuracy": 0.2}, dataset="y.csv")
+
+    with TestClient(app) as client:
+        for version in ("2", "v2", "V2"):
+            resp = client.get(f"/ml/metrics/m1/{version}")
+            assert resp.json() == {"accuracy": 0.2}, version
+            listed = client.get("/ml/metrics", params={"version": version}).json()
+            assert [r["model_name"] for r in listed] == ["m1"]
+        assert client.get("/ml/metrics/m1/3").status_code == 404
+        assert client.get("/ml/metrics/m1/latest").status_code == 404
+        assert client.get("/ml/metrics", params={"version": "latest"}).json() == []
+        assert client.get("/ml/metrics/m1/two").status_code == 400
@@ -0,0 +1,131 @@
+import gc
+import os
+import threading
+import time
+import weakref
+
+import joblib
+import pytest
+from app.ml import batching, model_cache
+from app.ml.cache import LRUCache
+from sklearn.linear_model import LogisticRegression
+
+
+def test_lru_evicts_by_memory_budget():
+    cache = LRUCache(max_bytes=10)
+    cache.get_or_load("a", lambda: ("A", 4))
+    cache.get_or_load("b", lambda: ("B", 4))
+    cache.get_or_load("a", lambda: pytest.fail("should be cached"))
+    # "b" is now least recently used and goes first
+    cache.get_or_load("c", lambda: ("C", 4))
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert stats["bytes"] == 8
+
+
+def test_lru_keeps_entry_larger_than_budget():
+    cache = LRUCache(max_bytes=10)
+    cache.get_or_load("small", lambda: ("s", 5))
+    assert cache.get_or_load("huge", lambda: ("h", 50)) == "h"
+    assert "huge" in cache
+    assert "small" not in cache
+
+
+def test_on_evict_sees_every_entry_that_leaves():
+    released = []
+    cache = LRUCache(max_bytes=10, on_evict=lambda key, value: released.append(key))
+    for key in "abc":
+        cache.get_or_load(key, lambda: (key.upper(), 4))
+    assert released == ["a"]
+    cache.discard_if(lambda key: key == "b")
+    cache.clear()
+    assert released == ["a", "b", "c"]
+
+
+def test_single_flight_loading():
+    cache = LRUCache(max_bytes=100)
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return "model", 1
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_load("m", slow_loader))
+        )
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [1]
+    assert results == ["model"] * 8
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_failed_load_is_not_cached():
+    cache = LRUCache(max_bytes=100)
+
+    def broken():
+        raise IOError("corrupt")
+
+    with pytest.raises(IOError):
+        cache.get_or_load("m", broken)
+    assert cache.get_or_load("m", lambda: ("ok", 1)) == "ok"
+    assert cache.stats()["load_errors"] == 1
+
+
+def test_model_cache_reloads_rewritten_artifact(tmp_path):
+    model_cache.clear()
+    path = str(tmp_path / "model.joblib")
+    joblib.dump({"weights": 1}, path)
+
+    first = model_cache.get_model(path)
+    assert model_cache.get_model(path) is first
+
+    joblib.dump({"weights": 2, "extra": "x"}, path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert model_cache.get_model(path) == {"weights": 2, "extra": "x"}
+    # The stale copy was dropped
+    assert model_cache.stats()["entries"] == 1
+
+
+def test_evicted_model_is_released_with_its_batchers(tmp_path, monkeypatch):
+    # A 1-byte budget keeps only the model loaded last
+    monkeypatch.setattr(
+        model_cache, "_cache", LRUCache(1, on_evict=model_cache._cache.on_evict)
+    )
+    paths = []
+    for name in ("a", "b"):
+        paths.append(str(tmp_path / f"{name}.joblib"))
+        joblib.dump(LogisticRegression(), paths[-1])
+
+    model = model_cache.get_model(paths[0])
+    released = weakref.ref(model)
+    batcher = batching.get_batcher(
+        (paths[0], ("x",)), model, lambda X, model=model: (X, X)
+    )
+    del model
+
+    model_cache.get_model(paths[1])
+    batcher._thread.join(timeout=5)
+    del batcher
+    gc.collect()
+    assert released() is None
+    assert str((paths[0], ("x",))) not in batching.stats()
+
+
+def test_parse_model_refs():
+    assert model_cache.parse_model_refs("a.csv, b:v2,,") == [
+        ("a.csv", None),
+        ("b", "v2"),
+    ]
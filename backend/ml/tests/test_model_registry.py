@@ -0,0 +1,89 @@
+import os
+
+import pytest
+from app.ml import registry
+
+
+@pytest.fixture(autouse=True)
+def registry_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    os.makedirs(registry.MODELS_DIR)
+
+
+def _stage(content=b"model"):
+    path = os.path.join(registry.MODELS_DIR, ".staging.joblib")
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_register_model_allocates_versions():
+    first = registry.register_model(
+        "rf_data.csv",
+        "randomforestclassifier",
+        _stage(b"one"),
+        hyperparams={"n_estimators": 10},
+        feature_schema=[{"name": "f1", "dtype": "float64"}],
+        train_seconds=0.5,
+    )
+    second = registry.register_model("rf_data.csv", "randomforestclassifier", _stage())
+
+    assert (first["version"], second["version"]) == (1, 2)
+    assert first["model_file"] == "rf_data.csv_v1.joblib"
+    assert first["file_size"] == 3
+    assert first["hyperparams"] == {"n_estimators": 10}
+    # Retraining does not overwrite the previous artifact
+    assert os.path.exists(first["artifact_path"])
+    assert os.path.exists(second["artifact_path"])
+    assert not os.path.exists(os.path.join(registry.MODELS_DIR, ".staging.joblib"))
+
+
+def test_get_model_by_version():
+    registry.register_model("km", "kmeans", _stage())
+    registry.register_model("km", "kmeans", _stage())
+
+    assert registry.get_model("km")["version"] == 2
+    assert registry.get_model("km", "latest")["version"] == 2
+    assert registry.get_model("km", "v1")["version"] == 1
+    assert registry.get_model("km", 3) is None
+    assert registry.get_model("missing") is None
+    with pytest.raises(ValueError):
+        registry.get_model("km", "first")
+
+
+def test_list_models_paginated():
+    for name in ("a", "b", "c"):
+        registry.register_model(name, "kmeans", _stage())
+    registry.register_model("d", "logisticregression", _stage())
+
+    assert [m["model_id"] for m in registry.list_models(limit=2)] == ["d", "c"]
+    assert [m["model_id"] for m in registry.list_models(skip=2, limit=2)] == [
+        "b",
+        "a",
+    ]
+    assert len(registry.list_models(algorithm="kmeans")) == 3
+
+
+def test_resolve_artifact_falls_back_to_file_name():
+    entry = registry.register_model("lr", "logisticregression", _stage())
+    legacy = os.path.join(registry.MODELS_DIR, "legacy_model.joblib")
+    open(legacy, "wb").close()
+
+    assert registry.resolve_artifact("lr") == entry["artifact_path"]
+    assert registry.resolve_artifact("lr", "v1") == entry["artifact_path"]
+    assert registry.resolve_artifact("legacy_model") == legacy
+    assert registry.resolve_artifact("lr", "v9") is None
+    assert registry.resolve_artifact("unknown") is None
+
+
+@pytest.mark.parametrize("model_id", ["../escaped/pwn", "a/b", ".hidden", "", "a b"])
+def test_unsafe_model_ids_are_rejected(model_id):
+    with pytest.raises(ValueError, match="Invalid model name"):
+        registry.register_model(model_id, "randomforestclassifier", _stage())
+
+    assert not os.path.exists("escaped")
+    assert registry.list_models() == []
+    assert registry.default_model_id("kmeans", "uploads/my data.csv") == (
+        "kmeans_my_data.csv"
+    )
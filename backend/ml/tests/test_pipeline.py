@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.ml import model_cache, pipeline
+from app.ml.features import FeatureValidationError
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "city": ["Paris", "London", "Berlin", "London"],
+            "visits": [3, 1, 4, 1],
+            "score": [0.5, 0.25, 0.75, 1.0],
+            "label": ["yes", "no", "yes", "no"],
+        }
+    )
+
+
+def test_fit_transform_matches_label_encoder_order(frame):
+    pre = pipeline.TabularPreprocessor.fit(frame, "label")
+    assert pre.columns == ["city", "visits", "score"]
+    assert pre.matrix_dtype == "float32"
+    X = pre.transform_frame(frame)
+    assert X["city"].tolist() == [2, 1, 0, 1]
+    assert X["visits"].tolist() == [3, 1, 4, 1]
+    assert pre.encode_label(frame["label"]).tolist() == [1, 0, 1, 0]
+    assert pre.decode_label(np.array([0, 1])).tolist() == ["no", "yes"]
+
+
+def test_unknown_categories_and_validation(frame):
+    pre = pipeline.TabularPreprocessor.fit(frame, "label")
+    X = pre.transform(
+        {"city": ["Rome", "Paris"], "visits": [1, 2], "score": [0, 0], "x": [9, 9]}
+    )
+    assert X[:, 0].tolist() == [-1, 2]
+
+    with pytest.raises(FeatureValidationError, match="Missing"):
+        pre.transform({"city": ["Paris"]})
+    with pytest.raises(FeatureValidationError, match="numeric"):
+        pre.transform({"city": ["Paris"], "visits": ["many"], "score": [1]})
+
+
+def test_large_integers_keep_float64():
+    df = pd.DataFrame({"id": [1, 2**40], "label": [0, 1]})
+    pre = pipeline.TabularPreprocessor.fit(df, "label")
+    assert pre.matrix_dtype == "float64"
+    assert pre.label_classes is None
+    assert pre.transform_frame(df)["id"].tolist() == [1, 2**40]
+
+
+def test_encode_dataset_caches_by_hash(tmp_path, monkeypatch, frame):
+    monkeypatch.setattr(pipeline, "ENCODED_CACHE_DIR", str(tmp_path))
+    calls = []
+
+    def load():
+        calls.append(1)
+        return frame
+
+    pre, X, y, hit = pipeline.encode_dataset(load, "abc", "label")
+    assert not hit
+    pre2, X2, y2, hit2 = pipeline.encode_dataset(load, "abc", "label")
+    assert hit2 and len(calls) == 1
+    assert X2.equals(X) and y2.tolist() == y.tolist()
+    assert pre2.columns == pre.columns
+
+    # Another label column is a different encoding
+    _, _, _, hit3 = pipeline.encode_dataset(load, "abc", "city")
+    assert not hit3
+
+
+def test_prune_keeps_cache_under_budget(tmp_path, monkeypatch, frame):
+    monkeypatch.setattr(pipeline, "ENCODED_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(pipeline, "ENCODED_CACHE_MAX_BYTES", 1)
+    pipeline.encode_dataset(lambda: frame, "h1", "label")
+    pipeline.encode_dataset(lambda: frame, "h2", "label")
+    assert len(list(tmp_path.iterdir())) == 0
+
+
+def test_encode_inputs_uses_saved_preprocessor(tmp_path, frame):
+    pre = pipeline.TabularPreprocessor.fit(frame, "label")
+    artifact = tmp_path / "m_v1.joblib"
+    artifact.write_bytes(b"")
+    pipeline.joblib.dump(pre, pipeline.registry.preprocessor_path_for(str(artifact)))
+    model_cache.clear()
+
+    X, names, loaded = pipeline.encode_inputs(
+        str(artifact), None, None, {c: frame[c].to_numpy() for c in frame}
+    )
+    assert names == ["city", "visits", "score"]
+    assert loaded.label_classes == ["no", "yes"]
+    assert X.dtype == np.float32
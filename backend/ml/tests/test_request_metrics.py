@@ -0,0 +1,35 @@
+import pytest
+from app.main import app
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    with TestClient(app) as c:
+        yield c
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_record_routes_not_raw_paths(client):
+    count = 'http_requests_total{method="GET",route="/ml/jobs/{job_id}",status="404"}'
+    before = _sample(client.get("/metrics").text, count)
+    client.get("/ml/jobs/abc")
+    client.get("/ml/jobs/def")
+    client.get("/no/such/route")
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert _sample(resp.text, count) == before + 2
+    assert 'route="/ml/jobs/abc"' not in resp.text
+    assert 'route="unmatched",status="404"' in resp.text
+    assert 'http_request_duration_seconds_bucket{le="0.001",method="GET"' in resp.text
+    assert "http_response_size_bytes_count" in resp.text
@@ -0,0 +1,62 @@
+import os
+import runpy
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from app.main import app
+from app.ml import jobs, storage
+from fastapi.testclient import TestClient
+
+GUNICORN_CONF = os.path.join(os.path.dirname(__file__), "..", "gunicorn.conf.py")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    with TestClient(app) as c:
+        yield c
+
+
+def test_health_and_ready(client):
+    assert client.get("/health").json() == {"status": "ok"}
+    resp = client.get("/ready")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ready"}
+
+
+def test_not_ready_without_storage(client, monkeypatch):
+    def broken():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(storage, "get_connection", broken)
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").status_code == 200
+
+
+def test_not_ready_after_shutdown(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with TestClient(app) as c:
+        pass
+    # The lifespan shutdown marks the worker as draining
+    assert c.get("/ready").status_code == 503
+
+
+def test_gunicorn_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setenv("GUNICORN_PRELOAD", "false")
+
+    conf = runpy.run_path(GUNICORN_CONF)
+
+    # CPU-bound: one worker per core by default
+    assert conf["workers"] == os.cpu_count()
+    assert conf["preload_app"] is False
+    conf["on_starting"](None)
+    job = jobs.create_job("train", {})
+    # The exited worker's jobs are failed; nothing else to clean up without
+    # multiprocess metrics
+    conf["child_exit"](None, SimpleNamespace(pid=os.getpid()))
+    assert jobs.get_job(job["job_id"])["status"] == jobs.FAILED
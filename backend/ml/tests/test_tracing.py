@@ -0,0 +1,91 @@
+import logging
+import time
+
+import pytest
+from app.main import app
+from app.ml import jobs, tracing
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.setup_tracing().add_span_processor(SimpleSpanProcessor(exporter))
+    return exporter
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, exporter):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    exporter.clear()
+    with TestClient(app) as c:
+        yield c
+
+
+def test_request_continues_the_callers_trace(client, exporter):
+    resp = client.get(
+        "/ml/jobs/abc", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}
+    )
+    assert resp.status_code == 404
+    assert resp.headers["X-Trace-Id"] == TRACE_ID
+
+    (span,) = [s for s in exporter.get_finished_spans() if s.name.startswith("GET")]
+    assert span.name == "GET /ml/jobs/{job_id}"
+    assert format(span.context.trace_id, "032x") == TRACE_ID
+    assert span.parent.span_id == 0x00F067AA0BA902B7
+    assert span.attributes["http.status_code"] == 404
+
+
+def test_queued_job_joins_the_submitting_trace(client, exporter):
+    with tracing.span("request") as parent:
+        job = jobs.submit("noop", {}, lambda job_id: {"ok": True})
+    for _ in range(100):
+        if jobs.get_job(job["job_id"])["status"] == jobs.SUCCEEDED:
+            break
+        time.sleep(0.01)
+
+    (span,) = [s for s in exporter.get_finished_spans() if s.name == "job noop"]
+    assert span.context.trace_id == parent.get_span_context().trace_id
+    assert span.attributes["job_id"] == job["job_id"]
+
+
+def test_slow_trace_is_logged_with_a_breakdown(caplog):
+    provider = TracerProvider()
+    provider.add_span_processor(tracing.SlowTraceLogger(threshold=0))
+    tracer = provider.get_tracer("test")
+
+    with caplog.at_level(logging.WARNING, logger="app"):
+        with tracer.start_as_current_span("POST /ml/train2"):
+            with tracer.start_as_current_span("read_dataset"):
+                pass
+            with tracer.start_as_current_span("fit"):
+                with tracer.start_as_current_span("evaluate"):
+                    pass
+
+    (record,) = caplog.records
+    lines = record.getMessage().splitlines()
+    assert lines[0].startswith("Slow POST /ml/train2:")
+    assert [line.split(":")[0] for line in lines[1:]] == [
+        "  read_dataset",
+        "  fit",
+        "    evaluate",
+    ]
+
+
+def test_fast_traces_are_not_logged(caplog):
+    provider = TracerProvider()
+    provider.add_span_processor(tracing.SlowTraceLogger(threshold=60))
+    tracer = provider.get_tracer("test")
+
+    with caplog.at_level(logging.WARNING, logger="app"):
+        with tracer.start_as_current_span("GET /ml/models"):
+            pass
+    assert not caplog.records
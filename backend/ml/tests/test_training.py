@@ -0,0 +1,201 @@
+import glob
+import os
+
+import pandas as pd
+import pytest
+from app.ml import (
+    dataset_loader,
+    incremental,
+    jobs,
+    metrics_manager,
+    pipeline,
+    registry,
+    training,
+)
+from sklearn.metrics import confusion_matrix
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    monkeypatch.setattr(training, "TRAINING_NICE", 0)
+    monkeypatch.setattr(
+        pipeline, "ENCODED_CACHE_DIR", str(tmp_path / "saved_models" / "encoded")
+    )
+    monkeypatch.setattr(
+        dataset_loader, "COLUMNAR_DIR", str(tmp_path / "saved_models" / "columnar")
+    )
+    pd.DataFrame(
+        {
+            "city": ["London", "Paris", "Berlin", "London"] * 10,
+            "x": range(40),
+            "label": ["A", "B"] * 20,
+        }
+    ).to_csv("train.csv", index=False)
+
+
+def _params(**overrides):
+    params = {
+        "dataset_path": "train.csv",
+        "label_column": "label",
+        "algorithm": "RandomForestClassifier",
+        "hyperparams": {"n_estimators": 25},
+        "model_name": "rf",
+    }
+    params.update(overrides)
+    return params
+
+
+def test_check_request():
+    with pytest.raises(FileNotFoundError):
+        training.check_request(_params(dataset_path="missing.csv"))
+    with pytest.raises(training.TrainingError, match="Unsupported algorithm"):
+        training.check_request(_params(algorithm="svm"))
+    with pytest.raises(training.TrainingError, match="Label column"):
+        training.check_request(_params(label_column="nope"))
+    # KMeans needs no label column
+    training.check_request(_params(algorithm="kmeans", label_column="nope"))
+
+    open("empty.csv", "w").write("feature,label\n")
+    with pytest.raises(training.TrainingError, match="empty"):
+        training.check_request(_params(dataset_path="empty.csv"))
+
+
+def test_train_reports_tree_progress():
+    job = jobs.create_job("train", {})
+    result = training.train(_params(), job["job_id"])
+
+    assert result["model_id"] == "rf"
+    assert result["version"] == "v1"
+    entry = registry.get_model("rf", "v1")
+    assert [f["name"] for f in entry["feature_schema"]] == ["city", "x"]
+
+    progress = jobs.get_job(job["job_id"])
+    assert progress["progress"] == 1.0
+    assert "Trees completed: 25/25" in progress["logs"]
+    model = training.joblib.load(entry["artifact_path"])
+    assert len(model.estimators_) == 25
+    assert not model.warm_start
+
+
+def test_retraining_reuses_encoded_dataset():
+    first = training.train(_params())
+    second = training.train(_params(hyperparams={"n_estimators": 5}))
+    assert second["version"] == "v2"
+
+    preprocessors = [
+        pipeline.load_preprocessor(registry.get_model("rf", v)["artifact_path"])
+        for v in ("v1", "v2")
+    ]
+    assert preprocessors[0].categories == preprocessors[1].categories
+    assert preprocessors[0].label_classes == ["A", "B"]
+    assert len(os.listdir(pipeline.ENCODED_CACHE_DIR)) == 1
+    assert first["metrics"].keys() == second["metrics"].keys()
+
+
+def test_training_saves_validation_metrics():
+    result = training.train(_params(algorithm="LogisticRegression"))
+    metrics = metrics_manager.get_metrics("rf", "v1")
+    assert metrics == result["metrics"]
+    assert metrics["evaluation"] == "holdout"
+    assert metrics["validation_rows"] == 8 and metrics["n_rows"] == 40
+    assert metrics["n_features"] == 2
+    assert {"accuracy", "precision", "recall", "mse", "train_seconds"} <= set(metrics)
+
+    result = training.train(_params(evaluation="kfold", cv_folds=4))
+    assert result["metrics"]["cv_folds"] == 4
+    assert result["metrics"]["validation_rows"] == 40
+
+    result = training.train(_params(evaluation="none"))
+    assert result["metrics"]["evaluation"] == "training_data"
+
+    with pytest.raises(training.TrainingError, match="evaluation"):
+        training.check_request(_params(evaluation="bootstrap"))
+
+
+def test_training_job_runs_in_subprocess():
+    job = training.submit_training(_params(algorithm="LogisticRegression"))
+    for _ in range(600):
+        job = jobs.get_job(job["job_id"])
+        if job["status"] in (jobs.SUCCEEDED, jobs.FAILED):
+            break
+        training.time.sleep(0.1)
+
+    assert job["status"] == jobs.SUCCEEDED, job["error"]
+    assert job["result"]["model_id"] == "rf"
+    assert "Registered rf v1" in job["logs"]
+
+
+def test_invalid_request_in_subprocess():
+    with pytest.raises(training.TrainingError):
+        training.run_training(None, _params(label_column="nope"))
+
+
+def test_chunked_training_matches_in_memory_encoding():
+    result = training.train(
+        _params(
+            algorithm="LogisticRegression",
+            mode="chunked",
+            chunk_rows=7,
+            hyperparams={"epochs": 3},
+        )
+    )
+    assert result["mode"] == "chunked"
+    assert result["peak_memory_mb"] > 0
+    assert 0.0 <= result["metrics"]["accuracy"] <= 1.0
+
+    entry = registry.get_model("rf", "v1")
+    assert entry["feature_schema"][0] == {"name": "city", "dtype": "object"}
+    model = training.joblib.load(entry["artifact_path"])
+    assert model.feature_names_in_.tolist() == ["city", "x"]
+    # The label is encoded like the features: "A" -> 0, "B" -> 1
+    X = pd.DataFrame({"city": [0, 1, 2], "x": [1, 2, 3]})
+    assert set(model.predict(X)) <= {0, 1}
+
+
+def test_chunked_kmeans_and_unsupported_algorithm():
+    result = training.train(
+        _params(
+            algorithm="kmeans",
+            mode="chunked",
+            chunk_rows=10,
+            hyperparams={"n_clusters": 3},
+        )
+    )
+    assert result["metrics"]["n_clusters"] == 3
+    assert result["metrics"]["inertia"] > 0
+
+    with pytest.raises(training.TrainingError, match="Chunked training"):
+        training.check_request(_params(mode="chunked"))
+
+
+def test_scan_csv_collects_categories_across_chunks(tmp_path):
+    path = tmp_path / "mixed.csv"
+    path.write_text("a,b\n1,x\n2,y\n3,x\nfoo,z\n")
+    scan = incremental.scan_csv(str(path), chunk_rows=2)
+    assert scan.total_rows == 4
+    assert scan.categories == {"a": ["1", "2", "3", "foo"], "b": ["x", "y", "z"]}
+    preprocessor = scan.preprocessor("b")
+    chunks = list(incremental.iter_chunks(str(path), scan, preprocessor, 2))
+    assert [y.tolist() for _, y in chunks] == [[0, 1], [0, 2]]
+    assert chunks[1][0]["a"].tolist() == [2, 3]
+
+
+def test_metrics_from_confusion_matches_sklearn():
+    y_true = [0, 1, 2, 2, 1, 0]
+    y_pred = [0, 2, 2, 2, 0, 0]
+    matrix = confusion_matrix(y_true, y_pred, labels=[0, 1, 2, 3])
+    assert incremental.metrics_from_confusion(matrix) == pytest.approx(
+        training.classification_metrics(y_true, y_pred)
+    )
+
+
+def test_model_name_cannot_escape_the_models_directory():
+    with pytest.raises(training.TrainingError, match="Invalid model name"):
+        training.check_request(_params(model_name="../escaped/pwn"))
+    with pytest.raises(ValueError, match="Invalid model name"):
+        training.train(_params(model_name="../escaped/pwn"))
+
+    assert not os.path.exists("escaped")
+    assert not glob.glob("**/*pwn*", recursive=True)
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.ml import (
+    backends,
+    dataset_loader,
+    jobs,
+    metrics_manager,
+    pipeline,
+    registry,
+    training,
+    tuning,
+)
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ML_DB_PATH", str(tmp_path / "ml_store.db"))
+    monkeypatch.setattr(tuning, "SEARCH_WORKERS", 2)
+    monkeypatch.setattr(
+        pipeline, "ENCODED_CACHE_DIR", str(tmp_path / "saved_models" / "encoded")
+    )
+    monkeypatch.setattr(
+        dataset_loader, "COLUMNAR_DIR", str(tmp_path / "saved_models" / "columnar")
+    )
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=300)
+    pd.DataFrame(
+        {
+            "x": x,
+            "noise": rng.normal(size=300),
+            "city": rng.choice(["London", "Paris", "Berlin"], size=300),
+            "label": np.where(x > 0, "A", "B"),
+        }
+    ).to_csv("train.csv", index=False)
+
+
+def _params(**overrides):
+    params = {
+        "dataset_path": "train.csv",
+        "label_column": "label",
+        "algorithm": "LogisticRegression",
+        "strategy": "grid",
+        "param_grid": {"C": [0.0001, 1.0, 10.0]},
+        "model_name": "tuned",
+    }
+    params.update(overrides)
+    return params
+
+
+def test_check_search_request():
+    tuning.check_search_request(_params())
+    with pytest.raises(training.TrainingError, match="supports"):
+        tuning.check_search_request(_params(algorithm="tensorflow_classifier"))
+    with pytest.raises(training.TrainingError, match="strategy"):
+        tuning.check_search_request(_params(strategy="bayes"))
+    with pytest.raises(training.TrainingError, match="Unknown hyperparameters"):
+        tuning.check_search_request(_params(param_grid={"n_estimators": [1]}))
+    with pytest.raises(training.TrainingError, match="list of values"):
+        tuning.check_search_request(_params(param_grid={"C": {"low": 1, "high": 2}}))
+
+
+def test_candidates():
+    grid = tuning.candidates(
+        _params(param_grid={"C": [1, 2], "max_iter": [100, 200, 300]})
+    )
+    assert len(grid) == 6
+    assert {"C": 2, "max_iter": 300} in grid
+
+    drawn = tuning.candidates(
+        _params(
+            strategy="random",
+            n_trials=5,
+            param_grid={"C": {"low": 0.01, "high": 100.0, "log": True}},
+        )
+    )
+    assert len(drawn) == 5
+    assert all(0.01 <= c["C"] <= 100.0 for c in drawn)
+    assert drawn == tuning.candidates(
+        _params(
+            strategy="random",
+            n_trials=5,
+            param_grid={"C": {"low": 0.01, "high": 100.0, "log": True}},
+        )
+    )
+
+
+def test_halving_rungs_end_on_all_rows():
+    assert tuning._rungs(9, 900, 3) == [100, 300, 900]
+    assert tuning._rungs(1, 900, 3) == [900]
+    assert tuning._rungs(27, 200, 3)[0] == tuning.MIN_HALVING_ROWS
+    assert len(tuning._rungs(27, 2700, 3)) == 4
+
+
+def test_grid_search_registers_best_model_with_trials():
+    job = jobs.create_job("search", {})
+    result = tuning.search(_params(), job["job_id"])
+
+    assert result["model_id"] == "tuned"
+    assert result["best_params"] == {"C": 10.0} or result["best_params"] == {"C": 1.0}
+    assert result["score"] == "accuracy" and result["best_score"] > 0.9
+    entry = registry.get_model("tuned", result["version"])
+    assert entry["hyperparams"] == result["best_params"]
+
+    metrics = metrics_manager.get_metrics("tuned", result["version"], "train.csv")
+    assert len(metrics["trials"]) == 3
+    assert metrics["best_params"] == result["best_params"]
+    assert "Trial 3" in jobs.get_job(job["job_id"])["logs"]
+
+    # Saved through the model backend, like every other artifact
+    backend = backends.for_path(entry["artifact_path"])
+    assert backend is backends.for_algorithm("logisticregression")
+    assert entry["model_file"].endswith(backend.extension)
+    model = backend.load(entry["artifact_path"])
+    assert model.C == result["best_params"]["C"]
+
+
+def test_halving_stops_weak_trials_early():
+    result = tuning.search(
+        _params(
+            algorithm="RandomForestClassifier",
+            strategy="halving",
+            param_grid={"n_estimators": [2, 5], "max_depth": [1, 2, 4]},
+        )
+    )
+    metrics = metrics_manager.get_metrics("tuned", result["version"], "train.csv")
+    rungs = [t["rung"] for t in metrics["trials"]]
+    # 6 candidates on a sample, the best 2 on more rows, the best on all 240
+    assert [rungs.count(rung) for rung in (0, 1, 2)] == [6, 2, 1]
+    sizes = [
+        {t["n_rows"] for t in metrics["trials"] if t["rung"] == rung}
+        for rung in (0, 1, 2)
+    ]
+    assert sizes == [{30}, {80}, {240}]
+
+
+def test_failed_trials_are_recorded():
+    result = tuning.search(
+        _params(algorithm="kmeans", param_grid={"n_clusters": [2, 3, 100000]})
+    )
+    metrics = metrics_manager.get_metrics("tuned", result["version"], "train.csv")
+    failed = [t for t in metrics["trials"] if t["score"] is None]
+    assert len(failed) == 1 and failed[0]["params"] == {"n_clusters": 100000}
+    assert result["score"] == "silhouette"
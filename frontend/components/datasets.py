@@ -0,0 +1,94 @@
+import io
+
+import pandas as pd
+import requests
+import streamlit as st
+
+
+def search_datasets(backend_url: str, headers: dict, q: str = "", page_size=100):
+    """
+    Server-side dataset search (GET /data/search).
+
+    Returns the newest `page_size` datasets matching `q` (substring or word
+    match on the dataset name / file name). Raises requests.HTTPError on
+    a non-2xx response.
+    """
+    params = {"page": 1, "page_size": page_size}
+    if q:
+        params["q"] = q
+    resp = requests.get(f"{backend_url}/data/search", params=params, headers=headers)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def get_dataset_by_name(backend_url: str, headers: dict, name: str):
+    """
+    Look up a single dataset by its exact name (indexed on the server).
+    Returns the dataset dict, or None if there is no such dataset.
+    """
+    resp = requests.get(
+        f"{backend_url}/data/search",
+        params={"name": name, "page": 1, "page_size": 1},
+        headers=headers,
+    )
+    resp.raise_for_status()
+    results = resp.json()
+    return results[0] if results else None
+
+
+def _file_cache() -> dict:
+    # {dataset_id: (etag, bytes)} kept for the lifetime of the Streamlit session
+    return st.session_state.setdefault("dataset_file_cache", {})
+
+
+def fetch_dataset_bytes(backend_url: str, headers: dict, dataset: dict) -> bytes:
+    """
+    Download a dataset file via GET /data/{id}/file.
+
+    The last downloaded copy is kept in the session and revalidated with
+    If-None-Match, so an unchanged file costs a 304 instead of a download.
+    """
+    cache = _file_cache()
+    cached = cache.get(dataset["id"])
+    req_headers = dict(headers)
+    if cached:
+        req_headers["If-None-Match"] = cached[0]
+
+    resp = requests.get(f"{backend_url}/data/{dataset['id']}/file", headers=req_headers)
+    if resp.status_code == 304 and cached:
+        return cached[1]
+    resp.raise_for_status()
+
+    etag = resp.headers.get("ETag")
+    if etag:
+        cache[dataset["id"]] = (etag, resp.content)
+    return resp.content
+
+
+def load_dataset_frame(backend_url: str, headers: dict, dataset: dict):
+    """Load a dataset as a DataFrame (see fetch_dataset_bytes for caching)."""
+    content = fetch_dataset_bytes(backend_url, headers, dataset)
+    return pd.read_csv(io.BytesIO(content))
+
+
+def load_dataset_preview(
+    backend_url: str, headers: dict, dataset: dict, nrows=50, max_bytes=256 * 1024
+):
+    """
+    Load the first `nrows` rows of a dataset, fetching only the first
+    `max_bytes` of the file with an HTTP Range request.
+    """
+    cached = _file_cache().get(dataset["id"])
+    if cached:
+        return pd.read_csv(io.BytesIO(cached[1]), nrows=nrows)
+
+    resp = requests.get(
+        f"{backend_url}/data/{dataset['id']}/file",
+        headers={**headers, "Range": f"bytes=0-{max_bytes - 1}"},
+    )
+    resp.raise_for_status()
+    content = resp.content
+    if resp.status_code == 206:
+        # Drop the trailing partial line
+        content = content[: content.rfind(b"\n") + 1]
+    return pd.read_csv(io.BytesIO(content), nrows=nrows)
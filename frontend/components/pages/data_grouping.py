@@ -1,7 +1,7 @@
 import pandas as pd
-import requests
 import streamlit as st
 
+from ..datasets import load_dataset_frame, search_datasets
 from ..footers import show_footer
 from ..headers import show_header
 from ..recommendations import recommend_visualizations
@@ -18,16 +18,10 @@ def app():
     BACKEND_URL = st.secrets["BACKEND_URL"]
     headers = {"Authorization": f"Bearer {st.session_state.get('auth_token', '')}"}
 
-    # 1) List datasets
+    # 1) Search datasets (server-side)
+    search_text = st.text_input("Search datasets", value="")
     try:
-        resp = requests.get(
-            f"{BACKEND_URL}/data/?page=1&page_size=100", headers=headers
-        )
-        if resp.status_code != 200:
-            st.error(f"Failed to fetch datasets: {resp.text}")
-            show_footer()
-            return
-        datasets = resp.json()
+        datasets = search_datasets(BACKEND_URL, headers, q=search_text)
         if not datasets:
             st.info("No datasets available. Please upload or generate a dataset first.")
             show_footer()
@@ -37,19 +31,15 @@ def app():
         show_footer()
         return
 
-    ds_names = [d["name"] for d in datasets]
-    chosen_ds_name = st.selectbox("Select a Dataset to View/Group", ds_names)
-    chosen_ds = next((d for d in datasets if d["name"] == chosen_ds_name), None)
-
-    if not chosen_ds:
-        st.warning("Could not find the chosen dataset.")
-        show_footer()
-        return
-
-    file_url = f"{BACKEND_URL}/uploads/{chosen_ds['file_name']}"
+    chosen_ds = st.selectbox(
+        "Select a Dataset to View/Group",
+        datasets,
+        format_func=lambda d: d["name"],
+    )
+    chosen_ds_name = chosen_ds["name"]
 
     try:
-        df = pd.read_csv(file_url)
+        df = load_dataset_frame(BACKEND_URL, headers, chosen_ds)
         if df.empty:
             st.warning("This dataset is empty.")
             show_footer()
@@ -3,6 +3,7 @@ import plotly.express as px
 import requests
 import streamlit as st
 
+from ..datasets import load_dataset_frame, search_datasets
 from ..footers import show_footer
 from ..headers import show_header
 from ..recommendations import recommend_visualizations
@@ -19,41 +20,35 @@ def app():
     BACKEND_URL = st.secrets["BACKEND_URL"]
     headers = {"Authorization": f"Bearer {st.session_state.get('auth_token', '')}"}
 
-    # Fetch the user's datasets (including both uploaded and generated)
+    # Search the user's datasets (including both uploaded and generated)
+    search_text = st.text_input("Search datasets", value="")
     try:
-        response = requests.get(
-            f"{BACKEND_URL}/data/?page=1&page_size=100", headers=headers
-        )
-        if response.status_code == 200:
-            datasets = response.json()
-            if not datasets:
-                st.info("No datasets available.")
-                show_footer()
-                return
-        else:
-            st.error(
-                f"Failed to fetch datasets: {response.json().get('detail', 'Unknown error.')}"
-            )
+        datasets = search_datasets(BACKEND_URL, headers, q=search_text)
+        if not datasets:
+            st.info("No datasets available.")
             show_footer()
             return
+    except requests.exceptions.HTTPError as e:
+        st.error(
+            f"Failed to fetch datasets: "
+            f"{e.response.json().get('detail', 'Unknown error.')}"
+        )
+        show_footer()
+        return
     except Exception as e:
         st.error(f"Error fetching datasets: {e}")
         show_footer()
         return
 
     # Let user choose a dataset by name
-    dataset_names = [ds["name"] for ds in datasets]
-    selected_dataset = st.selectbox("Select a Dataset", dataset_names)
-    selected = next((ds for ds in datasets if ds["name"] == selected_dataset), None)
-    if not selected:
-        st.warning("Dataset not found.")
-        show_footer()
-        return
+    selected = st.selectbox(
+        "Select a Dataset", datasets, format_func=lambda ds: ds["name"]
+    )
+    selected_dataset = selected["name"]
 
     # Load the CSV
-    file_url = f"{BACKEND_URL}/uploads/{selected['file_name']}"
     try:
-        data = pd.read_csv(file_url)
+        data = load_dataset_frame(BACKEND_URL, headers, selected)
         if data.empty:
             st.warning("Selected dataset is empty.")
             show_footer()
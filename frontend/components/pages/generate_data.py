@@ -2,6 +2,7 @@ import pandas as pd
 import requests
 import streamlit as st
 
+from ..datasets import load_dataset_frame
 from ..footers import show_footer
 from ..headers import show_header
 
@@ -46,11 +47,9 @@ def app():
                             file_name = ds["file_name"]
                             dataset_name = ds["name"]
                             dataset_id = ds["id"]
-                            file_url = f"{BACKEND_URL}/uploads/{file_name}"
-
                             # Attempt to read CSV to get shape
                             try:
-                                df = pd.read_csv(file_url)
+                                df = load_dataset_frame(BACKEND_URL, headers, ds)
                                 rows, cols_count = df.shape
                                 st.write(
                                     f"**{dataset_name}**\n"
@@ -1,10 +1,34 @@
+import time
+
 import pandas as pd
 import requests
 import streamlit as st
 
+from .. import tracing
+from ..datasets import (
+    fetch_dataset_bytes,
+    get_dataset_by_name,
+    load_dataset_preview,
+    search_datasets,
+)
 from ..footers import show_footer
 from ..headers import show_header
 
+# Hyperparameter the wizard can search over, per algorithm
+SEARCH_PARAMS = {
+    "LogisticRegression": "C",
+    "RandomForestClassifier": "n_estimators",
+    "KMeans": "n_clusters",
+}
+SEARCH_DEFAULTS = {
+    "LogisticRegression": "0.01, 0.1, 1, 10, 100",
+    "RandomForestClassifier": "50, 100, 200",
+    "KMeans": "2, 3, 4, 5, 6",
+}
+
+# Metrics shown as scores in step 6
+SCORE_METRICS = ("accuracy", "precision", "recall", "mse", "silhouette")
+
 
 def app():
     """
@@ -33,402 +57,611 @@ def app():
     if "wizard_step" not in st.session_state:
         st.session_state["wizard_step"] = 1
 
-    # -------------------------------------------------------------------
-    # STEP 1: Select a Dataset
-    # -------------------------------------------------------------------
     if st.session_state["wizard_step"] == 1:
-        st.subheader("Step 1: Choose a dataset")
+        choose_dataset(BACKEND_URL, headers)
+    elif st.session_state["wizard_step"] == 2:
+        choose_problem_type()
+    elif st.session_state["wizard_step"] == 3:
+        choose_algorithm()
+    elif st.session_state["wizard_step"] == 4:
+        choose_label_column(BACKEND_URL, headers)
+    elif st.session_state["wizard_step"] == 5:
+        train_model(BACKEND_URL, headers)
+    elif st.session_state["wizard_step"] == 6:
+        show_metrics(ML_BACKEND_URL, headers)
+    elif st.session_state["wizard_step"] == 7:
+        make_predictions(BACKEND_URL, ML_BACKEND_URL, headers)
 
-        # Fetch datasets from the backend
-        try:
-            resp = requests.get(
-                f"{BACKEND_URL}/data/?page=1&page_size=100", headers=headers
-            )
-            if resp.status_code == 200:
-                datasets = resp.json()
-                if not datasets:
-                    st.info("No datasets found. Please upload or generate one.")
-                    show_footer()
-                    return
-            else:
-                st.error(f"Failed to fetch datasets: {resp.text}")
-                show_footer()
-                return
-        except Exception as e:
-            st.error(f"Error fetching datasets: {e}")
+
+def choose_dataset(backend_url, headers):
+    """
+    Step 1: select a dataset.
+    """
+    st.subheader("Step 1: Choose a dataset")
+
+    # Search datasets on the backend
+    search_text = st.text_input("Search datasets", value="")
+    try:
+        datasets = search_datasets(backend_url, headers, q=search_text)
+        if not datasets:
+            st.info("No datasets found. Please upload or generate one.")
             show_footer()
             return
+    except requests.exceptions.HTTPError as e:
+        st.error(f"Failed to fetch datasets: {e.response.text}")
+        show_footer()
+        return
+    except Exception as e:
+        st.error(f"Error fetching datasets: {e}")
+        show_footer()
+        return
 
-        ds_names = [d["name"] for d in datasets]
-        chosen_ds_name = st.selectbox(
-            "Pick a dataset to train on",
-            options=ds_names,
-        )
-
-        # Next button
-        if st.button("Next Step"):
-            # Store chosen dataset in session_state
-            st.session_state["chosen_dataset_name"] = chosen_ds_name
-            # Move wizard step forward
-            st.session_state["wizard_step"] = 2
-            st.rerun()
+    ds_names = [d["name"] for d in datasets]
+    chosen_ds_name = st.selectbox(
+        "Pick a dataset to train on",
+        options=ds_names,
+    )
 
-    # -------------------------------------------------------------------
-    # STEP 2: Problem Type
-    # -------------------------------------------------------------------
-    elif st.session_state["wizard_step"] == 2:
-        st.subheader("Step 2: Choose the type of problem")
+    # Next button
+    if st.button("Next Step"):
+        # Store chosen dataset in session_state
+        st.session_state["chosen_dataset_name"] = chosen_ds_name
+        # Move wizard step forward
+        st.session_state["wizard_step"] = 2
+        st.rerun()
 
-        # We'll let user pick "Classification", "Regression", or "Clustering"
-        problem_type = st.radio(
-            "Problem type:",
-            ["Classification", "Regression", "Clustering"],
-            index=0,
-        )
 
-        st.markdown(
-            """
-        **Hint for beginners**:
-        - **Classification** is used when your target is a discrete category (e.g. Yes/No).
-        - **Regression** is used when you want to predict a continuous numeric value (e.g. price).
-        - **Clustering** is used when you have no explicit label column and want to group data automatically.
-        """
-        )
+def choose_problem_type():
+    """
+    Step 2: problem type.
+    """
+    st.subheader("Step 2: Choose the type of problem")
 
-        if st.button("Next Step"):
-            st.session_state["problem_type"] = problem_type
-            st.session_state["wizard_step"] = 3
-            st.rerun()
+    # We'll let user pick "Classification", "Regression", or "Clustering"
+    problem_type = st.radio(
+        "Problem type:",
+        ["Classification", "Regression", "Clustering"],
+        index=0,
+    )
 
-    # -------------------------------------------------------------------
-    # STEP 3: Choose Algorithm
-    # -------------------------------------------------------------------
-    elif st.session_state["wizard_step"] == 3:
-        st.subheader("Step 3: Pick an algorithm (or let the system auto-select)")
-
-        problem_type = st.session_state.get("problem_type", "Classification")
-        algo_options = []
-        if problem_type == "Classification":
-            algo_options = ["LogisticRegression", "RandomForestClassifier"]
-        elif problem_type == "Regression":
-            # For demonstration, let's say we do "LogisticRegression" for regression or add "LinearRegression"
-            algo_options = ["LogisticRegression"]  # as a placeholder
-        else:
-            # Clustering
-            algo_options = ["KMeans"]
+    st.markdown(
+        """
+    **Hint for beginners**:
+    - **Classification** is used when your target is a discrete category (e.g. Yes/No).
+    - **Regression** is used when you want to predict a continuous numeric value (e.g. price).
+    - **Clustering** is used when you have no explicit label column and want to group data automatically.
+    """
+    )
 
-        chosen_algo = st.selectbox("Select an algorithm", algo_options)
-        st.session_state["chosen_algo"] = chosen_algo
+    if st.button("Next Step"):
+        st.session_state["problem_type"] = problem_type
+        st.session_state["wizard_step"] = 3
+        st.rerun()
 
-        # Let user pick if they want advanced hyperparameters or not
-        advanced = st.checkbox("Show advanced hyperparameters?", value=False)
 
+def choose_algorithm():
+    """
+    Step 3: choose algorithm.
+    """
+    st.subheader("Step 3: Pick an algorithm (or let the system auto-select)")
+
+    problem_type = st.session_state.get("problem_type", "Classification")
+    algo_options = []
+    if problem_type == "Classification":
+        algo_options = ["LogisticRegression", "RandomForestClassifier"]
+    elif problem_type == "Regression":
+        # For demonstration, let's say we do "LogisticRegression" for regression or add "LinearRegression"
+        algo_options = ["LogisticRegression"]  # as a placeholder
+    else:
+        # Clustering
+        algo_options = ["KMeans"]
+
+    chosen_algo = st.selectbox("Select an algorithm", algo_options)
+    st.session_state["chosen_algo"] = chosen_algo
+
+    # Let user pick if they want advanced hyperparameters or not
+    advanced = st.checkbox("Show advanced hyperparameters?", value=False)
+
+    hyperparams = {}
+    if advanced:
+        st.write("You can adjust hyperparams here:")
+        # Just examples:
+        if chosen_algo == "LogisticRegression":
+            c_val = st.number_input(
+                "C (regularization)", value=1.0, min_value=0.01, max_value=100000.0
+            )
+            hyperparams["C"] = c_val
+        elif chosen_algo == "RandomForestClassifier":
+            n_est = st.number_input(
+                "Number of trees (n_estimators)",
+                value=100,
+                min_value=1,
+                max_value=10000,
+            )
+            hyperparams["n_estimators"] = int(n_est)
+        elif chosen_algo == "KMeans":
+            n_clusters = st.number_input(
+                "Number of clusters (n_clusters)",
+                value=2,
+                min_value=1,
+                max_value=100,
+            )
+            hyperparams["n_clusters"] = int(n_clusters)
+    else:
+        # Use default hyperparams if advanced is not checked
         hyperparams = {}
-        if advanced:
-            st.write("You can adjust hyperparams here:")
-            # Just examples:
-            if chosen_algo == "LogisticRegression":
-                c_val = st.number_input(
-                    "C (regularization)", value=1.0, min_value=0.01, max_value=100000.0
-                )
-                hyperparams["C"] = c_val
-            elif chosen_algo == "RandomForestClassifier":
-                n_est = st.number_input(
-                    "Number of trees (n_estimators)",
-                    value=100,
-                    min_value=1,
-                    max_value=10000,
-                )
-                hyperparams["n_estimators"] = int(n_est)
-            elif chosen_algo == "KMeans":
-                n_clusters = st.number_input(
-                    "Number of clusters (n_clusters)",
-                    value=2,
-                    min_value=1,
-                    max_value=100,
-                )
-                hyperparams["n_clusters"] = int(n_clusters)
+
+    if st.button("Next Step"):
+        st.session_state["hyperparams"] = hyperparams
+        # If classification/regression, we go to step 4 (choose label)
+        # If clustering, skip directly to step 5 (train)
+        if problem_type in ["Classification", "Regression"]:
+            st.session_state["wizard_step"] = 4
         else:
-            # Use default hyperparams if advanced is not checked
-            hyperparams = {}
-
-        if st.button("Next Step"):
-            st.session_state["hyperparams"] = hyperparams
-            # If classification/regression, we go to step 4 (choose label)
-            # If clustering, skip directly to step 5 (train)
-            if problem_type in ["Classification", "Regression"]:
-                st.session_state["wizard_step"] = 4
-            else:
-                st.session_state["wizard_step"] = 5
-            st.rerun()
+            st.session_state["wizard_step"] = 5
+        st.rerun()
 
-    # -------------------------------------------------------------------
-    # STEP 4: Choose Label Column (only for supervised)
-    # -------------------------------------------------------------------
-    elif st.session_state["wizard_step"] == 4:
-        st.subheader("Step 4: Choose your target (label) column")
 
-        # Retrieve dataset info from session
-        chosen_ds_name = st.session_state["chosen_dataset_name"]
-        problem_type = st.session_state["problem_type"]
-        # We need to fetch dataset detail or sample
-        try:
-            # Might need the actual dataset ID from name:
-            ds_resp = requests.get(
-                f"{BACKEND_URL}/data/?page=1&page_size=100", headers=headers
-            )
-            ds_resp.raise_for_status()
-            all_datasets = ds_resp.json()
-            chosen_ds = next(
-                (d for d in all_datasets if d["name"] == chosen_ds_name), None
-            )
+def choose_label_column(backend_url, headers):
+    """
+    Step 4: choose label column (only for supervised).
+    """
+    st.subheader("Step 4: Choose your target (label) column")
 
-            if not chosen_ds:
-                st.error("Could not find the chosen dataset details.")
-                show_footer()
-                return
+    # Retrieve dataset info from session
+    chosen_ds_name = st.session_state["chosen_dataset_name"]
+    problem_type = st.session_state["problem_type"]
+    # We need to fetch dataset detail or sample
+    try:
+        # Might need the actual dataset ID from name:
+        chosen_ds = get_dataset_by_name(backend_url, headers, chosen_ds_name)
 
-            file_url = f"{BACKEND_URL}/uploads/{chosen_ds['file_name']}"
-            df_sample = pd.read_csv(file_url, nrows=50)  # just load partial for display
-            columns = df_sample.columns.tolist()
-        except Exception as e:
-            st.error(f"Error reading dataset: {e}")
+        if not chosen_ds:
+            st.error("Could not find the chosen dataset details.")
             show_footer()
             return
 
-        st.write(f"Dataset: **{chosen_ds_name}** | Columns preview:")
-        st.dataframe(df_sample.head())
+        # just load the first rows (HTTP Range) for display
+        df_sample = load_dataset_preview(backend_url, headers, chosen_ds, nrows=50)
+        columns = df_sample.columns.tolist()
+    except Exception as e:
+        st.error(f"Error reading dataset: {e}")
+        show_footer()
+        return
+
+    st.write(f"Dataset: **{chosen_ds_name}** | Columns preview:")
+    st.dataframe(df_sample.head())
+
+    label_col = st.selectbox("Which column is your target (label)?", options=columns)
+    if st.button("Next Step (Train)"):
+        st.session_state["label_column"] = label_col
+        st.session_state["wizard_step"] = 5
+        st.rerun()
+
+
+def train_model(backend_url, headers):
+    """
+    Step 5: train the model.
+    """
+    st.subheader("Step 5: Train the model")
 
-        label_col = st.selectbox(
-            "Which column is your target (label)?", options=columns
+    chosen_ds_name = st.session_state["chosen_dataset_name"]
+    problem_type = st.session_state["problem_type"]
+    chosen_algo = st.session_state["chosen_algo"]
+    hyperparams = st.session_state["hyperparams"]
+
+    # We fetch the dataset ID from name again:
+    chosen_ds = get_dataset_by_name(backend_url, headers, chosen_ds_name)
+    if not chosen_ds:
+        st.error("Could not find chosen dataset ID.")
+        show_footer()
+        return
+
+    # If supervised, get label column from state
+    label_col = st.session_state.get("label_column", "")
+
+    training_mode = st.radio(
+        "Training mode",
+        options=["in_memory", "chunked"],
+        format_func=lambda m: {
+            "in_memory": "In memory (fastest for datasets that fit in RAM)",
+            "chunked": "Chunked (streams large datasets from disk)",
+        }[m],
+    )
+
+    # Instead of one value per run, try several in one search job
+    search_param = SEARCH_PARAMS.get(chosen_algo)
+    search_grid = None
+    if search_param and st.checkbox(
+        f"Search for the best {search_param} (trains one model per value)"
+    ):
+        values_text = st.text_input(
+            f"Values of {search_param} to try (comma-separated)",
+            value=SEARCH_DEFAULTS[chosen_algo],
         )
-        if st.button("Next Step (Train)"):
-            st.session_state["label_column"] = label_col
-            st.session_state["wizard_step"] = 5
+        search_strategy = st.radio(
+            "Search strategy",
+            options=["grid", "halving"],
+            format_func=lambda s: {
+                "grid": "Grid (every value on the full data)",
+                "halving": "Successive halving (drops weak values early)",
+            }[s],
+        )
+        try:
+            cast = int if chosen_algo != "LogisticRegression" else float
+            search_grid = {
+                search_param: [cast(v) for v in values_text.split(",") if v.strip()]
+            }
+        except ValueError:
+            st.error(f"{search_param} values must be numbers.")
+
+    # Training runs as a background job on backend-ml, queued through the API
+    # (which rate-limits it); we poll its progress
+    if st.button("Start Training"):
+        payload = {
+            "dataset_id": chosen_ds["id"],
+            "label_column": label_col,
+            "algorithm": chosen_algo,
+            "hyperparams": hyperparams,
+            "mode": training_mode,
+        }
+        endpoint = "/ml/train"
+        if search_grid:
+            payload = {
+                "dataset_id": chosen_ds["id"],
+                "label_column": label_col,
+                "algorithm": chosen_algo,
+                "strategy": search_strategy,
+                "param_grid": search_grid,
+            }
+            endpoint = "/ml/search"
+        job_id = start_training_job(backend_url, headers, endpoint, payload)
+        if job_id:
+            st.session_state["training_job"] = job_id
+
+    job_id = st.session_state.get("training_job")
+    if job_id:
+        resp_data = wait_for_training_job(backend_url, headers, job_id)
+        del st.session_state["training_job"]
+        if resp_data:
+            st.success("Model trained successfully!")
+            # Optionally store the name of model_file returned
+            st.session_state["trained_model_file"] = resp_data.get("model_file", None)
+            st.session_state["trained_model_id"] = resp_data.get("model_id")
+            st.session_state["trained_model_version"] = resp_data.get(
+                "version", "latest"
+            )
+            st.session_state["training_stats"] = {
+                "wall_seconds": resp_data.get("wall_seconds"),
+                "peak_memory_mb": resp_data.get("peak_memory_mb"),
+            }
+            # Move to step 6
+            st.session_state["wizard_step"] = 6
             st.rerun()
 
-    # -------------------------------------------------------------------
-    # STEP 5: Train the model
-    # -------------------------------------------------------------------
-    elif st.session_state["wizard_step"] == 5:
-        st.subheader("Step 5: Train the model")
 
-        chosen_ds_name = st.session_state["chosen_dataset_name"]
-        problem_type = st.session_state["problem_type"]
-        chosen_algo = st.session_state["chosen_algo"]
-        hyperparams = st.session_state["hyperparams"]
+def show_metrics(ml_backend_url, headers):
+    """
+    Step 6: view metrics.
+    """
+    st.subheader("Step 6: View performance metrics")
+
+    # We can attempt to retrieve metrics from the backend-ml or from /ml/metrics
+    # E.g. if your ML container exposes GET /ml/metrics/<model_name>/<version>
+    # or we simply show a minimal output if we haven't integrated robust metrics
+    st.markdown(
+        "Below are the computed metrics for the newly trained model (if available)."
+    )
+
+    # We'll try to see if there's a standard name from st.session_state["trained_model_file"]
+    model_file = st.session_state.get("trained_model_file", "")
+    if model_file:
+        st.write(f"Trained model file: **{model_file}**")
+        stats = st.session_state.get("training_stats") or {}
+        if stats.get("wall_seconds") is not None:
+            st.write(
+                f"Training took **{stats['wall_seconds']:.1f}s** with a peak "
+                f"memory use of **{stats['peak_memory_mb']:.0f} MB**."
+            )
 
-        # We fetch the dataset ID from name again:
-        ds_resp = requests.get(
-            f"{BACKEND_URL}/data/?page=1&page_size=100", headers=headers
+        # We can attempt an endpoint like GET /ml/metrics/model_file/v1
+        # or if you store metrics in memory:
+        model_id = st.session_state.get("trained_model_id") or model_file
+        version = st.session_state.get("trained_model_version", "latest")
+        metrics_url = f"{ml_backend_url}/ml/metrics/{model_id}/{version}"
+        try:
+            metrics_resp = requests.get(metrics_url, headers=headers)
+            if metrics_resp.status_code == 200:
+                metrics_json = metrics_resp.json()
+                if metrics_json.get("validation_rows"):
+                    st.write(
+                        f"Scored on **{metrics_json['validation_rows']}** "
+                        f"held-out rows of {metrics_json.get('n_rows')} "
+                        f"({metrics_json.get('evaluation')})."
+                    )
+                elif metrics_json.get("evaluation") == "training_data":
+                    st.caption("These metrics were computed on the training data.")
+                # Scores side by side; sizes and timings stay in the JSON
+                numeric_entries = {
+                    k: metrics_json[k]
+                    for k in SCORE_METRICS
+                    if isinstance(metrics_json.get(k), (int, float))
+                }
+                if numeric_entries:
+                    columns = st.columns(len(numeric_entries))
+                    for column, (k, v) in zip(columns, numeric_entries.items()):
+                        column.metric(k.capitalize(), f"{v:.3f}")
+                    st.bar_chart(
+                        pd.DataFrame(
+                            numeric_entries.values(),
+                            index=numeric_entries.keys(),
+                            columns=["Value"],
+                        )
+                    )
+                st.json(metrics_json)
+            else:
+                st.info(
+                    "No specific metrics found or metrics endpoint not implemented."
+                )
+        except Exception as e:
+            st.info(f"Unable to fetch metrics automatically: {e}")
+    else:
+        st.info(
+            "No model file name found. Possibly training did not return a standard name."
         )
-        ds_resp.raise_for_status()
-        all_datasets = ds_resp.json()
-        chosen_ds = next((d for d in all_datasets if d["name"] == chosen_ds_name), None)
-        if not chosen_ds:
-            st.error("Could not find chosen dataset ID.")
-            show_footer()
-            return
 
-        # If supervised, get label column from state
-        label_col = st.session_state.get("label_column", "")
+    st.markdown(
+        """
+    **Basic Metrics Explanation**:
+    - **Accuracy**: how many predictions are correct out of all.
+    - **Precision**: among predicted positives, how many are truly positive.
+    - **Recall**: among actual positives, how many did we capture as positive.
+    - **MSE**: Mean Squared Error; for classifiers, of the predicted class probabilities.
+    - **Silhouette**: how well separated the clusters are (-1 to 1, higher is better).
+    """
+    )
 
-        # We'll call /ml/train2
-        if st.button("Start Training"):
+    # Next Step button
+    if st.button("Next Step (Make Predictions)"):
+        st.session_state["wizard_step"] = 7
+        st.rerun()
+
+
+def make_predictions(backend_url, ml_backend_url, headers):
+    """
+    Step 7: make predictions.
+    """
+    st.subheader("Step 7: Make predictions using the trained model")
+
+    st.markdown(
+        """
+    ### Option A: Single Data Point
+    Please enter values for each feature.
+    """
+    )
+
+    # Input fields follow the feature schema recorded when the model was trained
+    model_id = st.session_state.get("trained_model_id")
+    version = st.session_state.get("trained_model_version") or "latest"
+    feature_schema = []
+    if model_id:
+        try:
+            entry_resp = requests.get(
+                f"{ml_backend_url}/ml/models/{model_id}/{version}",
+                headers=headers,
+            )
+            if entry_resp.status_code == 200:
+                feature_schema = entry_resp.json().get("feature_schema", [])
+        except Exception as e:
+            st.info(f"Unable to fetch the model's features: {e}")
+    if not feature_schema:
+        feature_schema = [
+            {"name": "feature1", "dtype": "float64"},
+            {"name": "feature2", "dtype": "float64"},
+        ]
+
+    row = {}
+    for feature in feature_schema:
+        if feature["dtype"].startswith(("int", "uint", "float", "bool")):
+            row[feature["name"]] = st.number_input(feature["name"], value=0.0)
+        else:
+            row[feature["name"]] = st.text_input(feature["name"])
+
+    if st.button("Predict Single"):
+        model_file = st.session_state.get("trained_model_file", None)
+        if not model_file:
+            st.error("No model_file found in session. Make sure training is complete.")
+        else:
             payload = {
-                "dataset_path": f"uploads/{chosen_ds['file_name']}",
-                "label_column": label_col,
-                "algorithm": chosen_algo,
-                "hyperparams": hyperparams,
+                "model_name": st.session_state.get("trained_model_id")
+                or model_file.replace(".joblib", ""),
+                "version": st.session_state.get("trained_model_version"),
+                "data": [row],
             }
             try:
-                train_resp = requests.post(
-                    f"{ML_BACKEND_URL}/ml/train2",
+                # Through the API, which applies the "predict" rate limit
+                r = requests.post(
+                    f"{backend_url}/ml/predict",
                     json=payload,
                     headers=headers,
                 )
-                if train_resp.status_code == 200:
-                    st.success("Model trained successfully!")
-                    # Optionally store the name of model_file returned
-                    resp_data = train_resp.json()
-                    st.session_state["trained_model_file"] = resp_data.get(
-                        "model_file", None
-                    )
-                    # Move to step 6
-                    st.session_state["wizard_step"] = 6
-                    st.rerun()
+                if r.status_code == 200:
+                    out = r.json()
+                    preds = out.get("predictions", [])
+                    probs = out.get("probabilities", [])
+                    st.success(f"Prediction: {preds}, Probability: {probs}")
                 else:
-                    st.error(f"Training failed: {train_resp.text}")
+                    st.error(f"Prediction failed: {r.text}")
             except Exception as e:
-                st.error(f"Error calling train endpoint: {e}")
+                st.error(f"Error: {e}")
 
-    # -------------------------------------------------------------------
-    # STEP 6: View metrics
-    # -------------------------------------------------------------------
-    elif st.session_state["wizard_step"] == 6:
-        st.subheader("Step 6: View performance metrics")
+    st.markdown("---")
+    st.markdown(
+        """
+    ### Option B: Batch Prediction with CSV
+    You can upload a CSV file with the same columns that the model expects.
+    """
+    )
 
-        # We can attempt to retrieve metrics from the backend-ml or from /ml/metrics
-        # E.g. if your ML container exposes GET /ml/metrics/<model_name>/<version>
-        # or we simply show a minimal output if we haven't integrated robust metrics
-        st.markdown(
-            "Below are the computed metrics for the newly trained model (if available)."
-        )
+    file_up = st.file_uploader("Upload CSV", type=["csv"])
+    if file_up:
+        st.write("Preview of your uploaded CSV:")
+        st.dataframe(pd.read_csv(file_up, nrows=5))
 
-        # We'll try to see if there's a standard name from st.session_state["trained_model_file"]
-        model_file = st.session_state.get("trained_model_file", "")
-        if model_file:
-            st.write(f"Trained model file: **{model_file}**")
+        if st.button("Make Batch Predictions"):
+            model_file = st.session_state.get("trained_model_file", None)
+            if not model_file:
+                st.error("No model_file found in session.")
+            else:
+                # Large files are predicted by a background job on backend-ml,
+                # which streams the CSV in chunks and writes a new dataset
+                st.session_state["batch_prediction_job"] = start_batch_prediction(
+                    backend_url,
+                    headers,
+                    file_up,
+                    st.session_state.get("trained_model_id")
+                    or model_file.replace(".joblib", ""),
+                    st.session_state.get("trained_model_version"),
+                )
 
-            # We can attempt an endpoint like GET /ml/metrics/model_file/v1
-            # or if you store metrics in memory:
-            metrics_url = f"{ML_BACKEND_URL}/ml/metrics/{model_file}/v1"
-            try:
-                metrics_resp = requests.get(metrics_url, headers=headers)
-                if metrics_resp.status_code == 200:
-                    metrics_json = metrics_resp.json()
-                    st.json(metrics_json)
-                    # We can also visualize as a bar chart if numeric
-                    numeric_entries = {
-                        k: v
-                        for k, v in metrics_json.items()
-                        if isinstance(v, (int, float))
-                    }
-                    if numeric_entries:
-                        st.bar_chart(
-                            pd.DataFrame(
-                                numeric_entries.values(),
-                                index=numeric_entries.keys(),
-                                columns=["Value"],
-                            )
-                        )
-                else:
-                    st.info(
-                        "No specific metrics found or metrics endpoint not implemented."
-                    )
-            except Exception as e:
-                st.info(f"Unable to fetch metrics automatically: {e}")
-        else:
-            st.info(
-                "No model file name found. Possibly training did not return a standard name."
-            )
+    job_id = st.session_state.get("batch_prediction_job")
+    if job_id:
+        show_batch_prediction_job(backend_url, headers, job_id)
 
-        st.markdown(
-            """
-        **Basic Metrics Explanation**:
-        - **Accuracy**: how many predictions are correct out of all.
-        - **Precision**: among predicted positives, how many are truly positive.
-        - **Recall**: among actual positives, how many did we capture as positive.
-        - **MSE**: Mean Squared Error, relevant for regression.
-        """
-        )
+    st.markdown(
+        "**End of Wizard**: You have successfully trained a model, checked metrics, and made predictions!"
+    )
+    show_footer()
 
-        # Next Step button
-        if st.button("Next Step (Make Predictions)"):
-            st.session_state["wizard_step"] = 7
-            st.rerun()
 
-    # -------------------------------------------------------------------
-    # STEP 7: Make predictions
-    # -------------------------------------------------------------------
-    elif st.session_state["wizard_step"] == 7:
-        st.subheader("Step 7: Make predictions using the trained model")
+def start_training_job(backend_url, headers, endpoint, payload):
+    """
+    Queue a training or search job through the API. Returns the job id, or
+    None after showing why it was refused (e.g. 429 when over the limits).
+    """
+    try:
+        # The trace id comes back in X-Trace-Id; the backend spans of the
+        # job share it
+        with tracing.span("start_training", algorithm=payload["algorithm"]):
+            train_resp = requests.post(
+                f"{backend_url}{endpoint}",
+                json=payload,
+                headers=tracing.traced_headers(headers),
+            )
+    except Exception as e:
+        st.error(f"Error calling train endpoint: {e}")
+        return None
+    if train_resp.status_code != 202:
+        st.error(f"Training failed: {train_resp.text}")
+        return None
+    return train_resp.json()["job_id"]
 
-        st.markdown(
-            """
-        ### Option A: Single Data Point
-        Please enter values for each feature.
-        """
-        )
 
-        # If we want to show dynamic input fields, we need the columns except the label
-        # This is just a simplified approach (hardcoded feature1, feature2).
-        # In a real scenario, you'd parse the dataset or store the feature list somewhere.
+def wait_for_training_job(backend_url, headers, job_id):
+    """
+    Poll a training job, showing its progress and log, until it finishes.
+    Returns the job's result (model id, version, file) or None on failure.
+    """
+    progress_bar = st.progress(0.0, text="Training queued...")
+    log_box = st.empty()
+    while True:
+        try:
+            r = requests.get(f"{backend_url}/ml/jobs/{job_id}", headers=headers)
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return None
+        if r.status_code != 200:
+            st.error(f"Unable to fetch the training job: {r.text}")
+            return None
+        job = r.json()
+        log_box.code(job["logs"] or "Waiting for a training slot...")
+        if job["status"] not in ("queued", "running"):
+            break
+        progress_bar.progress(job["progress"], text=f"Training {job['status']}...")
+        time.sleep(1)
+
+    progress_bar.empty()
+    if job["status"] != "succeeded":
+        st.error(f"Training failed: {job.get('error')}")
+        return None
+    return job["result"]
+
+
+def start_batch_prediction(backend_url, headers, file_up, model_name, version):
+    """
+    Upload the CSV as a dataset and queue a batch prediction job for it.
+    Returns the job id, or None if either step failed.
+    """
+    # The upload and the job share one trace across backend-api and backend-ml
+    with tracing.span("start_batch_prediction", model_name=model_name):
+        headers = tracing.traced_headers(headers)
+        try:
+            upload = requests.post(
+                f"{backend_url}/data/upload",
+                data={
+                    "name": f"{model_name} input {file_up.name}",
+                    "overwrite": "true",
+                },
+                files={"file": (file_up.name, file_up.getvalue(), "text/csv")},
+                headers=headers,
+            )
+            if upload.status_code != 200:
+                st.error(f"Failed to upload the CSV: {upload.text}")
+                return None
+            r = requests.post(
+                f"{backend_url}/ml/batch-predict",
+                json={
+                    "dataset_id": upload.json()["id"],
+                    "model_name": model_name,
+                    "version": version,
+                },
+                headers=headers,
+            )
+            if r.status_code != 202:
+                st.error(f"Batch prediction failed: {r.text}")
+                return None
+            return r.json()["job_id"]
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return None
 
-        feat1 = st.number_input("Feature1", value=0.0)
-        feat2 = st.number_input("Feature2", value=0.0)
 
-        if st.button("Predict Single"):
-            model_file = st.session_state.get("trained_model_file", None)
-            if not model_file:
-                st.error(
-                    "No model_file found in session. Make sure training is complete."
-                )
-            else:
-                payload = {
-                    "model_name": model_file.replace(
-                        ".joblib", ""
-                    ),  # or exactly model_file if needed
-                    "data": [{"feature1": feat1, "feature2": feat2}],
-                }
-                try:
-                    r = requests.post(
-                        f"{ML_BACKEND_URL}/predict2",  # or /ml/predict2
-                        json=payload,
-                        headers=headers,
-                    )
-                    if r.status_code == 200:
-                        out = r.json()
-                        preds = out.get("predictions", [])
-                        probs = out.get("probabilities", [])
-                        st.success(f"Prediction: {preds}, Probability: {probs}")
-                    else:
-                        st.error(f"Prediction failed: {r.text}")
-                except Exception as e:
-                    st.error(f"Error: {e}")
-
-        st.markdown("---")
-        st.markdown(
-            """
-        ### Option B: Batch Prediction with CSV
-        You can upload a CSV file with the same columns that the model expects.
-        """
-        )
+def show_batch_prediction_job(backend_url, headers, job_id):
+    """
+    Poll a batch prediction job until it finishes, then show the output dataset.
+    """
+    progress_bar = st.progress(0.0, text="Batch prediction queued...")
+    while True:
+        try:
+            r = requests.get(f"{backend_url}/ml/jobs/{job_id}", headers=headers)
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return
+        if r.status_code != 200:
+            st.error(f"Unable to fetch the batch prediction job: {r.text}")
+            return
+        job = r.json()
+        if job["status"] in ("queued", "running"):
+            progress_bar.progress(
+                job["progress"], text=f"Batch prediction {job['status']}..."
+            )
+            time.sleep(1)
+            continue
+        break
 
-        file_up = st.file_uploader("Upload CSV", type=["csv"])
-        if file_up:
-            df_batch = pd.read_csv(file_up)
-            st.write("Preview of your uploaded CSV:")
-            st.dataframe(df_batch.head())
+    progress_bar.empty()
+    if job["status"] != "succeeded":
+        st.error(f"Batch prediction failed: {job.get('error')}")
+        return
 
-            if st.button("Make Batch Predictions"):
-                model_file = st.session_state.get("trained_model_file", None)
-                if not model_file:
-                    st.error("No model_file found in session.")
-                else:
-                    payload = {
-                        "model_name": model_file.replace(".joblib", ""),
-                        "data": df_batch.to_dict(orient="records"),
-                    }
-                    try:
-                        r = requests.post(
-                            f"{BACKEND_URL}/predict2",
-                            json=payload,
-                            headers=headers,
-                        )
-                        if r.status_code == 200:
-                            out = r.json()
-                            preds = out.get("predictions", [])
-                            probs = out.get("probabilities", [])
-                            df_out = df_batch.copy()
-                            df_out["Predicted"] = preds
-                            df_out["Probability"] = probs
-                            st.success("Batch prediction complete!")
-                            st.dataframe(df_out.head())
-
-                            csv_data = df_out.to_csv(index=False)
-                            st.download_button(
-                                "Download Predictions CSV",
-                                data=csv_data,
-                                file_name="predictions.csv",
-                                mime="text/csv",
-                            )
-                        else:
-                            st.error(f"Batch prediction failed: {r.text}")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
-
-        st.markdown(
-            "**End of Wizard**: You have successfully trained a model, checked metrics, and made predictions!"
-        )
-        show_footer()
+    output = requests.get(
+        f"{backend_url}/data/{job['output_dataset_id']}", headers=headers
+    ).json()
+    st.success(f"Batch prediction complete! Saved as dataset '{output['name']}'.")
+    st.dataframe(load_dataset_preview(backend_url, headers, output))
+    st.download_button(
+        "Download Predictions CSV",
+        data=fetch_dataset_bytes(backend_url, headers, output),
+        file_name=output["file_name"],
+        mime="text/csv",
+    )
@@ -0,0 +1,67 @@
+import os
+import threading
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import SpanKind
+
+SERVICE_NAME = "frontend"
+# Same settings as the backends: "file" appends JSON spans to
+# TRACES_DIR/frontend.jsonl, "console" prints them, "none" exports nothing
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACES_DIR = os.getenv("TRACES_DIR", "traces")
+
+tracer = trace.get_tracer("frontend")
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def setup_tracing() -> TracerProvider:
+    """
+    Install the tracer provider (once per Streamlit process).
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            provider = TracerProvider(
+                resource=Resource.create({"service.name": SERVICE_NAME})
+            )
+            if TRACING_EXPORTER == "file":
+                os.makedirs(TRACES_DIR, exist_ok=True)
+                out = open(
+                    os.path.join(TRACES_DIR, f"{SERVICE_NAME}.jsonl"), "a", buffering=1
+                )
+                exporter = ConsoleSpanExporter(
+                    service_name=SERVICE_NAME,
+                    out=out,
+                    formatter=lambda span: span.to_json(indent=None) + "\n",
+                )
+                provider.add_span_processor(BatchSpanProcessor(exporter))
+            elif TRACING_EXPORTER == "console":
+                provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+            trace.set_tracer_provider(provider)
+            _provider = provider
+        return _provider
+
+
+def span(name: str, **attributes):
+    """
+    `with span("start_training"):` around a user action; backend calls
+    made inside it with `traced_headers` join its trace.
+    """
+    setup_tracing()
+    return tracer.start_as_current_span(
+        name, kind=SpanKind.CLIENT, attributes=attributes
+    )
+
+
+def traced_headers(headers: dict) -> dict:
+    """
+    `headers` plus the W3C trace context of the current span.
+    """
+    headers = dict(headers)
+    propagate.inject(headers)
+    return headers